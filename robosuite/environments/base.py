@@ -1,8 +1,11 @@
-from collections import OrderedDict
+import copy
+import math
+from collections import OrderedDict, namedtuple
 from mujoco_py import MjSim, MjRenderContextOffscreen
-from mujoco_py import load_model_from_xml
 
 from robosuite.utils import SimulationError, XMLError, MujocoPyRenderer
+from robosuite.utils.model_cache import load_model_from_xml_cached
+from robosuite.utils.domain_randomization import DomainRandomizer, apply_randomization_ranges
 
 REGISTERED_ENVS = {}
 
@@ -22,6 +25,13 @@ def make(env_name, *args, **kwargs):
     return REGISTERED_ENVS[env_name](*args, **kwargs)
 
 
+# Picklable snapshot of an environment (see MujocoEnv.get_checkpoint).
+# @fields holds the values of the environment's @_checkpoint_fields, in order.
+EnvCheckpoint = namedtuple(
+    "EnvCheckpoint", ["sim_state", "timestep", "cur_time", "done", "fields"]
+)
+
+
 class EnvMeta(type):
     """Metaclass for registering environments"""
 
@@ -39,6 +49,12 @@ class EnvMeta(type):
 class MujocoEnv(metaclass=EnvMeta):
     """Initializes a Mujoco Environment."""
 
+    # python-side episode state saved along with the simulator state in checkpoints
+    _checkpoint_fields = ()
+
+    # environment-level domain randomization ranges, see apply_randomization_ranges
+    randomization = None
+
     def __init__(
         self,
         has_renderer=False,
@@ -98,6 +114,7 @@ class MujocoEnv(metaclass=EnvMeta):
         self.ignore_done = ignore_done
         self.viewer = None
         self.model = None
+        self.randomizer = None
 
         # settings for camera observations
         self.use_camera_obs = use_camera_obs
@@ -127,6 +144,12 @@ class MujocoEnv(metaclass=EnvMeta):
             )
         self.control_timestep = 1. / control_freq
 
+        # number of physics substeps per control step, fixed once so that it does
+        # not depend on floating point accumulation of @self.cur_time
+        self.n_substeps = max(
+            1, int(math.ceil(self.control_timestep / self.model_timestep - 1e-6))
+        )
+
     def _load_model(self):
         """Loads an xml model, puts it in self.model"""
         pass
@@ -185,6 +208,82 @@ class MujocoEnv(metaclass=EnvMeta):
         self.timestep = 0
         self.done = False
 
+        self._randomize_model()
+
+    def set_randomizer(self, randomizer):
+        """
+        Installs a DomainRandomizer that samples model properties in place
+        on every reset. Pass None to disable randomization.
+        """
+        self.randomizer = randomizer
+
+    def _randomize_model(self):
+        """
+        Applies domain randomization to the compiled model, using the ranges
+        declared on the task objects and arena, and the environment-level
+        @randomization ranges if set.
+        """
+        if self.randomization:
+            if self.randomizer is None:
+                self.randomizer = DomainRandomizer()
+            # objects and arena may have been rebuilt by _load_model
+            apply_randomization_ranges(
+                self.randomization,
+                mujoco_objects=getattr(self, "mujoco_objects", None),
+                mujoco_arena=getattr(self, "mujoco_arena", None),
+            )
+        if self.randomizer is None:
+            return
+        self.randomizer.bind(
+            self.sim,
+            mujoco_objects=getattr(self, "mujoco_objects", None),
+            mujoco_arena=getattr(self, "mujoco_arena", None),
+        )
+        self.randomizer.randomize()
+
+    def get_checkpoint(self):
+        """
+        Captures the simulator state together with the python-side episode state
+        declared in @_checkpoint_fields. The checkpoint is picklable and can be
+        restored any number of times on an environment built on the same model.
+
+        Returns:
+            EnvCheckpoint: snapshot of the current episode.
+        """
+        return EnvCheckpoint(
+            sim_state=self.sim.get_state().flatten(),
+            timestep=self.timestep,
+            cur_time=self.cur_time,
+            done=self.done,
+            fields=tuple(
+                copy.deepcopy(getattr(self, name, None)) for name in self._checkpoint_fields
+            ),
+        )
+
+    def restore_checkpoint(self, checkpoint):
+        """
+        Restores an episode captured by @get_checkpoint without rebuilding the model.
+
+        Args:
+            checkpoint (EnvCheckpoint): snapshot to restore.
+        """
+        if len(checkpoint.fields) != len(self._checkpoint_fields):
+            raise ValueError(
+                "Checkpoint holds {} episode fields, {} expects {}.".format(
+                    len(checkpoint.fields),
+                    self.__class__.__name__,
+                    len(self._checkpoint_fields),
+                )
+            )
+        self.sim.set_state_from_flattened(checkpoint.sim_state)
+        self.sim.forward()
+        self.timestep = checkpoint.timestep
+        self.cur_time = checkpoint.cur_time
+        self.done = checkpoint.done
+        # copy again so that the checkpoint can be restored repeatedly
+        for name, value in zip(self._checkpoint_fields, checkpoint.fields):
+            setattr(self, name, copy.deepcopy(value))
+
     def _get_observation(self):
         """Returns an OrderedDict containing observations [(name_string, np.array), ...]."""
         return OrderedDict()
@@ -196,13 +295,40 @@ class MujocoEnv(metaclass=EnvMeta):
 
         self.timestep += 1
         self._pre_action(action)
-        end_time = self.cur_time + self.control_timestep
-        while self.cur_time < end_time:
-            self.sim.step()
-            self.cur_time += self.model_timestep
+        self._step_simulation()
         reward, done, info = self._post_action(action)
         return self._get_observation(), reward, done, info
 
+    def _step_simulation(self, n_substeps=None, callback=None, stride=1):
+        """
+        Advances the simulation by a whole number of physics substeps.
+
+        Args:
+            n_substeps (int): number of substeps, defaults to one control step.
+            callback (function): if given, called as callback(i) right before
+                substep i for every i that is a multiple of @stride, e.g. to
+                record video frames.
+            stride (int): number of substeps between two callbacks.
+        """
+        if n_substeps is None:
+            n_substeps = self.n_substeps
+        step = self.sim.step
+        if callback is None:
+            # MjSim.step runs its nsubsteps mj_step calls in Cython, so the
+            # whole control step is a single call from Python
+            nsubsteps = self.sim.nsubsteps
+            self.sim.nsubsteps = n_substeps
+            try:
+                step()
+            finally:
+                self.sim.nsubsteps = nsubsteps
+        else:
+            for start in range(0, n_substeps, stride):
+                callback(start)
+                for _ in range(min(stride, n_substeps - start)):
+                    step()
+        self.cur_time += n_substeps * self.model_timestep
+
     def _pre_action(self, action):
         """Do any preprocessing before taking an action."""
         self.sim.data.ctrl[:] = action
@@ -253,12 +379,18 @@ class MujocoEnv(metaclass=EnvMeta):
 
     def reset_from_xml_string(self, xml_string):
         """Reloads the environment from an XML description of the environment."""
+        self.reset_from_model(load_model_from_xml_cached(xml_string))
+
+    def reset_from_model(self, mjpy_model):
+        """
+        Reloads the environment from an already compiled model, which lets
+        callers keep compiled models around instead of recompiling xmls.
+        """
 
         # if there is an active viewer window, destroy it
         self.close()
 
-        # load model from xml
-        self.mjpy_model = load_model_from_xml(xml_string)
+        self.mjpy_model = mjpy_model
 
         self.sim = MjSim(self.mjpy_model)
         self.initialize_time(self.control_freq)
@@ -9,6 +9,11 @@ import os
 
 import robosuite.utils.transform_utils as T
 from robosuite.utils.mjcf_utils import string_to_array
+from robosuite.utils.bin_utils import BinGeometry, DiscreteActionGrid
+from robosuite.utils.heightmap import make_bin_projector, make_bin_raycaster
+from robosuite.utils.segmentation import make_bin_segmenter
+from robosuite.utils.log_utils import get_logger
+from robosuite.utils.obs_utils import ObservationLayout
 from robosuite.environments.sawyer import SawyerEnv
 from gym.envs.mujoco import mujoco_env
 from gym import spaces
@@ -20,6 +25,8 @@ try:
 except ImportError:
     MPI = None
 
+logger = get_logger(__name__)
+
 from robosuite.models.arenas import BinPackingArena
 from robosuite.models.objects import (
     BananaObject,
@@ -50,6 +57,14 @@ from robosuite.models.tasks import BinPackingTask, UniformRandomSampler
 
 
 class BinPackPlace(SawyerEnv, mujoco_env.MujocoEnv, utils.EzPickle):
+    _checkpoint_fields = (
+        "finished_objs",
+        "success_objs",
+        "order",
+        "target_object",
+        "objects_in_bins",
+    )
+
     def __init__(
         self,
         gripper_type="TwoFingerGripper",
@@ -95,8 +110,35 @@ class BinPackPlace(SawyerEnv, mujoco_env.MujocoEnv, utils.EzPickle):
         action_bound=(np.array([0.5, 0.3]), np.array([0.7, 0.5])),
         # action_bound=(np.array([0.53, 0.3]), np.array([0.67, 0.45])),
         # action_bound=(np.array([0.5575, 0.3375]), np.array([0.6425, 0.4225])),
+        heightmap_source=None,
+        heightmap_camera="birdview",
+        heightmap_resolution=None,
+        camera_segmentation=False,
+        obs_layout="flat",
+        discrete_grid=None,
+        discrete_bin_mask=False,
+        randomization=None,
     ):
 
+        # heightmap observation
+        if heightmap_source not in (None, "camera", "raycast"):
+            raise ValueError("Unknown heightmap source: {}".format(heightmap_source))
+        self.heightmap_source = heightmap_source
+        self.heightmap_camera = heightmap_camera
+        self.heightmap_resolution = heightmap_resolution
+        self._heightmap_projector = None
+
+        # rendered segmentation observation
+        self.camera_segmentation = camera_segmentation
+        self._segmenter = None
+
+        # domain randomization ranges, declared again after every model rebuild
+        self.randomization = randomization
+
+        # discrete drop points, one lookup table per (x_num, y_num)
+        self._discrete_grids = {}
+        self.action_grid = None
+
         # task settings
         self.random_take = random_take
         self.obj_names = obj_names
@@ -193,46 +235,48 @@ class BinPackPlace(SawyerEnv, mujoco_env.MujocoEnv, utils.EzPickle):
             assert self.use_object_obs, "Object observations need to be enabled."
             keys = ["image", "state"]
         self.keys = keys
+        # images stay uint8, the type vector is a separate float32 entry
+        # unless the layout is flat
+        self.obs_layout = ObservationLayout(
+            keys, obs_layout, extra_keys=("sequence_vector",) if use_typeVector else ()
+        )
 
         # set up observation and action spaces
         flat_ob = self._flatten_obs(super().reset(), verbose=True)
-        self.obs_dim = flat_ob.shape
-        high = np.inf * np.ones(self.obs_dim)
-        low = -high
-        self.observation_space = spaces.Box(low=low, high=high)
+        self.obs_dim = flat_ob.shape if obs_layout == "flat" else None
+        self.observation_space = self.obs_layout.space(flat_ob)
 
+        self.action_bound = action_bound
         high = action_bound[1]
         low = action_bound[0]
         assert np.all(high >= low)
         self.action_space = spaces.Box(low=low, high=high)
 
+        # with @discrete_grid = (x_num, y_num), actions are ids of grid cells,
+        # restricted to the cells above the bin if @discrete_bin_mask
+        if discrete_grid is not None:
+            x_num, y_num = discrete_grid
+            if discrete_bin_mask:
+                self.action_grid = DiscreteActionGrid.from_bin(low, high, x_num, y_num, self.bin_geometry)
+            else:
+                self.action_grid = self.discrete_action_grid(x_num, y_num)
+            self.action_space = self.action_grid.space
+
     def reset(self):
         ob_dict = super().reset()
         return self._flatten_obs(ob_dict)
 
     def _flatten_obs(self, obs_dict, verbose=False):
         """
-        Filters keys of interest out and concatenate the information.
+        Filters keys of interest out and arranges them in the observation
+        layout, see @ObservationLayout.
 
         Args:
             obs_dict: ordered dictionary of observations
         """
-        ob_lst = []
-        for key in obs_dict:
-            if key in self.keys:
-                if verbose:
-                    print("adding key: {}".format(key))
-                ob_lst.append(obs_dict[key])
-
-        if self.use_typeVector:
-            ob_image = np.concatenate(ob_lst)
-            type_vector = obs_dict['sequence_vector']
+        obs = self.obs_layout(obs_dict, verbose=verbose)
 
-            obs = np.concatenate((ob_image.reshape(-1), type_vector))
-        else:
-            obs = np.concatenate(ob_lst)
-
-        if self.obs_to_tensor:
+        if self.obs_to_tensor and self.obs_layout.layout == "flat":
             import cv2
             obs = cv2.resize(obs, (84, 84), interpolation=cv2.INTER_AREA)
             # obs = np.asarray(obs, dtype=np.float32) / 255.0
@@ -329,6 +373,7 @@ class BinPackPlace(SawyerEnv, mujoco_env.MujocoEnv, utils.EzPickle):
 
         self.bin_pos = string_to_array(self.model.bin2_body.get("pos"))
         self.bin_size = self.table_target_size
+        self.bin_geometry = BinGeometry.from_center(self.bin_pos, self.bin_size, self.bin_size[2])
 
     def clear_objects(self, obj):
         """
@@ -409,13 +454,10 @@ class BinPackPlace(SawyerEnv, mujoco_env.MujocoEnv, utils.EzPickle):
     def _pre_action(self, action):
         if action is None:
             # gravity compensation
-            self.sim.data.qfrc_applied[
-                self._ref_joint_vel_indexes
-            ] = self.sim.data.qfrc_bias[self._ref_joint_vel_indexes]
+            self.actuation.compensate_gravity(self.sim.data)
             return
 
-        gripper_dim = self.sim.model.get_joint_qpos_addr(self.object_names[0])[0]
-        beg_dim = gripper_dim + self.object_names.index(self.target_object) * 6
+        beg_dim = self.actuation.object_dofs[self.target_object].start
         ## set force
         self.sim.data.qfrc_applied[beg_dim + 2] = self.sim.data.qfrc_bias[beg_dim + 2] * self.force_ratios
         # self.sim.data.qfrc_applied[beg_dim+2:beg_dim+6] = self.sim.data.qfrc_bias[beg_dim+2:beg_dim+6]
@@ -428,21 +470,24 @@ class BinPackPlace(SawyerEnv, mujoco_env.MujocoEnv, utils.EzPickle):
         self._gripper_visualization()
         return ret
 
-    def discreteId_to_action(self, action_id, x_num, y_num):
-        assert x_num > 0 and y_num > 0
-
-        x_id = action_id // x_num
-        y_id = action_id % y_num
-
-        bound = self.action_space
-
-        delta_x = (bound.high[0] - bound.low[0]) / x_num
-        delta_y = (bound.high[1] - bound.low[1]) / y_num
-
-        x = bound.low[0] + delta_x * x_id
-        y = bound.low[1] + delta_y * y_id
+    def discrete_action_grid(self, x_num, y_num):
+        """
+        Returns the unmasked grid of @x_num by @y_num drop points over the
+        continuous action bounds, built on first use.
+        """
+        key = (x_num, y_num)
+        if key not in self._discrete_grids:
+            self._discrete_grids[key] = DiscreteActionGrid(
+                self.action_bound[0], self.action_bound[1], x_num, y_num
+            )
+        return self._discrete_grids[key]
 
-        return np.array([x, y])
+    def discreteId_to_action(self, action_id, x_num, y_num):
+        """
+        Returns the drop point of cell @action_id = x_id * y_num + y_id, or
+        the (n, 2) points of an array of ids.
+        """
+        return self.discrete_action_grid(x_num, y_num).decode(action_id)
 
     def step_discrete(self, action_id, x_num, y_num):
         action = self.discreteId_to_action(action_id, x_num, y_num)
@@ -453,6 +498,10 @@ class BinPackPlace(SawyerEnv, mujoco_env.MujocoEnv, utils.EzPickle):
         if self.done:
             raise ValueError("executing action in terminated episode")
 
+        if self.action_grid is not None and np.issubdtype(np.asarray(action).dtype, np.integer):
+            # vector envs may pass the id as a (1,) array
+            action = self.action_grid.decode(np.squeeze(action))
+
         if self.make_dataset:
             ob_dict = self._get_observation()
             data_input = ob_dict['image'].copy()
@@ -462,25 +511,20 @@ class BinPackPlace(SawyerEnv, mujoco_env.MujocoEnv, utils.EzPickle):
 
         self.timestep += 1
         self._pre_action(action)
-        end_time = self.cur_time + self.control_timestep
 
         info = {}
         info['obj_type'] = self.obj2type(self.target_object)
 
         if self.render_drop_freq:
-            i = 0
             info['birdview'] = []
 
-        while self.cur_time < end_time:
-            if self.render_drop_freq:
-                if i % self.render_drop_freq == 0:
-                    info['birdview'].append(self.sim.render(width=self.video_width, height=self.video_height,
-                                                            camera_name='birdview', depth=self.camera_depth))
+            def record_frame(i):
+                info['birdview'].append(self.sim.render(width=self.video_width, height=self.video_height,
+                                                        camera_name='birdview', depth=self.camera_depth))
 
-                i += 1
-
-            self.sim.step()
-            self.cur_time += self.model_timestep
+            self._step_simulation(callback=record_frame, stride=self.render_drop_freq)
+        else:
+            self._step_simulation()
 
         reward = self.reward(action)
 
@@ -493,7 +537,12 @@ class BinPackPlace(SawyerEnv, mujoco_env.MujocoEnv, utils.EzPickle):
 
         if done:
             info['success_obj'] = self.success_objs
-            print('Done!')
+            info['episode_summary'] = {
+                'success_objs': self.success_objs,
+                'finished_objs': self.finished_objs,
+                'num_steps': self.timestep,
+            }
+            logger.debug("episode done: %d / %d objects placed", self.success_objs, self.finished_objs)
 
         ob_dict = self._get_observation()
 
@@ -530,6 +579,9 @@ class BinPackPlace(SawyerEnv, mujoco_env.MujocoEnv, utils.EzPickle):
 
     def _get_reference(self):
         super()._get_reference()
+        self.actuation.add_objects(self.mujoco_objects.keys())
+        self._heightmap_projector = None
+        self._segmenter = None
         self.obj_body_id = {}
         self.obj_geom_id = {}
 
@@ -547,6 +599,9 @@ class BinPackPlace(SawyerEnv, mujoco_env.MujocoEnv, utils.EzPickle):
 
         # for checking distance to / contact with objects we want to pick up
         self.target_object_body_ids = list(map(int, self.obj_body_id.values()))
+        self.item_body_ids = np.array(
+            [self.obj_body_id[str(name)] for name in self.item_names], dtype=np.int64
+        )
         # self.contact_with_object_geom_ids = list(map(int, self.obj_geom_id.values()))
 
         # keep track of which objects are in their corresponding bins
@@ -581,7 +636,7 @@ class BinPackPlace(SawyerEnv, mujoco_env.MujocoEnv, utils.EzPickle):
             reward = 0
 
         # if reward != 0:
-        print('Reward: ', reward, ' by Action: ', action)
+        logger.debug("reward %s by action %s", reward, action)
         return reward
 
     def get_bin_bound(self):
@@ -594,26 +649,7 @@ class BinPackPlace(SawyerEnv, mujoco_env.MujocoEnv, utils.EzPickle):
         return np.array([bin_x_low, bin_y_low]), np.array([bin_x_high, bin_y_high])
 
     def not_in_bin(self, obj_pos):
-
-        bin_x_low = self.bin_pos[0] - self.bin_size[0] / 2
-        bin_y_low = self.bin_pos[1] - self.bin_size[1] / 2
-
-        bin_x_high = bin_x_low + self.bin_size[0]
-        bin_y_high = bin_y_low + self.bin_size[1]
-
-        delta = 0
-
-        res = True
-        if (
-            obj_pos[2] > self.bin_pos[2]
-            and obj_pos[0] < bin_x_high
-            and obj_pos[0] > bin_x_low
-            and obj_pos[1] < bin_y_high
-            and obj_pos[1] > bin_y_low
-            and obj_pos[2] < self.bin_pos[2] + self.bin_size[2] - delta
-        ):
-            res = False
-        return res
+        return bool(self.bin_geometry.not_in_bin(obj_pos))
 
     def in_box_bound(self, action):
 
@@ -635,15 +671,15 @@ class BinPackPlace(SawyerEnv, mujoco_env.MujocoEnv, utils.EzPickle):
 
 
     def make_type_vector(self, idx):
-        temp_idx = np.zeros(len(self.object_to_id))
+        temp_idx = np.zeros(len(self.object_to_id), dtype=np.float32)
         if idx < 0:
-            return temp_idx.astype(np.int)
+            return temp_idx
 
         obj_to_take_name = self.obj_names[idx]
         obj_type = self.object_to_id[obj_to_take_name]
         temp_idx[obj_type] = 1
 
-        return temp_idx.astype(np.int)
+        return temp_idx
 
 
     def _get_observation(self):
@@ -683,6 +719,21 @@ class BinPackPlace(SawyerEnv, mujoco_env.MujocoEnv, utils.EzPickle):
 
             di['vis'] = imgae_depth
 
+            if self.camera_segmentation:
+                di["segmentation"] = self._render_segmentation("birdview")
+
+        if self.heightmap_source is not None:
+            # reuse the birdview depth buffer if it has been rendered already
+            raw_depth = None
+            if (
+                self.heightmap_source == "camera"
+                and self.use_camera_obs
+                and self.camera_depth
+                and self.heightmap_camera == "birdview"
+            ):
+                raw_depth = bird_depth
+            di["heightmap"] = self._get_heightmap(raw_depth)
+
         ## get type one-hot vector in sequence
         if self.use_typeVector:
             sequence_vector = []
@@ -709,6 +760,52 @@ class BinPackPlace(SawyerEnv, mujoco_env.MujocoEnv, utils.EzPickle):
 
         return di
 
+    def _get_heightmap(self, depth=None):
+        """
+        Returns a top-down heightmap of the bin, heights measured from the bin
+        origin. @depth may pass an already rendered raw depth buffer of
+        @self.heightmap_camera at the camera resolution.
+        """
+        if self._heightmap_projector is None and self.heightmap_source == "raycast":
+            self._heightmap_projector = make_bin_raycaster(
+                self.sim,
+                self.bin_pos,
+                self.bin_size,
+                self.item_body_ids,
+                self.heightmap_resolution,
+            )
+        elif self._heightmap_projector is None:
+            # camera geometry only changes when the model is reloaded
+            self._heightmap_projector = make_bin_projector(
+                self.sim,
+                self.heightmap_camera,
+                self.camera_width,
+                self.camera_height,
+                self.bin_pos,
+                self.bin_size,
+                self.heightmap_resolution,
+            )
+        if self.heightmap_source == "raycast":
+            return self._heightmap_projector.heightmap().copy()
+        if depth is None:
+            _, depth = self.sim.render(
+                width=self.camera_width,
+                height=self.camera_height,
+                camera_name=self.heightmap_camera,
+                depth=True,
+            )
+        return self._heightmap_projector.heightmap(depth).copy()
+
+    def _render_segmentation(self, camera_name):
+        """
+        Returns the (height, width, 1) segmentation labels seen from @camera_name.
+        """
+        if self._segmenter is None:
+            self._segmenter = make_bin_segmenter(
+                self.sim, "bin2", list(self.mujoco_objects.keys())
+            )
+        return self._segmenter.render(self.camera_width, self.camera_height, camera_name)
+
     def _check_contact(self):
         """
         Returns True if gripper is in contact with an object.
@@ -725,11 +822,7 @@ class BinPackPlace(SawyerEnv, mujoco_env.MujocoEnv, utils.EzPickle):
 
     def _check_success_obj(self, obj_name):
         obj_pos = self.sim.data.body_xpos[self.obj_body_id[obj_name]]
-        not_in_bin = self.not_in_bin(obj_pos)
-        if not_in_bin:
-            return False
-        else:
-            return True
+        return bool(self.bin_geometry.contains(obj_pos))
 
     def _check_success(self):
         """
@@ -738,14 +831,9 @@ class BinPackPlace(SawyerEnv, mujoco_env.MujocoEnv, utils.EzPickle):
 
         # remember objects that are in the correct bins
         gripper_site_pos = self.sim.data.site_xpos[self.eef_site_id]
-        for i in range(len(self.ob_inits)):
-            obj_str = str(self.item_names[i])
-            obj_pos = self.sim.data.body_xpos[self.obj_body_id[obj_str]]
-            dist = np.linalg.norm(gripper_site_pos - obj_pos)
-            r_reach = 1 - np.tanh(10.0 * dist)
-            self.objects_in_bins[i] = int(
-                (not self.not_in_bin(obj_pos)) and r_reach < 0.6
-            )
+        self.objects_in_bins[:] = self.bin_geometry.success(
+            self.sim.data.body_xpos[self.item_body_ids], gripper_site_pos
+        )
 
         # returns True if all objects are in correct bins
         return np.sum(self.objects_in_bins) == len(self.ob_inits)
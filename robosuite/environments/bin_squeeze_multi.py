@@ -9,6 +9,11 @@ import os
 
 import robosuite.utils.transform_utils as T
 from robosuite.utils.mjcf_utils import string_to_array
+from robosuite.utils.bin_utils import BinGeometry
+from robosuite.utils.heightmap import make_bin_projector, make_bin_raycaster
+from robosuite.utils.segmentation import make_bin_segmenter
+from robosuite.utils.log_utils import get_logger
+from robosuite.utils.obs_utils import ObservationLayout
 from robosuite.environments.sawyer import SawyerEnv
 from gym.envs.mujoco import mujoco_env
 from gym import spaces
@@ -19,6 +24,8 @@ try:
 except ImportError:
     MPI = None
 
+logger = get_logger(__name__)
+
 from robosuite.models.arenas import BinSqueezeArena
 from robosuite.models.objects import (
     MilkObject,
@@ -41,6 +48,17 @@ from robosuite.models.tasks import BinSqueezeTask, UniformRandomSampler
 
 
 class BinSqueezeMulti(SawyerEnv, mujoco_env.MujocoEnv):
+    _checkpoint_fields = (
+        "cur_step",
+        "total_reward",
+        "over_times",
+        "object_to_choose",
+        "success_objs",
+        "initialize_objects",
+        "target_cur_pos",
+        "target_object",
+    )
+
     def __init__(
             self,
             gripper_type="TwoFingerGripper",
@@ -88,6 +106,12 @@ class BinSqueezeMulti(SawyerEnv, mujoco_env.MujocoEnv):
             random_quat=False,
             random_target=True,
             test_cases=[],
+            heightmap_source=None,
+            heightmap_camera="birdview",
+            heightmap_resolution=None,
+            camera_segmentation=False,
+            obs_layout="flat",
+            randomization=None,
     ):
         """
         Args:
@@ -166,8 +190,45 @@ class BinSqueezeMulti(SawyerEnv, mujoco_env.MujocoEnv):
                 (x, y, z, u, v, w ,t)
                 (0, 1, 2, 3, 4, 5, 6)
                 eg: [2, 5] -> action space: (z, w)
+
+            heightmap_source (str): if set, add a top-down "heightmap" of the bin
+                to the observations. "camera" unprojects the depth buffer of
+                @heightmap_camera, "raycast" casts vertical rays against the object
+                geoms and needs no renderer.
+
+            heightmap_camera (str): camera whose depth buffer builds the heightmap.
+
+            heightmap_resolution (float): side length of a heightmap cell, in
+                meters. Defaults to 2mm for "camera" and 5mm for "raycast".
+
+            camera_segmentation (bool): if True, add a "segmentation" observation
+                rendered by MuJoCo with the same layout as the depth channel
+                (0: background, 1: bin, 2 + i: i-th object).
+
+            obs_layout (str): "flat" returns the observation keys as one array,
+                "dict" as a dict of uint8 images and float32 vectors with a gym
+                Dict observation space, see @ObservationLayout.
+
+            randomization (dict): domain randomization ranges kept by the
+                environment and declared on the rebuilt objects and arena on
+                every reset, see apply_randomization_ranges.
         """
 
+        # heightmap observation
+        if heightmap_source not in (None, "camera", "raycast"):
+            raise ValueError("Unknown heightmap source: {}".format(heightmap_source))
+        self.heightmap_source = heightmap_source
+        self.heightmap_camera = heightmap_camera
+        self.heightmap_resolution = heightmap_resolution
+        self._heightmap_projector = None
+
+        # rendered segmentation observation
+        self.camera_segmentation = camera_segmentation
+        self._segmenter = None
+
+        # domain randomization ranges, declared again after every model rebuild
+        self.randomization = randomization
+
         # task settings
         self.obj_names = obj_names
         self.obj_poses = obj_poses
@@ -223,6 +284,7 @@ class BinSqueezeMulti(SawyerEnv, mujoco_env.MujocoEnv):
             assert self.use_object_obs, "Object observations need to be enabled."
             keys = ["image"]
         self.keys = keys
+        self.obs_layout = ObservationLayout(keys, obs_layout)
 
         super().__init__(
             gripper_type=gripper_type,
@@ -258,10 +320,8 @@ class BinSqueezeMulti(SawyerEnv, mujoco_env.MujocoEnv):
 
         # set up observation and action spaces
         flat_ob = self._flatten_obs(super().reset(), verbose=True)
-        self.obs_dim = flat_ob.shape
-        high = np.inf * np.ones(self.obs_dim)
-        low = -high
-        self.observation_space = spaces.Box(low=low, high=high)
+        self.obs_dim = flat_ob.shape if obs_layout == "flat" else None
+        self.observation_space = self.obs_layout.space(flat_ob)
 
         high = np.ones(self.action_dim)
         low = -high.copy()
@@ -279,19 +339,14 @@ class BinSqueezeMulti(SawyerEnv, mujoco_env.MujocoEnv):
 
     def _flatten_obs(self, obs_dict, verbose=False):
         """
-        Filters keys of interest out and concatenate the information.
+        Filters keys of interest out and arranges them in the observation
+        layout, see @ObservationLayout. A single image key is returned without
+        a copy, so info['vis'] shares its buffer.
 
         Args:
             obs_dict: ordered dictionary of observations
         """
-        ob_lst = []
-        for key in obs_dict:
-            if key in self.keys:
-                if verbose:
-                    print("adding key: {}".format(key))
-                ob_lst.append(obs_dict[key])
-
-        return np.concatenate(ob_lst)
+        return self.obs_layout(obs_dict, verbose=verbose)
 
     def _name2obj(self, name):
         assert name in self.object_to_id.keys()
@@ -375,6 +430,11 @@ class BinSqueezeMulti(SawyerEnv, mujoco_env.MujocoEnv):
         self.bin_pos = string_to_array(self.model.bin2_body.get("pos"))
         self.bin_size = self.table_target_size
 
+        # the top of the bin is left open, with some tolerance around its walls
+        self.bin_geometry = BinGeometry.from_center(
+            self.bin_pos, self.bin_size, np.inf, margin=(0.03, 0.02, 0.01)
+        )
+
     def clear_objects(self, obj):
         """
         Clears objects with name @obj out of the task space. This is useful
@@ -549,13 +609,10 @@ class BinSqueezeMulti(SawyerEnv, mujoco_env.MujocoEnv):
     def _pre_action(self, action):
         if action is None:
             # gravity compensation
-            self.sim.data.qfrc_applied[
-                self._ref_joint_vel_indexes
-            ] = self.sim.data.qfrc_bias[self._ref_joint_vel_indexes]
+            self.actuation.compensate_gravity(self.sim.data)
             return
 
-        gripper_dim = self.sim.model.get_joint_qpos_addr(self.object_names[0])[0]
-        beg_dim = gripper_dim + self.object_names.index(self.target_object) * 6
+        beg_dim = self.actuation.object_dofs[self.target_object].start
         ## set force
         sigs = np.sign(action[0:3])
 
@@ -564,18 +621,12 @@ class BinSqueezeMulti(SawyerEnv, mujoco_env.MujocoEnv):
 
     def _post_action(self, action, info={}):
         if action is None:
-            sim_state = self.sim.get_state()
-            sim_state.qvel[:] = 0
-            self.sim.set_state(sim_state)
+            self.sim.data.qvel[:] = 0
             self.sim.forward()
             return
 
         # remove vel
-        sim_state = self.sim.get_state()
-        beg_dim, end_dim = self.sim.model.get_joint_qvel_addr(self.target_object)
-        sim_state.qvel[beg_dim : end_dim] = 0
-
-        self.sim.set_state(sim_state)
+        self.sim.data.qvel[self.actuation.object_dofs[self.target_object]] = 0
         self.sim.forward()
 
         # calculate reward
@@ -584,7 +635,7 @@ class BinSqueezeMulti(SawyerEnv, mujoco_env.MujocoEnv):
         # done
         self.cur_step += 1
         if done:
-            print('This Done!')
+            logger.debug("target %s done", self.target_object)
 
         return reward, done, succ, info
 
@@ -620,10 +671,7 @@ class BinSqueezeMulti(SawyerEnv, mujoco_env.MujocoEnv):
         info.update(temp_info)
 
         ## mujoco step
-        end_time = self.cur_time + self.control_timestep
-        while self.cur_time < end_time:
-            self.sim.step()
-            self.cur_time += self.model_timestep
+        self._step_simulation()
 
         ## post action: calculate reward
         reward, this_done, this_succ, info = self._post_action(action, info)
@@ -655,7 +703,6 @@ class BinSqueezeMulti(SawyerEnv, mujoco_env.MujocoEnv):
                 done = False
 
         if done:
-            print('All done!')
             info['stack_len'] = len(self.stack)
             info['total_reward'] = self.total_reward
             info['num_steps'] = self.cur_step
@@ -666,6 +713,14 @@ class BinSqueezeMulti(SawyerEnv, mujoco_env.MujocoEnv):
             else:
                 info['num_steps_fail'] = self.cur_step
                 info['succ'] = 0
+            info['episode_summary'] = {
+                'total_reward': self.total_reward,
+                'num_steps': self.cur_step,
+                'success_objs': self.success_objs,
+                'succ': info['succ'],
+            }
+            logger.debug("all done: %d objects placed, reward %.3f in %d steps",
+                         self.success_objs, self.total_reward, self.cur_step)
         ## obs
         ob_dict = self._get_observation()
         info['vis'] = ob_dict['vis']
@@ -675,6 +730,9 @@ class BinSqueezeMulti(SawyerEnv, mujoco_env.MujocoEnv):
 
     def _get_reference(self):
         super()._get_reference()
+        self.actuation.add_objects(self.mujoco_objects.keys())
+        self._heightmap_projector = None
+        self._segmenter = None
         self.obj_body_id = {}
         self.obj_geom_id = {}
 
@@ -692,6 +750,9 @@ class BinSqueezeMulti(SawyerEnv, mujoco_env.MujocoEnv):
 
         # for checking distance to / contact with objects we want to pick up
         self.target_object_body_ids = list(map(int, self.obj_body_id.values()))
+        self.item_body_ids = np.array(
+            [self.obj_body_id[str(name)] for name in self.item_names], dtype=np.int64
+        )
         # self.contact_with_object_geom_ids = list(map(int, self.obj_geom_id.values()))
 
         # keep track of which objects are in their corresponding bins
@@ -753,7 +814,7 @@ class BinSqueezeMulti(SawyerEnv, mujoco_env.MujocoEnv):
                 succ = False
 
         reward -= energy
-        print('Reward: ', reward)
+        logger.debug("reward %s", reward)
         # float overflow
         assert reward <= 100
         return reward, done, succ
@@ -766,28 +827,7 @@ class BinSqueezeMulti(SawyerEnv, mujoco_env.MujocoEnv):
         pass
 
     def not_in_bin(self, obj_pos):
-
-        bin_x_low = self.bin_pos[0] - self.bin_size[0] / 2
-        bin_y_low = self.bin_pos[1] - self.bin_size[1] / 2
-
-        bin_x_high = bin_x_low + self.bin_size[0]
-        bin_y_high = bin_y_low + self.bin_size[1]
-
-        res = True
-        delta_x = 0.03
-        delta_y = 0.02
-        delta_z = 0.01
-
-        if (
-                obj_pos[2] > self.bin_pos[2] - delta_z
-                and obj_pos[0] < bin_x_high + delta_x
-                and obj_pos[0] > bin_x_low - delta_x
-                and obj_pos[1] < bin_y_high + delta_y
-                and obj_pos[1] > bin_y_low - delta_y
-                # and obj_pos[2] < self.bin_pos[2] + self.bin_size[2]r
-        ):
-            res = False
-        return res
+        return bool(self.bin_geometry.not_in_bin(obj_pos))
 
     def _get_observation(self):
         """
@@ -837,8 +877,75 @@ class BinSqueezeMulti(SawyerEnv, mujoco_env.MujocoEnv):
 
             di['vis'] = imgae_depth
 
+            if self.camera_segmentation:
+                di["segmentation"] = np.concatenate(
+                    [
+                        self._render_segmentation(name)
+                        for name in ("frontview", "sideview", "birdview")
+                    ],
+                    1,
+                )
+
+        if self.heightmap_source is not None:
+            # reuse the birdview depth buffer if it has been rendered already
+            raw_depth = None
+            if (
+                self.heightmap_source == "camera"
+                and self.use_camera_obs
+                and self.camera_depth
+                and self.heightmap_camera == "birdview"
+            ):
+                raw_depth = bird_depth
+            di["heightmap"] = self._get_heightmap(raw_depth)
+
         return di
 
+    def _get_heightmap(self, depth=None):
+        """
+        Returns a top-down heightmap of the bin, heights measured from the bin
+        origin. @depth may pass an already rendered raw depth buffer of
+        @self.heightmap_camera at the camera resolution.
+        """
+        if self._heightmap_projector is None and self.heightmap_source == "raycast":
+            self._heightmap_projector = make_bin_raycaster(
+                self.sim,
+                self.bin_pos,
+                self.bin_size,
+                self.item_body_ids,
+                self.heightmap_resolution,
+            )
+        elif self._heightmap_projector is None:
+            # camera geometry only changes when the model is reloaded
+            self._heightmap_projector = make_bin_projector(
+                self.sim,
+                self.heightmap_camera,
+                self.camera_width,
+                self.camera_height,
+                self.bin_pos,
+                self.bin_size,
+                self.heightmap_resolution,
+            )
+        if self.heightmap_source == "raycast":
+            return self._heightmap_projector.heightmap().copy()
+        if depth is None:
+            _, depth = self.sim.render(
+                width=self.camera_width,
+                height=self.camera_height,
+                camera_name=self.heightmap_camera,
+                depth=True,
+            )
+        return self._heightmap_projector.heightmap(depth).copy()
+
+    def _render_segmentation(self, camera_name):
+        """
+        Returns the (height, width, 1) segmentation labels seen from @camera_name.
+        """
+        if self._segmenter is None:
+            self._segmenter = make_bin_segmenter(
+                self.sim, "bin2", list(self.mujoco_objects.keys())
+            )
+        return self._segmenter.render(self.camera_width, self.camera_height, camera_name)
+
     def _check_contact(self):
         """
         Returns True if gripper is in contact with an object.
@@ -860,14 +967,9 @@ class BinSqueezeMulti(SawyerEnv, mujoco_env.MujocoEnv):
 
         # remember objects that are in the correct bins
         gripper_site_pos = self.sim.data.site_xpos[self.eef_site_id]
-        for i in range(len(self.ob_inits)):
-            obj_str = str(self.item_names[i])
-            obj_pos = self.sim.data.body_xpos[self.obj_body_id[obj_str]]
-            dist = np.linalg.norm(gripper_site_pos - obj_pos)
-            r_reach = 1 - np.tanh(10.0 * dist)
-            self.objects_in_bins[i] = int(
-                (not self.not_in_bin(obj_pos)) and r_reach < 0.6
-            )
+        self.objects_in_bins[:] = self.bin_geometry.success(
+            self.sim.data.body_xpos[self.item_body_ids], gripper_site_pos
+        )
 
         # returns True if all objects are in correct bins
         return np.sum(self.objects_in_bins) == len(self.ob_inits)
@@ -2,6 +2,7 @@ from collections import OrderedDict
 import numpy as np
 
 import robosuite.utils.transform_utils as T
+from robosuite.utils.actuation import ActuationLayout
 from robosuite.environments import MujocoEnv
 
 from robosuite.models.grippers import gripper_factory
@@ -130,7 +131,12 @@ class SawyerEnv(MujocoEnv):
             self.sim.model.get_joint_qvel_addr(x) for x in self.robot_joints
         ]
 
+        # precomputed dof layout for gravity compensation and force hooks
+        self.actuation = ActuationLayout(self.sim.model, self.robot_joints)
+
         if self.use_indicator_object:
+            self.actuation.add_compensated_joint("pos_indicator")
+
             ind_qpos = self.sim.model.get_joint_qpos_addr("pos_indicator")
             self._ref_indicator_pos_low, self._ref_indicator_pos_high = ind_qpos
 
@@ -214,17 +220,8 @@ class SawyerEnv(MujocoEnv):
         applied_action = bias + weight * action
         self.sim.data.ctrl[:] = applied_action
 
-        # gravity compensation
-        self.sim.data.qfrc_applied[
-            self._ref_joint_vel_indexes
-        ] = self.sim.data.qfrc_bias[self._ref_joint_vel_indexes]
-
-        if self.use_indicator_object:
-            self.sim.data.qfrc_applied[
-                self._ref_indicator_vel_low : self._ref_indicator_vel_high
-            ] = self.sim.data.qfrc_bias[
-                self._ref_indicator_vel_low : self._ref_indicator_vel_high
-            ]
+        # gravity compensation (robot and indicator joints)
+        self.actuation.compensate_gravity(self.sim.data)
 
     def _post_action(self, action):
         """
@@ -4,6 +4,7 @@ import numpy as np
 
 import robosuite.utils.transform_utils as T
 from robosuite.utils.mjcf_utils import string_to_array
+from robosuite.utils.bin_utils import BinGeometry
 from robosuite.environments.sawyer import SawyerEnv
 
 from robosuite.models.arenas import BinsArena
@@ -234,6 +235,13 @@ class SawyerPickPlace(SawyerEnv):
         self.bin_pos = string_to_array(self.model.bin2_body.get("pos"))
         self.bin_size = self.model.bin_size
 
+        # the target bin is split into one quadrant per object type
+        low = np.tile(self.bin_pos, (4, 1))
+        low[[0, 2], 0] -= self.bin_size[0] / 2
+        low[[0, 1], 1] -= self.bin_size[1] / 2
+        high = low + np.array([self.bin_size[0] / 2, self.bin_size[1] / 2, 0.1])
+        self.bin_geometry = BinGeometry(low, high)
+
     def clear_objects(self, obj):
         """
         Clears objects with name @obj out of the task space. This is useful
@@ -268,6 +276,11 @@ class SawyerPickPlace(SawyerEnv):
 
         # for checking distance to / contact with objects we want to pick up
         self.target_object_body_ids = list(map(int, self.obj_body_id.values()))
+        self.item_body_ids = np.array(
+            [self.obj_body_id[str(name) + "0"] for name in self.item_names], dtype=np.int64
+        )
+        # every object type has its own bin quadrant
+        self.item_bin_ids = np.arange(len(self.item_names))
         self.contact_with_object_geom_ids = list(map(int, self.obj_geom_id.values()))
 
         # keep track of which objects are in their corresponding bins
@@ -406,28 +419,7 @@ class SawyerPickPlace(SawyerEnv):
         return r_reach, r_grasp, r_lift, r_hover
 
     def not_in_bin(self, obj_pos, bin_id):
-
-        bin_x_low = self.bin_pos[0]
-        bin_y_low = self.bin_pos[1]
-        if bin_id == 0 or bin_id == 2:
-            bin_x_low -= self.bin_size[0] / 2
-        if bin_id < 2:
-            bin_y_low -= self.bin_size[1] / 2
-
-        bin_x_high = bin_x_low + self.bin_size[0] / 2
-        bin_y_high = bin_y_low + self.bin_size[1] / 2
-
-        res = True
-        if (
-            obj_pos[2] > self.bin_pos[2]
-            and obj_pos[0] < bin_x_high
-            and obj_pos[0] > bin_x_low
-            and obj_pos[1] < bin_y_high
-            and obj_pos[1] > bin_y_low
-            and obj_pos[2] < self.bin_pos[2] + 0.1
-        ):
-            res = False
-        return res
+        return bool(self.bin_geometry.not_in_bin(obj_pos, bin_id))
 
     def _get_observation(self):
         """
@@ -527,14 +519,11 @@ class SawyerPickPlace(SawyerEnv):
 
         # remember objects that are in the correct bins
         gripper_site_pos = self.sim.data.site_xpos[self.eef_site_id]
-        for i in range(len(self.ob_inits)):
-            obj_str = str(self.item_names[i]) + "0"
-            obj_pos = self.sim.data.body_xpos[self.obj_body_id[obj_str]]
-            dist = np.linalg.norm(gripper_site_pos - obj_pos)
-            r_reach = 1 - np.tanh(10.0 * dist)
-            self.objects_in_bins[i] = int(
-                (not self.not_in_bin(obj_pos, i)) and r_reach < 0.6
-            )
+        self.objects_in_bins[:] = self.bin_geometry.success(
+            self.sim.data.body_xpos[self.item_body_ids],
+            gripper_site_pos,
+            bin_ids=self.item_bin_ids,
+        )
 
         # returns True if a single object is in the correct bin
         if self.single_object_mode == 1 or self.single_object_mode == 2:
@@ -3,11 +3,40 @@ import numpy as np
 from robosuite.models.base import MujocoXML
 from robosuite.utils.mjcf_utils import array_to_string, string_to_array
 from robosuite.utils.mjcf_utils import new_geom, new_body, new_joint
+from robosuite.utils.domain_randomization import (
+    ARENA_RANDOMIZATION_KEYS,
+    check_randomization_ranges,
+)
 
 
 class Arena(MujocoXML):
     """Base arena class."""
 
+    randomization = None
+
+    def set_randomization(
+        self, camera_pos=None, camera_rot=None, light_pos=None, light_diffuse=None
+    ):
+        """
+        Declares ranges of camera and light properties to randomize on the
+        compiled model (see DomainRandomizer).
+
+        Args:
+            camera_pos (float, optional): max offset of arena camera positions
+            camera_rot (float, optional): max rotation angle of arena cameras
+            light_pos (float, optional): max offset of light positions
+            light_diffuse ([float, float], optional): range of light diffuse color
+        """
+        self.randomization = check_randomization_ranges(
+            dict(
+                camera_pos=camera_pos,
+                camera_rot=camera_rot,
+                light_pos=light_pos,
+                light_diffuse=light_diffuse,
+            ),
+            ARENA_RANDOMIZATION_KEYS,
+        )
+
     def set_origin(self, offset):
         """Applies a constant offset to all objects."""
         offset = np.array(offset)
@@ -1,4 +1,5 @@
 import os
+import copy
 import xml.dom.minidom
 import xml.etree.ElementTree as ET
 import io
@@ -6,6 +7,55 @@ import numpy as np
 
 from robosuite.utils import XMLError
 
+# parsed xml files, keyed by absolute path. The cached trees are read-only
+# templates: every MujocoXML instance works on its own copy.
+_XML_TEMPLATES = {}
+
+# values derived from the templates, e.g. the marker site positions of
+# objects keyed by (path, site name). Dropped together with the templates.
+_XML_DERIVED = {}
+
+
+def load_xml_template(fname):
+    """
+    Returns a private copy of the root element of the xml file @fname.
+    Each file is parsed from disk only once per process.
+
+    Args:
+        fname (str): path to the MJCF xml file.
+    """
+    key = os.path.abspath(fname)
+    template = _XML_TEMPLATES.get(key)
+    if template is None:
+        template = ET.parse(fname).getroot()
+        _XML_TEMPLATES[key] = template
+    return copy.deepcopy(template)
+
+
+def get_derived(key, fn):
+    """
+    Returns a value derived from the xml templates, e.g. a site position,
+    computed with @fn on first use and cached until @clear_xml_templates.
+
+    Args:
+        key (tuple): identifies the value, e.g. (absolute path, site name).
+        fn (function): computes the value, called without arguments.
+    """
+    value = _XML_DERIVED.get(key)
+    if value is None:
+        value = fn()
+        _XML_DERIVED[key] = value
+    return value
+
+
+def clear_xml_templates():
+    """
+    Drops all cached xml templates and the values derived from them, e.g.
+    after editing asset files on disk.
+    """
+    _XML_TEMPLATES.clear()
+    _XML_DERIVED.clear()
+
 
 class MujocoXML(object):
     """
@@ -23,8 +73,8 @@ class MujocoXML(object):
         """
         self.file = fname
         self.folder = os.path.dirname(fname)
-        self.tree = ET.parse(fname)
-        self.root = self.tree.getroot()
+        self.root = load_xml_template(fname)
+        self.tree = ET.ElementTree(self.root)
         self.name = self.root.get("model")
         self.worldbody = self.create_default_element("worldbody")
         self.actuator = self.create_default_element("actuator")
@@ -83,15 +133,25 @@ class MujocoXML(object):
             self.default.append(one_default)
         # self.config.append(other.config)
 
-    def get_model(self, mode="mujoco_py"):
+    def get_model(self, mode="mujoco_py", use_cache=True):
         """
         Returns a MjModel instance from the current xml tree.
+
+        Args:
+            mode (str): backend of the returned model.
+            use_cache (bool): if True, load the compiled model from the on-disk
+                model cache when possible (see robosuite.utils.model_cache).
         """
 
         available_modes = ["mujoco_py"]
         with io.StringIO() as string:
             string.write(ET.tostring(self.root, encoding="unicode"))
             if mode == "mujoco_py":
+                if use_cache:
+                    from robosuite.utils.model_cache import load_model_from_xml_cached
+
+                    return load_model_from_xml_cached(string.getvalue())
+
                 from mujoco_py import load_model_from_xml
 
                 model = load_model_from_xml(string.getvalue())
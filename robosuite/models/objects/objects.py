@@ -1,9 +1,14 @@
+import os
 import copy
 import xml.etree.ElementTree as ET
 import numpy as np
 
-from robosuite.models.base import MujocoXML
+from robosuite.models.base import MujocoXML, get_derived
 from robosuite.utils.mjcf_utils import string_to_array, array_to_string
+from robosuite.utils.domain_randomization import (
+    OBJECT_RANDOMIZATION_KEYS,
+    check_randomization_ranges,
+)
 
 
 class MujocoObject:
@@ -18,11 +23,32 @@ class MujocoObject:
 
     Attributes:
         asset (TYPE): Description
+        randomization (dict): ranges of physical and visual properties that
+            are sampled in place on every reset (see DomainRandomizer)
     """
 
+    randomization = None
+
     def __init__(self):
         self.asset = ET.Element("asset")
 
+    def set_randomization(self, friction=None, mass=None, rgba=None, size=None):
+        """
+        Declares ranges of properties to randomize on the compiled model.
+        Unlike the construction-time randomization of MujocoGeneratedObject,
+        these are applied without regenerating the xml.
+
+        Args:
+            friction ([float, float], optional): scale range of sliding friction
+            mass ([float, float], optional): scale range of body mass and inertia
+            rgba ([float, float], optional): range of rgb channels
+            size ([float, float], optional): scale range of primitive geom sizes
+        """
+        self.randomization = check_randomization_ranges(
+            dict(friction=friction, mass=mass, rgba=rgba, size=size),
+            OBJECT_RANDOMIZATION_KEYS,
+        )
+
     def get_bottom_offset(self):
         """
         Returns vector from object center to object bottom
@@ -137,19 +163,29 @@ class MujocoXMLObject(MujocoXML, MujocoObject):
         """
         MujocoXML.__init__(self, fname)
 
+    def _site_pos(self, site_name):
+        """
+        Returns the position of a marker site of this object. Marker sites are
+        identical for every instance loaded from the same file, so they are
+        only parsed once per file.
+        """
+        key = (os.path.abspath(self.file), site_name)
+
+        def parse():
+            site = self.worldbody.find("./body/site[@name='{}']".format(site_name))
+            return string_to_array(site.get("pos"))
+
+        pos = get_derived(key, parse)
+        return pos.copy()
+
     def get_bottom_offset(self):
-        bottom_site = self.worldbody.find("./body/site[@name='bottom_site']")
-        return string_to_array(bottom_site.get("pos"))
+        return self._site_pos("bottom_site")
 
     def get_top_offset(self):
-        top_site = self.worldbody.find("./body/site[@name='top_site']")
-        return string_to_array(top_site.get("pos"))
+        return self._site_pos("top_site")
 
     def get_horizontal_radius(self):
-        horizontal_radius_site = self.worldbody.find(
-            "./body/site[@name='horizontal_radius_site']"
-        )
-        return string_to_array(horizontal_radius_site.get("pos"))[0]
+        return self._site_pos("horizontal_radius_site")[0]
 
     def get_collision(self, name=None, site=False):
 
@@ -0,0 +1,250 @@
+"""
+Batched inference service for the per-type FPN segmentation models.
+
+The models of all object types are loaded once, on the CPU by default.
+Frames are submitted from any number of threads (or, through
+@SegmentationClient, from env worker processes) and queued; a single
+inference thread groups the pending frames by object type and runs every
+model on a batch at a time. Masks are returned asynchronously through
+concurrent.futures.Future objects.
+"""
+
+import time
+import queue
+import threading
+import collections
+import multiprocessing
+from concurrent.futures import Future
+
+import numpy as np
+import torch
+import segmentation_models_pytorch as smp
+
+
+def load_seg_models(checkpoint, num_types=4, encoder="resnet50", device="cpu"):
+    """
+    Loads the FPN models saved by train.py under the keys 'FPN_<type>'.
+    Checkpoints of models wrapped in nn.DataParallel are supported.
+    """
+    ckpt = torch.load(checkpoint, map_location=device)
+    models = []
+    for i in range(num_types):
+        model = smp.FPN(encoder, in_channels=4, classes=3)
+        state = ckpt["FPN_" + str(i)]
+        state = {
+            (key[len("module."):] if key.startswith("module.") else key): value
+            for key, value in state.items()
+        }
+        model.load_state_dict(state)
+        model.to(device)
+        model.eval()
+        models.append(model)
+    return models
+
+
+class SegmentationServer:
+    """
+    Groups segmentation requests into batches per object type.
+    """
+
+    def __init__(
+        self,
+        models,
+        device="cpu",
+        num_threads=None,
+        max_batch_size=32,
+        max_wait=0.005,
+    ):
+        """
+        Args:
+            models (list): segmentation model of every object type, see
+                @load_seg_models.
+            device (str): torch device the models live on.
+            num_threads (int): number of threads torch uses for inference on
+                the CPU, torch's default if None.
+            max_batch_size (int): largest batch run at once.
+            max_wait (float): seconds to wait for more requests once one
+                arrived, trading latency for larger batches.
+        """
+        self.models = models
+        self.device = torch.device(device)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        if num_threads is not None:
+            torch.set_num_threads(num_threads)
+
+        self._requests = queue.Queue()
+        self._stop = threading.Event()
+        # makes closing and queueing new requests mutually exclusive
+        self._submit_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        self._pumps = []
+        # (requests, responses) queues of the env worker processes
+        self._process_queues = []
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint, num_types=4, encoder="resnet50", device="cpu", **kwargs):
+        models = load_seg_models(checkpoint, num_types=num_types, encoder=encoder, device=device)
+        return cls(models, device=device, **kwargs)
+
+    def submit(self, frame, obj_type):
+        """
+        Queues a frame for segmentation.
+
+        Args:
+            frame (np.array): (H, W, 4) RGB-D frame, uint8 channels are scaled
+                to [0, 1] as done by transforms.ToTensor.
+            obj_type (int): object type selecting the model.
+
+        Returns:
+            Future: resolves to the (H, W) uint8 mask, fails with a
+                RuntimeError if the server is closed first.
+        """
+        future = Future()
+        with self._submit_lock:
+            if self._stop.is_set():
+                future.set_exception(RuntimeError("segmentation server is closed"))
+            else:
+                self._requests.put((int(obj_type), frame, future))
+        return future
+
+    def predict(self, frames, obj_types):
+        """
+        Segments @frames and blocks until all masks are available.
+        """
+        futures = [self.submit(frame, obj_type) for frame, obj_type in zip(frames, obj_types)]
+        return [future.result() for future in futures]
+
+    def _collect(self):
+        """
+        Returns the pending requests grouped by object type, waiting at most
+        @max_wait after the first one for the batch to fill.
+        """
+        try:
+            first = self._requests.get(timeout=0.1)
+        except queue.Empty:
+            return {}
+        pending = collections.defaultdict(list)
+        pending[first[0]].append(first)
+        count = 1
+        deadline = time.monotonic() + self.max_wait
+        while count < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending[request[0]].append(request)
+            count += 1
+        return pending
+
+    def _run_batch(self, obj_type, requests):
+        frames = np.stack([frame for _, frame, _ in requests])
+        batch = torch.from_numpy(frames).permute(0, 3, 1, 2).float()
+        if frames.dtype == np.uint8:
+            batch = batch.div_(255.)
+        with torch.no_grad():
+            masks = self.models[obj_type](batch.to(self.device)).argmax(1)
+        masks = masks.byte().cpu().numpy()
+        for (_, _, future), mask in zip(requests, masks):
+            future.set_result(mask)
+
+    def _serve(self):
+        while not self._stop.is_set():
+            for obj_type, requests in self._collect().items():
+                for start in range(0, len(requests), self.max_batch_size):
+                    chunk = requests[start:start + self.max_batch_size]
+                    try:
+                        self._run_batch(obj_type, chunk)
+                    except Exception as e:
+                        for _, _, future in chunk:
+                            future.set_exception(e)
+
+    def serve_processes(self, num_clients):
+        """
+        Returns one @SegmentationClient per env worker process. Pass them to
+        the workers before they start.
+        """
+        ctx = multiprocessing.get_context()
+        requests = ctx.Queue()
+        responses = [ctx.Queue() for _ in range(num_clients)]
+
+        def pump():
+            while not self._stop.is_set():
+                try:
+                    client_id, request_id, frame, obj_type = requests.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                future = self.submit(frame, obj_type)
+                future.add_done_callback(
+                    lambda f, c=client_id, r=request_id: responses[c].put((r, f.exception() or f.result()))
+                )
+
+        thread = threading.Thread(target=pump, daemon=True)
+        thread.start()
+        self._pumps.append(thread)
+        self._process_queues.append((requests, responses))
+        return [SegmentationClient(i, requests, responses[i]) for i in range(num_clients)]
+
+    def close(self):
+        """
+        Stops serving. Requests still queued, by threads or by env worker
+        processes, fail with a RuntimeError, so that no caller waits forever
+        on their futures or results.
+        """
+        with self._submit_lock:
+            self._stop.set()
+        self._thread.join()
+        for thread in self._pumps:
+            thread.join()
+        while True:
+            try:
+                _, _, future = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            future.set_exception(RuntimeError("segmentation server is closed"))
+        for requests, responses in self._process_queues:
+            while True:
+                try:
+                    # frames put by the workers may still be in flight
+                    client_id, request_id, _, _ = requests.get(timeout=0.1)
+                except queue.Empty:
+                    break
+                responses[client_id].put((request_id, RuntimeError("segmentation server is closed")))
+
+
+class SegmentationClient:
+    """
+    Handle of an env worker process on a @SegmentationServer.
+    """
+
+    def __init__(self, client_id, requests, responses):
+        self.client_id = client_id
+        self.requests = requests
+        self.responses = responses
+        self._next_id = 0
+        self._results = {}
+
+    def submit(self, frame, obj_type):
+        """
+        Queues a frame and returns the id to pass to @result.
+        """
+        request_id = self._next_id
+        self._next_id += 1
+        self.requests.put((self.client_id, request_id, np.ascontiguousarray(frame), int(obj_type)))
+        return request_id
+
+    def result(self, request_id, timeout=None):
+        """
+        Blocks until the mask of request @request_id is available.
+        """
+        while request_id not in self._results:
+            r, mask = self.responses.get(timeout=timeout)
+            self._results[r] = mask
+        mask = self._results.pop(request_id)
+        if isinstance(mask, Exception):
+            raise mask
+        return mask
@@ -2,14 +2,12 @@ import os
 import cv2
 import sys
 import math
-import torch
 import argparse
 import multiprocessing
 
 import os.path as osp
 import numpy as np
 import tensorflow as tf
-import torch.nn as nn
 
 from baselines.common.tf_util import get_session
 from baselines.common.vec_env.vec_video_recorder import VecVideoRecorder
@@ -25,13 +23,11 @@ try:
 except ImportError:
     MPI = None
 
-import segmentation_models_pytorch as smp
-
-from torchvision import transforms
 from robosuite.models.segmentation.pre_process import image_train, image_test
 from robosuite.models.segmentation.mydataset import ImageList
 from robosuite.models.segmentation.logger import Logger
 from robosuite.models.segmentation.mydataset import action2pixel
+from robosuite.models.segmentation.inference import SegmentationServer
 
 
 os.environ['CUDA_DEVICE_ORDER'] = 'PCI_BUS_ID'
@@ -174,7 +170,7 @@ def train(args):
 
 
 
-def make_video(model, env, seg_models, args):
+def make_video(model, env, seg_server, args):
     DEMO_PATH = args.video_path
 
     import imageio
@@ -193,11 +189,6 @@ def make_video(model, env, seg_models, args):
         [255, 255, 255]
     ]).astype('uint8')
 
-    preprocess = transforms.Compose([
-        transforms.ToTensor(),
-        # transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
-    ])
-
     for i_episode in range(n_episode):
         obs = env.reset()
         total_reward = 0
@@ -215,6 +206,8 @@ def make_video(model, env, seg_models, args):
             obj_tp = info[0]['obj_type']
             point = action2pixel(actions[0])
 
+            # segment all frames of the drop at once
+            views = []
             for o in info[0]['birdview']:
                 # contains depth
 
@@ -226,19 +219,13 @@ def make_video(model, env, seg_models, args):
                 # depth = cv2.cvtColor(depth, cv2.COLOR_GRAY2BGR)
 
                 # get 4 channel obs
-                view = np.concatenate((image, depth), 2)
-
-                # seg
-                seg_model = seg_models[obj_tp]
-                seg_model.eval()
+                views.append(np.concatenate((image, depth), 2))
+            masks = [seg_server.submit(view, obj_tp) for view in views]
 
-                input_tensor = preprocess(view)
-                input_batch = input_tensor.unsqueeze(0).cuda()
+            for o, mask in zip(info[0]['birdview'], masks):
+                image, _ = o
 
-                mask = seg_model(input_batch)[0]
-                mask = mask.argmax(0)
-
-                seg = Image.fromarray(mask.byte().cpu().numpy())
+                seg = Image.fromarray(mask.result())
                 seg.putpalette(colors)
                 seg = seg.convert('RGB')
 
@@ -321,7 +308,9 @@ if __name__=='__main__':
     parser.add_argument('--video_path', type=str, default='results/test/demo.mp4')
 
     ## seg model
-    parser.add_argument('--gpu_ids', type=str, default='0', help="device id to run")
+    parser.add_argument('--seg_device', type=str, default='cpu', help="torch device of the segmentation models, e.g. cuda:0")
+    parser.add_argument('--seg_threads', type=int, default=None, help="number of inference threads on the cpu")
+    parser.add_argument('--seg_batch_size', type=int, default=32)
     parser.add_argument('--seg_model_path', type=str, default='results/random_take_8obj_1e-4_ok/checkpoint_3.pth')
 
     args = parser.parse_args()
@@ -332,15 +321,12 @@ if __name__=='__main__':
     model, env = train(args)
 
     print('Load Segmentation model.')
-    seg_models = []
-    test_loaders = []
-    gpus = args.gpu_ids.split(',')
-    ckpt = torch.load(args.seg_model_path)
-    for i in range(4):
-        seg_model = smp.FPN('resnet50', in_channels=4, classes=3).cuda()
-        seg_model = nn.DataParallel(seg_model, device_ids=[int(_) for _ in gpus])
-        seg_model.load_state_dict(ckpt['FPN_' + str(i)])
-
-        seg_models.append(seg_model)
-
-    make_video(model, env, seg_models, args)
\ No newline at end of file
+    seg_server = SegmentationServer.from_checkpoint(
+        args.seg_model_path,
+        device=args.seg_device,
+        num_threads=args.seg_threads,
+        max_batch_size=args.seg_batch_size,
+    )
+
+    make_video(model, env, seg_server, args)
+    seg_server.close()
\ No newline at end of file
@@ -4,6 +4,9 @@ import numpy as np
 from robosuite.models.tasks import Task
 from robosuite.utils import RandomizationError
 from robosuite.utils.mjcf_utils import new_joint, array_to_string, string_to_array
+from robosuite.utils.log_utils import get_logger
+
+logger = get_logger(__name__)
 
 
 class BinPackingTask(Task):
@@ -181,7 +184,7 @@ class BinPackingTask(Task):
             #     raise RandomizationError("Cannot place all objects in the bins")
             index += 1
 
-        print("Placed %d objects in bin" % count)
+        logger.debug("placed %d objects in bin", count)
 
     def move_objects_oracle(self):
         """Places objects randomly until no collisions or max iterations hit."""
@@ -243,7 +246,7 @@ class BinPackingTask(Task):
             #     raise RandomizationError("Cannot place all objects in the bins")
             index += 1
 
-        print("Placed %d objects in bin" % count)
+        logger.debug("placed %d objects in bin", count)
 
     def place_visual(self):
         """Places visual objects randomly until no collisions or max iterations hit."""
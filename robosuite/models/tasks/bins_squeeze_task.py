@@ -4,6 +4,9 @@ import numpy as np
 from robosuite.models.tasks import Task
 from robosuite.utils import RandomizationError
 from robosuite.utils.mjcf_utils import new_joint, array_to_string, string_to_array
+from robosuite.utils.log_utils import get_logger
+
+logger = get_logger(__name__)
 
 
 class BinSqueezeTask(Task):
@@ -100,7 +103,6 @@ class BinSqueezeTask(Task):
 
     def place_objects(self):
         """Places objects randomly until no collisions or max iterations hit."""
-        print("*****Place******")
         index = 0
 
         ## random choose hard case
@@ -176,7 +178,7 @@ class BinSqueezeTask(Task):
             #     raise RandomizationError("Cannot place all objects in the bins")
             index += 1
 
-        print("Placed %d objects in bin" % count)
+        logger.debug("placed %d objects in bin", count)
 
     def move_objects_oracle(self):
         """Places objects randomly until no collisions or max iterations hit."""
@@ -238,7 +240,7 @@ class BinSqueezeTask(Task):
             #     raise RandomizationError("Cannot place all objects in the bins")
             index += 1
 
-        print("Placed %d objects in bin" % count)
+        logger.debug("placed %d objects in bin", count)
 
     def place_visual(self):
         """Places visual objects randomly until no collisions or max iterations hit."""
@@ -18,6 +18,9 @@ from stable_baselines import logger
 
 from robosuite.scripts.lr_schedule import get_lr_func
 from robosuite.scripts.utils import norm_depth
+from robosuite.utils.evaluation import evaluate, gym_env_fn
+from robosuite.utils.log_utils import configure_logging
+from robosuite.utils.replay_buffer import MemmapReplayBuffer
 
 
 try:
@@ -108,6 +111,8 @@ def train(args):
     # else:
     #     model = policy(CnnPolicy, env, verbose=1, policy_kwargs=policy_kwargs, **alg_kwargs)
     model = policy(CnnPolicy, env, verbose=1, policy_kwargs=policy_kwargs, **alg_kwargs)
+    if args.alg == 'sac' and args.replay_buffer == 'memmap':
+        model.replay_buffer = build_replay_buffer(env, args)
 
     model.learn(
         total_timesteps=total_timesteps,
@@ -119,6 +124,23 @@ def train(args):
     return model, env
 
 
+def build_replay_buffer(env, args):
+    # observations are kept in a file with the dtype of the observation space,
+    # e.g. uint8 frames, instead of python lists in memory
+    path = None
+    if args.replay_dir is not None:
+        os.makedirs(args.replay_dir, exist_ok=True)
+        path = os.path.join(args.replay_dir, 'replay_{}.mmap'.format(os.getpid()))
+
+    return MemmapReplayBuffer(
+        args.buffer_size,
+        env.observation_space.shape,
+        env.action_space.shape,
+        obs_dtype=env.observation_space.dtype,
+        path=path,
+    )
+
+
 def configure_logger(log_path, **kwargs):
     if log_path is not None:
         logger.configure(log_path, **kwargs)
@@ -184,28 +206,28 @@ def make_video(model_path, env, args):
     print('Video path: ', DEMO_PATH)
 
 
-def test(model_path, env, args):
+def test(model_path, args):
     policy = get_policy(args)
     model = policy.load(model_path)
 
-    test_episode = args.test_episode
-    num_env = args.num_env
-    take_nums = args.take_nums
-    avg_reward = 0
-
-    logger.log('Begin testing, total ' + str(test_episode * num_env) + ' episodes...')
-    for i_episode in range(test_episode):
-        obs = env.reset()
-
-        for _ in range(take_nums):
-
-            action, _states = model.predict(obs)
-
-            obs, rewards, dones, info = env.step(action)
-            avg_reward += np.sum(rewards)
-
-    avg_reward /= (test_episode * num_env)
-    logger.log('Average reward: ' + str(avg_reward))
+    def predict(obs):
+        action, _states = model.predict(obs)
+        return action
+
+    n_episodes = args.test_episode * args.num_env
+    logger.log('Begin testing, total ' + str(n_episodes) + ' episodes...')
+    report = evaluate(
+        predict,
+        gym_env_fn(args.env_id, get_env_kwargs(args)),
+        n_episodes,
+        num_workers=args.num_env,
+        seed=int(args.seed) if args.seed is not None else 0,
+        max_steps=args.take_nums,
+        start_method='forkserver',
+    )
+    logger.log('Average reward: ' + str(report['reward_mean']))
+    logger.log('Success rate: ' + str(report['success_rate']))
+    return report
 
 
 def get_info_dir(args):
@@ -279,6 +301,8 @@ if __name__ == "__main__":
     parser.add_argument('--batch_size', type=int, default=256)
     parser.add_argument('--buffer_size', type=int, default=50000)
     parser.add_argument('--learning_starts', type=int, default=100)
+    parser.add_argument('--replay_buffer', type=str, default='default', choices=['default', 'memmap'])
+    parser.add_argument('--replay_dir', type=str, default=None)
 
     ## lr args
     parser.add_argument('--lr_type', type=str, default='const')
@@ -300,6 +324,7 @@ if __name__ == "__main__":
     parser.add_argument('--debug', type=str, default='debug')
 
     args = parser.parse_args()
+    configure_logging()
 
     ## const
     PATH = os.path.dirname(os.path.realpath(__file__))
@@ -345,7 +370,7 @@ if __name__ == "__main__":
         model_path = args.save_path
 
     # if args.test:
-    #     test(model_path, env, args)
+    #     test(model_path, args)
 
     logger.log('Save to ', args.save_dir)
     if args.make_video:
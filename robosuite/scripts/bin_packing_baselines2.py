@@ -16,6 +16,7 @@ from PIL import Image
 
 from robosuite.scripts.utils import make_vec_env, norm_depth
 from robosuite.scripts.lr_schedule import get_lr_func
+from robosuite.utils.log_utils import configure_logging
 from importlib import import_module
 
 
@@ -322,6 +323,7 @@ if __name__ == "__main__":
     parser.add_argument('--debug', type=str, default='debug')
 
     args = parser.parse_args()
+    configure_logging()
 
     ## const
     PATH = os.path.dirname(os.path.realpath(__file__))
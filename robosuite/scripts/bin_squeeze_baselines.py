@@ -15,6 +15,7 @@ from stable_baselines import PPO2
 from stable_baselines import logger
 
 from robosuite.scripts.lr_schedule import get_lr_func
+from robosuite.utils.log_utils import configure_logging
 
 try:
     from mpi4py import MPI
@@ -300,6 +301,7 @@ if __name__ == "__main__":
     parser.add_argument('--debug', type=str, default='debug')
 
     args = parser.parse_args()
+    configure_logging()
 
     ## const
     PATH = os.path.dirname(os.path.realpath(__file__))
@@ -232,6 +232,11 @@ if __name__ == "__main__":
     )
     parser.add_argument("--environment", type=str, default="SawyerLift")
     parser.add_argument("--device", type=str, default="keyboard")
+    parser.add_argument(
+        "--no-streaming",
+        action="store_true",
+        help="dump npz files to /tmp and gather them into demo.hdf5 after each episode",
+    )
     args = parser.parse_args()
 
     # create original environment
@@ -247,9 +252,18 @@ if __name__ == "__main__":
     # enable controlling the end effector directly instead of using joint velocities
     env = IKWrapper(env)
 
-    # wrap the environment with data collection wrapper
-    tmp_directory = "/tmp/{}".format(str(time.time()).replace(".", "_"))
-    env = DataCollectionWrapper(env, tmp_directory)
+    # make a new timestamped directory
+    t1, t2 = str(time.time()).split(".")
+    new_dir = os.path.join(args.directory, "{}_{}".format(t1, t2))
+    os.makedirs(new_dir)
+
+    # wrap the environment with data collection wrapper. When streaming, the
+    # wrapper writes demo.hdf5 in @new_dir directly and no gather step is needed.
+    if args.no_streaming:
+        tmp_directory = "/tmp/{}".format(str(time.time()).replace(".", "_"))
+        env = DataCollectionWrapper(env, tmp_directory)
+    else:
+        env = DataCollectionWrapper(env, new_dir, streaming=True)
 
     # initialize device
     if args.device == "keyboard":
@@ -268,12 +282,8 @@ if __name__ == "__main__":
             "Invalid device choice: choose either 'keyboard' or 'spacemouse'."
         )
 
-    # make a new timestamped directory
-    t1, t2 = str(time.time()).split(".")
-    new_dir = os.path.join(args.directory, "{}_{}".format(t1, t2))
-    os.makedirs(new_dir)
-
     # collect demonstrations
     while True:
         collect_human_trajectory(env, device)
-        gather_demonstrations_as_hdf5(tmp_directory, new_dir)
+        if args.no_streaming:
+            gather_demonstrations_as_hdf5(tmp_directory, new_dir)
@@ -0,0 +1,168 @@
+"""
+Watches a results directory and evaluates every new checkpoint while training
+keeps running, appending one json line of metrics per checkpoint to a log,
+which gives learning curves without stopping the training.
+
+The evaluation environments are built once, in a pool of worker processes
+that is reused for every checkpoint, and all checkpoints are evaluated on the
+same episodes: episode i is seeded with --seed + i and, with --scenarios, its
+layout is drawn from a fixed scenario store. Checkpoints already in the log
+are skipped, so the evaluator can be restarted at any time. Files matching
+the patterns that cannot be loaded or evaluated (e.g. segmentation
+checkpoints) get an error record in the log and are not retried.
+
+Example:
+    $ python continuous_evaluator.py --results_dir results/BinSqueeze-v0 \
+        --env_id BinSqueeze-v0 --alg ppo --episodes 200 --num_workers 8 \
+        --scenarios data/hard_case_test.npz
+"""
+
+import os
+import re
+import json
+import time
+import fnmatch
+import argparse
+import functools
+import traceback
+
+from robosuite.utils.evaluation import EvaluationPool, evaluate, make_gym_env
+from robosuite.utils.log_utils import configure_logging, get_logger
+from robosuite.scripts.evaluate_policy import load_predict_fn
+
+logger = get_logger(__name__)
+
+
+def make_env(env_id, env_kwargs, scenarios=None):
+    """
+    Builds the evaluation environment, drawing its layouts from the scenario
+    store at @scenarios if given.
+    """
+    env_kwargs = dict(env_kwargs)
+    if scenarios is not None:
+        from robosuite.utils.scenario_store import ScenarioStore, ScenarioSampler
+
+        env_kwargs["scenario_sampler"] = ScenarioSampler(ScenarioStore.load(scenarios))
+    return make_gym_env(env_id, env_kwargs)
+
+
+def find_checkpoints(results_dir, patterns):
+    """
+    Returns the checkpoint files under @results_dir, oldest first.
+    """
+    found = []
+    for root, _, files in os.walk(results_dir):
+        for name in files:
+            if any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                path = os.path.join(root, name)
+                found.append((os.path.getmtime(path), path))
+    return [path for _, path in sorted(found)]
+
+
+def checkpoint_step(path):
+    """
+    Returns the update number baselines writes in checkpoint names, if any.
+    """
+    numbers = re.findall(r"\d+", os.path.basename(path))
+    return int(numbers[-1]) if numbers else None
+
+
+def is_complete(path, settle_time):
+    """
+    Whether @path has not been written to for @settle_time seconds.
+    """
+    return time.time() - os.path.getmtime(path) >= settle_time
+
+
+def evaluate_checkpoint(checkpoint, args, pool):
+    """
+    Returns the report of @checkpoint, or a record with the error that kept it
+    from being loaded or evaluated, and whether @pool must be rebuilt.
+    """
+    try:
+        predict_fn = load_predict_fn(args.alg, checkpoint)
+    except Exception as e:
+        logger.error("could not load %s: %s", checkpoint, e)
+        return {"error": "".join(traceback.format_exception_only(type(e), e)).strip()}, False
+    try:
+        return evaluate(predict_fn, None, args.episodes, seed=args.seed, max_steps=args.max_steps, pool=pool), False
+    except Exception as e:
+        # replies of the workers may still be pending, do not reuse them
+        logger.error("could not evaluate %s: %s", checkpoint, e)
+        return {"error": "".join(traceback.format_exception_only(type(e), e)).strip()}, True
+    finally:
+        # every checkpoint is loaded into its own graph and session
+        predict_fn.close()
+
+
+def evaluated_checkpoints(log_path):
+    if not os.path.exists(log_path):
+        return set()
+    done = set()
+    with open(log_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                done.add(json.loads(line)["checkpoint"])
+    return done
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--results_dir", type=str, required=True)
+    parser.add_argument("--patterns", type=str, default="*.pth,*.zip,[0-9][0-9][0-9][0-9][0-9]",
+                        help="comma separated checkpoint file patterns")
+    parser.add_argument("--log", type=str, default=None, help="jsonl metrics log, <results_dir>/eval.jsonl by default")
+    parser.add_argument("--alg", type=str, default="ppo", choices=["ppo", "sac"])
+    parser.add_argument("--env_id", type=str, default="BinPack-v0")
+    parser.add_argument("--env_kwargs", type=str, default="{}", help="json dict of environment arguments")
+    parser.add_argument("--scenarios", type=str, default=None, help="scenario store to draw the layouts from")
+    parser.add_argument("--episodes", type=int, default=200)
+    parser.add_argument("--num_workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max_steps", type=int, default=None)
+    parser.add_argument("--poll_interval", type=float, default=30.)
+    parser.add_argument("--settle_time", type=float, default=10., help="seconds a checkpoint must be unchanged")
+    parser.add_argument("--once", action="store_true", help="evaluate the current checkpoints and exit")
+    args = parser.parse_args()
+    configure_logging()
+
+    log_path = args.log or os.path.join(args.results_dir, "eval.jsonl")
+    patterns = args.patterns.split(",")
+    done = evaluated_checkpoints(log_path)
+
+    env_fn = functools.partial(make_env, args.env_id, json.loads(args.env_kwargs), args.scenarios)
+    num_workers = min(args.num_workers or os.cpu_count(), args.episodes)
+    # the controller loads tensorflow models, do not fork it
+    make_pool = functools.partial(EvaluationPool, env_fn, num_workers, start_method="forkserver")
+    pool = make_pool()
+    try:
+        while True:
+            for checkpoint in find_checkpoints(args.results_dir, patterns):
+                if checkpoint in done or not is_complete(checkpoint, args.settle_time):
+                    continue
+
+                report, broken = evaluate_checkpoint(checkpoint, args, pool)
+                if broken:
+                    pool.terminate()
+                    pool = make_pool()
+
+                record = {key: value for key, value in report.items() if key != "episodes"}
+                record.update(
+                    checkpoint=checkpoint,
+                    step=checkpoint_step(checkpoint),
+                    mtime=os.path.getmtime(checkpoint),
+                    evaluated_at=time.time(),
+                )
+                with open(log_path, "a") as f:
+                    f.write(json.dumps(record) + "\n")
+                done.add(checkpoint)
+                if "error" not in report:
+                    print("{}: success rate {:.3f}, reward {:.3f}".format(
+                        checkpoint, report["success_rate"], report["reward_mean"]))
+
+            if args.once:
+                break
+            time.sleep(args.poll_interval)
+    finally:
+        pool.close()
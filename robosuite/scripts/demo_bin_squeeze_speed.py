@@ -0,0 +1,73 @@
+"""
+Benchmarks the object preparation of BinSqueeze, whose settling loops call
+_pre_action(None) / _post_action(None) hundreds of times per reset.
+
+The per-call cost of the force hook is compared between the precomputed
+actuation layout and the former fancy-index assignment.
+
+Example:
+    $ python demo_bin_squeeze_speed.py --resets 20
+"""
+
+import time
+import argparse
+import numpy as np
+
+import robosuite as suite
+
+
+def time_calls(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resets", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=100000)
+    args = parser.parse_args()
+
+    env = suite.make(
+        "BinSqueeze",
+        has_renderer=False,
+        has_offscreen_renderer=False,
+        ignore_done=True,
+        use_camera_obs=False,
+        control_freq=1,
+    )
+
+    # whole object preparation, as done on the first step of every episode
+    meter = []
+    for _ in range(args.resets):
+        env.reset()
+        time1 = time.perf_counter()
+        env.prepare_objects()
+        meter.append(time.perf_counter() - time1)
+    meter = np.array(meter)
+    print("prepare_objects: {:.2f} ms / reset".format(meter.mean() * 1e3))
+
+    # force hook alone
+    data = env.sim.data
+    indexes = env._ref_joint_vel_indexes
+
+    def fancy_index():
+        data.qfrc_applied[indexes] = data.qfrc_bias[indexes]
+
+    t_fancy = time_calls(fancy_index, args.calls)
+    t_layout = time_calls(lambda: env._pre_action(None), args.calls)
+    print("gravity compensation, fancy indexing: {:.2f} us / call".format(t_fancy * 1e6))
+    print("gravity compensation, actuation layout: {:.2f} us / call".format(t_layout * 1e6))
+
+    # velocity reset of the settling loops
+    def reset_velocities_with_state():
+        sim_state = env.sim.get_state()
+        sim_state.qvel[:] = 0
+        env.sim.set_state(sim_state)
+        env.sim.forward()
+
+    t_state = time_calls(reset_velocities_with_state, args.calls // 10)
+    t_direct = time_calls(lambda: env._post_action(None), args.calls // 10)
+    print("velocity reset, get_state/set_state: {:.2f} us / call".format(t_state * 1e6))
+    print("velocity reset, direct qvel write: {:.2f} us / call".format(t_direct * 1e6))
@@ -0,0 +1,95 @@
+"""
+Evaluates a trained checkpoint on many episodes in parallel and writes a
+report with the success rate, the placed object counts and the step timings.
+
+The model is loaded once in this process; the environments run in
+--num_workers worker processes and their observations are batched into a
+single prediction per step.
+
+Example:
+    $ python evaluate_policy.py --checkpoint results/.../model.pth --alg ppo \
+        --env_id BinPack-v0 --episodes 1000 --num_workers 16 \
+        --env_kwargs '{"take_nums": 6, "camera_type": "image+depth"}'
+"""
+
+import json
+import argparse
+
+from robosuite.utils.evaluation import evaluate, gym_env_fn
+
+
+class PolicyPredictor:
+    """
+    Batched predict function of a loaded stable baselines model. Owns the
+    model's tensorflow graph and session, released by @close.
+    """
+
+    def __init__(self, model, deterministic=True):
+        self.model = model
+        self.deterministic = deterministic
+
+    def __call__(self, obs):
+        actions, _ = self.model.predict(obs, deterministic=self.deterministic)
+        return actions
+
+    def close(self):
+        if self.model is not None:
+            self.model.sess.close()
+            self.model = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_predict_fn(alg, checkpoint, deterministic=True):
+    """
+    Loads a stable baselines checkpoint and returns its batched predict
+    function, a @PolicyPredictor to close once done.
+    """
+    from stable_baselines import PPO2, SAC
+
+    policy = {"ppo": PPO2, "sac": SAC}[alg]
+    return PolicyPredictor(policy.load(checkpoint), deterministic=deterministic)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkpoint", type=str, required=True)
+    parser.add_argument("--alg", type=str, default="ppo", choices=["ppo", "sac"])
+    parser.add_argument("--env_id", type=str, default="BinPack-v0")
+    parser.add_argument("--env_kwargs", type=str, default="{}", help="json dict of environment arguments")
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--num_workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max_steps", type=int, default=None)
+    parser.add_argument("--stochastic", action="store_true")
+    parser.add_argument("--out", type=str, default=None, help="json report path")
+    args = parser.parse_args()
+
+    with load_predict_fn(args.alg, args.checkpoint, deterministic=not args.stochastic) as predict_fn:
+        report = evaluate(
+            predict_fn,
+            gym_env_fn(args.env_id, json.loads(args.env_kwargs)),
+            args.episodes,
+            num_workers=args.num_workers,
+            seed=args.seed,
+            max_steps=args.max_steps,
+            # the controller holds a tensorflow session, do not fork it
+            start_method="forkserver",
+        )
+
+    print("episodes: {}  workers: {}".format(report["n_episodes"], report["num_workers"]))
+    print("success rate: {:.3f}".format(report["success_rate"]))
+    print("reward: {:.3f} +- {:.3f}".format(report["reward_mean"], report["reward_std"]))
+    if "success_objs_mean" in report:
+        print("placed objects: {:.2f}  {}".format(report["success_objs_mean"], report["success_objs_hist"]))
+    print("env step: {}".format(report["env_step"]))
+    print("inference: {}".format(report["inference"]))
+    print("{:.1f} episodes / s".format(report["episodes_per_s"]))
+
+    if args.out is not None:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
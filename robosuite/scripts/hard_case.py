@@ -52,4 +52,84 @@ def get_hard_cases(path='data', trainFile='hard_case_train.npy', testFile='hard_
     np.save(trainFile, hard_cases_train)
     np.save(testFile, hard_cases_test)
 
-    return hard_cases_train, hard_cases_test
\ No newline at end of file
+    return hard_cases_train, hard_cases_test
+
+
+def hard_case_tag(x, y):
+    """
+    Difficulty tag of the hard case with objects at (+-x, +-y), the smaller the
+    gap left between the objects, the harder.
+    """
+    gap = min(x, y)
+    if gap <= 0.025:
+        return 'tight'
+    if gap <= 0.03:
+        return 'medium'
+    return 'loose'
+
+
+def get_hard_case_store(path='data', trainFile='hard_case_train.npz', testFile='hard_case_test.npz',
+                        obj_names=('Can1', 'Can2', 'Milk1', 'Milk2'), train_ratio=0.8, seed=0):
+    """
+    Same layouts as get_hard_cases, as scenario stores tagged by difficulty
+    that BinSqueeze consumes through its scenario_sampler argument.
+    """
+    from robosuite.utils.scenario_store import ScenarioStore
+
+    trainFile = os.path.join(path, trainFile)
+    testFile = os.path.join(path, testFile)
+
+    if os.path.exists(trainFile) and os.path.exists(testFile):
+        return ScenarioStore.load(trainFile), ScenarioStore.load(testFile)
+
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+    z = 0.135
+    cases = []
+    for x, y in itertools.product([0.02, 0.025, 0.03, 0.035, 0.04], [0.02, 0.025, 0.03, 0.035]):
+        cases.append({
+            'obj_names': list(obj_names),
+            'obj_poses': [np.array([x, y, 0]), np.array([x, -y, 0]), np.array([-x, y, 0]), np.array([-x, -y, 0])],
+            'target_pos': np.array([0, 0, z]),
+            'tag': hard_case_tag(x, y),
+            'difficulty': -min(x, y),
+        })
+
+    store_train, store_test = ScenarioStore.from_cases(cases).split(train_ratio, seed=seed)
+    store_train.save(trainFile)
+    store_test.save(testFile)
+
+    return store_train, store_test
+
+
+def _make_squeeze_env():
+    import robosuite as suite
+
+    return suite.make(
+        'BinSqueeze',
+        has_renderer=False,
+        has_offscreen_renderer=False,
+        use_camera_obs=False,
+        control_freq=1,
+    )
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from robosuite.utils.scenario_store import settle_scenarios
+
+    parser = argparse.ArgumentParser(description='Builds the hard case scenario stores.')
+    parser.add_argument('--path', type=str, default='data')
+    parser.add_argument('--settle', action='store_true', help='cache the settled states of the scenarios')
+    parser.add_argument('--num_workers', type=int, default=None)
+    args = parser.parse_args()
+
+    stores = get_hard_case_store(args.path)
+    for store, name in zip(stores, ['hard_case_train.npz', 'hard_case_test.npz']):
+        if args.settle:
+            settle_scenarios(store, _make_squeeze_env, num_workers=args.num_workers)
+            store.save(os.path.join(args.path, name))
+        print('{}: {} scenarios, tags {}'.format(
+            name, len(store), {tag: len(ids) for tag, ids in store.tag_index.items()}))
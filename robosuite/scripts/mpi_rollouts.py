@@ -0,0 +1,57 @@
+"""
+Collects random-policy rollouts of a bin environment on every MPI rank and
+reports the aggregated throughput and episode statistics on rank 0.
+
+Example:
+    $ mpirun -n 4 python mpi_rollouts.py --env BinSqueeze --num_env 4 --nsteps 64
+"""
+
+import time
+import argparse
+import functools
+
+import numpy as np
+
+import robosuite as suite
+from robosuite.utils.mpi_rollouts import MPIRollouts
+
+
+def make_env(env_name):
+    return suite.make(
+        env_name,
+        has_renderer=False,
+        has_offscreen_renderer=True,
+        use_camera_obs=True,
+        control_freq=1,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--env", type=str, default="BinSqueeze")
+    parser.add_argument("--num_env", type=int, default=4)
+    parser.add_argument("--nsteps", type=int, default=64)
+    parser.add_argument("--rollouts", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rollouts = MPIRollouts(functools.partial(make_env, args.env), args.num_env, args.nsteps, seed=args.seed)
+    action_space = rollouts.venv.action_space
+    rng = np.random.RandomState(rollouts.rank)
+
+    def random_policy(obs):
+        return rng.uniform(action_space.low, action_space.high, (len(obs),) + action_space.shape)
+
+    for i in range(args.rollouts):
+        start = time.perf_counter()
+        rollouts.collect(random_policy)
+        batch = rollouts.gather()
+        stats = rollouts.episode_stats()
+        elapsed = time.perf_counter() - start
+
+        if rollouts.rank == rollouts.root:
+            n_steps = batch["rewards"].size
+            print("rollout {}: {} steps from {} ranks in {:.2f} s ({:.1f} steps / s), {}".format(
+                i, n_steps, rollouts.size, elapsed, n_steps / elapsed, stats))
+
+    rollouts.close()
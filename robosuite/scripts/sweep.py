@@ -0,0 +1,295 @@
+"""
+Runs a grid of training runs of bin_packing_baselines.py or
+bin_squeeze_baselines.py on one machine, replacing the train_*.sh scripts.
+
+Every combination of the grid parameters is one run. Runs are started in
+order onto the available cores: a run with @num_env environments needs
+num_env * cores_per_env + 1 cores (the extra one for the learner), and when
+the next run does not fit, no later run is started before it, so large runs
+are never starved by smaller ones. Each run as a whole is pinned to its own
+set of cores, which all its processes inherit, so runs never share cores;
+the learner and the environment workers of a run are not pinned to
+individual cores and are scheduled by the OS within the run's set. Thread
+pools of the numerical libraries are sized to the run's cores. Failed runs
+are restarted up to max_retries times.
+
+The training scripts leave some arguments (e.g. the seed) out of their result
+directory, so every run gets its own directory: the run name is appended to
+its --debug argument.
+
+The throughput of every run is read from the fps values its logger prints
+during its last attempt, and a summary of all runs is written to <log_dir>/sweep_results.json.
+
+The sweep is described by a json file, see sweep_example.json:
+
+    {
+        "script": "bin_squeeze_baselines.py",
+        "log_dir": "sweeps/squeeze",
+        "cores_per_env": 1,
+        "max_retries": 2,
+        "base": {"alg": "ppo2", "num_env": 8, "num_timesteps": 1000000},
+        "grid": {"max": [1e-5, 3e-5], "ent_coef": [0.2, 0.05]}
+    }
+
+Example:
+    $ python sweep.py sweep_example.json
+    $ python sweep.py sweep_example.json --dry_run
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import itertools
+import subprocess
+
+PATH = os.path.dirname(os.path.realpath(__file__))
+
+FPS_PATTERN = re.compile(r"\|\s*fps\s*\|\s*([0-9.eE+-]+)\s*\|")
+
+
+def expand_grid(base, grid):
+    """
+    Returns the parameters of every run: @base updated with every combination
+    of the values of @grid, in a deterministic order.
+    """
+    keys = sorted(grid.keys())
+    runs = []
+    for values in itertools.product(*[grid[key] for key in keys]):
+        params = dict(base)
+        params.update(zip(keys, values))
+        runs.append(params)
+    return runs
+
+
+def to_argv(params):
+    """
+    Turns run parameters into command line arguments. The training scripts
+    parse booleans with type=bool, so False is passed as an empty string.
+    """
+    argv = []
+    for key, value in params.items():
+        if isinstance(value, bool):
+            value = "True" if value else ""
+        argv += ["--{}".format(key), str(value)]
+    return argv
+
+
+def run_name(index, params, grid):
+    tags = ["{}{}".format(key, params[key]) for key in sorted(grid.keys())]
+    return "_".join(["run{:03d}".format(index)] + tags)
+
+
+def run_params(params, name):
+    """
+    Returns @params with the run @name appended to the --debug path
+    component of the result directory, so that concurrent runs never write
+    to the same directory.
+    """
+    params = dict(params)
+    params["debug"] = os.path.join(str(params.get("debug", "sweep")), name)
+    return params
+
+
+def first_fit(sizes, free):
+    """
+    Assigns cores to runs in order, up to the first run that does not fit in
+    the remaining cores. Later runs wait for it even if they would fit.
+
+    Args:
+        sizes (list): number of cores of every pending run.
+        free (list): available cores.
+
+    Returns:
+        tuple: list of (position in @sizes, assigned cores) of the started
+            runs, and the cores left free.
+    """
+    free = list(free)
+    assigned = []
+    for i, n_cores in enumerate(sizes):
+        if n_cores > len(free):
+            break
+        assigned.append((i, free[:n_cores]))
+        free = free[n_cores:]
+    return assigned, free
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count()))
+
+
+def parse_fps(log_path, offset=0):
+    """
+    Returns the fps values printed by the baselines logger in @log_path,
+    after byte @offset.
+    """
+    if not os.path.exists(log_path):
+        return []
+    with open(log_path, "rb") as f:
+        f.seek(offset)
+        text = f.read().decode("utf-8", errors="replace")
+    return [float(match.group(1)) for match in FPS_PATTERN.finditer(text)]
+
+
+class Run:
+    def __init__(self, index, name, params, n_cores, log_dir):
+        self.index = index
+        self.name = name
+        self.params = params
+        self.n_cores = n_cores
+        self.log_dir = log_dir
+        self.attempts = 0
+        self.cores = None
+        self.process = None
+        self.log_file = None
+        self.log_offset = 0
+        self.start_time = None
+        self.returncode = None
+        self.duration = None
+
+    @property
+    def log_path(self):
+        return os.path.join(self.log_dir, "{}.log".format(self.name))
+
+    def start(self, script, cores):
+        self.cores = cores
+        self.attempts += 1
+        self.start_time = time.time()
+
+        env = dict(os.environ)
+        threads = str(len(cores))
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            env[var] = threads
+
+        def pin():
+            if hasattr(os, "sched_setaffinity"):
+                os.sched_setaffinity(0, cores)
+
+        cmd = [sys.executable, script] + to_argv(self.params)
+        # the log keeps every attempt, only the last one is parsed
+        self.log_offset = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+        self.log_file = open(self.log_path, "a")
+        self.log_file.write("### attempt {} on cores {}: {}\n".format(self.attempts, cores, " ".join(cmd)))
+        self.log_file.flush()
+        self.process = subprocess.Popen(
+            cmd,
+            cwd=PATH,
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=self.log_file,
+            stderr=subprocess.STDOUT,
+            preexec_fn=pin,
+        )
+        # the training scripts ask before overwriting an existing result directory
+        self.process.stdin.write(b"yes\n")
+        self.process.stdin.close()
+
+    def poll(self):
+        returncode = self.process.poll()
+        if returncode is not None:
+            self.returncode = returncode
+            self.duration = time.time() - self.start_time
+            self.log_file.close()
+        return returncode
+
+    def terminate(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+
+    def result(self):
+        fps = parse_fps(self.log_path, self.log_offset)
+        return {
+            "name": self.name,
+            "params": self.params,
+            "cores": self.cores,
+            "attempts": self.attempts,
+            "returncode": self.returncode,
+            "duration_s": self.duration,
+            "fps_mean": sum(fps) / len(fps) if fps else None,
+            "fps_last": fps[-1] if fps else None,
+            "fps_per_core": fps[-1] / self.n_cores if fps else None,
+        }
+
+
+def sweep(config, cores=None, dry_run=False, poll_interval=5.):
+    """
+    Runs the sweep described by @config and returns the per-run results.
+    """
+    script = os.path.join(PATH, config["script"])
+    log_dir = config.get("log_dir", os.path.join("sweeps", os.path.splitext(config["script"])[0]))
+    cores_per_env = config.get("cores_per_env", 1)
+    max_retries = config.get("max_retries", 2)
+    grid = config.get("grid", {})
+    cores = cores or available_cores()
+
+    pending = []
+    for index, params in enumerate(expand_grid(config.get("base", {}), grid)):
+        n_cores = min(len(cores), int(params.get("num_env", 1) * cores_per_env) + 1)
+        name = run_name(index, params, grid)
+        pending.append(Run(index, name, run_params(params, name), n_cores, log_dir))
+
+    if dry_run:
+        for run in pending:
+            print("{} ({} cores): {}".format(run.name, run.n_cores, " ".join(to_argv(run.params))))
+        return []
+
+    os.makedirs(log_dir, exist_ok=True)
+
+    free = list(cores)
+    running = []
+    finished = []
+    try:
+        while pending or running:
+            # start pending runs in order while the next one fits
+            assigned, free = first_fit([run.n_cores for run in pending], free)
+            started = [pending[i] for i, _ in assigned]
+            for run, (_, run_cores) in zip(started, assigned):
+                run.start(script, run_cores)
+                running.append(run)
+                print("started {} on cores {}".format(run.name, run_cores))
+            pending = [run for run in pending if run not in started]
+
+            time.sleep(poll_interval)
+
+            for run in list(running):
+                returncode = run.poll()
+                if returncode is None:
+                    continue
+                running.remove(run)
+                free = sorted(free + run.cores)
+                if returncode != 0 and run.attempts <= max_retries:
+                    print("{} failed with code {}, restarting".format(run.name, returncode))
+                    pending.insert(0, run)
+                else:
+                    print("{} finished with code {}".format(run.name, returncode))
+                    finished.append(run)
+    except KeyboardInterrupt:
+        for run in running:
+            run.terminate()
+        raise
+
+    results = [run.result() for run in sorted(finished, key=lambda run: run.index)]
+    with open(os.path.join(log_dir, "sweep_results.json"), "w") as f:
+        json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs a grid of training runs.")
+    parser.add_argument("config", type=str, help="json sweep description")
+    parser.add_argument("--cores", type=str, default=None, help="comma separated cores to use, all by default")
+    parser.add_argument("--dry_run", action="store_true", help="print the runs without starting them")
+    parser.add_argument("--poll_interval", type=float, default=5.)
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = json.load(f)
+    cores = [int(core) for core in args.cores.split(",")] if args.cores else None
+
+    results = sweep(config, cores=cores, dry_run=args.dry_run, poll_interval=args.poll_interval)
+    for result in results:
+        print("{name}: code {returncode}, {attempts} attempt(s), fps {fps_last}".format(**result))
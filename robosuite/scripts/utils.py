@@ -98,6 +98,12 @@ def make_env(env_id, env_type, mpi_rank=0, subrank=0, seed=None, reward_scale=1.
         if 'frame_stack' not in wrapper_kwargs:
             wrapper_kwargs['frame_stack'] = 1
         env = retro_wrappers.wrap_deepmind_retro(env, **wrapper_kwargs)
+    elif wrapper_kwargs.get('frame_stack', 1) > 1:
+        # stack inside the worker, so that vec envs copy the stacked view
+        # straight into their (shared memory) observation buffers
+        from robosuite.wrappers import FrameStackWrapper
+
+        env = FrameStackWrapper(env, wrapper_kwargs['frame_stack'])
 
     if isinstance(env.action_space, gym.spaces.Box):
         env = ClipActionsWrapper(env)
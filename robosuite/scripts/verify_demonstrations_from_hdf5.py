@@ -0,0 +1,208 @@
+"""
+A script to check that the demonstrations stored in a hdf5 file replay
+deterministically, e.g. after upgrading the simulator.
+
+Every episode is replayed headlessly from its first state by playing back the
+recorded actions, and the resulting simulator states are compared with the
+recorded ones. Episodes are sharded across a pool of worker processes; episodes
+that share a model file are sent to the same worker, which compiles the model once.
+
+Arguments:
+    --folder (str): Path to demonstrations
+    --num-workers (int): Number of worker processes
+    --atol (float): Absolute state error above which a step counts as diverged
+    --report (str): Where to write the json report (defaults to the demo folder)
+
+Example:
+    $ python verify_demonstrations_from_hdf5.py --folder ../models/assets/demonstrations/SawyerPickPlace/ --num-workers 8
+"""
+import os
+import sys
+import json
+import time
+import h5py
+import argparse
+import multiprocessing
+import numpy as np
+
+import robosuite
+from robosuite.utils.mjcf_utils import postprocess_model_xml
+from robosuite.utils.model_cache import load_model_from_xml_cached
+
+# per-process state of the workers
+_worker = {}
+
+
+def _init_worker(demo_path, env_name):
+    """
+    Creates the headless environment and opens the demonstration file once per worker.
+    """
+    env = robosuite.make(
+        env_name,
+        has_renderer=False,
+        has_offscreen_renderer=False,
+        ignore_done=True,
+        use_camera_obs=False,
+        reward_shaping=True,
+        control_freq=100,
+    )
+    env.reset()
+    _worker["env"] = env
+    _worker["demo_path"] = demo_path
+    _worker["file"] = h5py.File(os.path.join(demo_path, "demo.hdf5"), "r")
+    _worker["models"] = {}
+
+
+def _load_model(model_file):
+    """
+    Returns the compiled model of @model_file, compiling it once per worker.
+    """
+    models = _worker["models"]
+    if model_file not in models:
+        model_path = os.path.join(_worker["demo_path"], "models", model_file)
+        with open(model_path, "r") as model_f:
+            xml = postprocess_model_xml(model_f.read())
+        models[model_file] = load_model_from_xml_cached(xml)
+    return models[model_file]
+
+
+def verify_episode(ep, atol=0.):
+    """
+    Replays the actions of episode @ep and compares the states with the recorded ones.
+
+    Returns:
+        dict: the episode name, its number of steps, the first step whose state
+            error exceeds @atol (None if there is none) and the maximum state error.
+    """
+    env = _worker["env"]
+    f = _worker["file"]
+    ep_grp = f["data/{}".format(ep)]
+
+    states = ep_grp["states"][()]
+    actions = np.concatenate(
+        [ep_grp["joint_velocities"][()], ep_grp["gripper_actuations"][()]], axis=1
+    )
+
+    model = _load_model(ep_grp.attrs["model_file"])
+    if model is not env.sim.model:
+        env.reset_from_model(model)
+    env.sim.reset()
+    env.sim.set_state_from_flattened(states[0])
+    env.sim.forward()
+
+    first_divergence = None
+    max_error = 0.
+    # the last action has no recorded resulting state
+    for j in range(len(actions) - 1):
+        env.step(actions[j])
+        error = float(np.max(np.abs(states[j + 1] - env.sim.get_state().flatten())))
+        if error > atol and first_divergence is None:
+            first_divergence = j + 1
+        max_error = max(max_error, error)
+
+    return {
+        "episode": ep,
+        "num_steps": int(len(actions)),
+        "first_divergence": first_divergence,
+        "max_error": max_error,
+    }
+
+
+def _verify_shard(args):
+    shard, atol = args
+    results = []
+    for ep in shard:
+        try:
+            results.append(verify_episode(ep, atol=atol))
+        except Exception as e:
+            results.append({"episode": ep, "error": repr(e)})
+    return results
+
+
+def make_shards(f, num_shards):
+    """
+    Splits the episodes of @f into @num_shards lists of similar size, keeping
+    episodes recorded on the same model file together whenever possible.
+    """
+    by_model = {}
+    for ep in f["data"].keys():
+        model_file = f["data/{}".format(ep)].attrs["model_file"]
+        by_model.setdefault(model_file, []).append(ep)
+
+    shards = [[] for _ in range(num_shards)]
+    target = int(np.ceil(sum(len(eps) for eps in by_model.values()) / num_shards))
+    # largest groups first, each to the currently smallest shard
+    for eps in sorted(by_model.values(), key=len, reverse=True):
+        while eps:
+            shard = min(shards, key=len)
+            n = max(target - len(shard), 1)
+            shard.extend(eps[:n])
+            eps = eps[n:]
+    return [shard for shard in shards if shard]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--folder",
+        type=str,
+        default=os.path.join(
+            robosuite.models.assets_root, "demonstrations/SawyerNutAssembly"
+        ),
+    )
+    parser.add_argument("--num-workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--atol", type=float, default=0.)
+    parser.add_argument("--report", type=str, default=None)
+    args = parser.parse_args()
+
+    demo_path = args.folder
+    with h5py.File(os.path.join(demo_path, "demo.hdf5"), "r") as f:
+        env_name = f["data"].attrs["env"]
+        # a few shards per worker balances episodes of different lengths
+        shards = make_shards(f, args.num_workers * 4)
+
+    start = time.time()
+    results = []
+    with multiprocessing.Pool(
+        args.num_workers, initializer=_init_worker, initargs=(demo_path, env_name)
+    ) as pool:
+        for shard_results in pool.imap_unordered(
+            _verify_shard, [(shard, args.atol) for shard in shards]
+        ):
+            for res in shard_results:
+                if "error" in res:
+                    print("{}: failed ({})".format(res["episode"], res["error"]))
+                elif res["first_divergence"] is not None:
+                    print(
+                        "{}: diverged at step {} (max error {:.3e})".format(
+                            res["episode"], res["first_divergence"], res["max_error"]
+                        )
+                    )
+            results.extend(shard_results)
+
+    results.sort(key=lambda res: res["episode"])
+    num_failed = sum(1 for res in results if "error" in res)
+    num_diverged = sum(1 for res in results if res.get("first_divergence") is not None)
+    report = {
+        "folder": os.path.abspath(demo_path),
+        "env": env_name,
+        "repository_version": robosuite.__version__,
+        "atol": args.atol,
+        "num_episodes": len(results),
+        "num_diverged": num_diverged,
+        "num_failed": num_failed,
+        "max_error": max([res.get("max_error", 0.) for res in results] + [0.]),
+        "wall_time": time.time() - start,
+        "episodes": results,
+    }
+
+    report_path = args.report or os.path.join(demo_path, "verification_report.json")
+    with open(report_path, "w") as report_f:
+        json.dump(report, report_f, indent=2)
+
+    print(
+        "Verified {} episodes: {} diverged, {} failed. Report written to {}".format(
+            len(results), num_diverged, num_failed, report_path
+        )
+    )
+    sys.exit(1 if num_diverged or num_failed else 0)
@@ -19,6 +19,7 @@ from baselines.common.vec_env.dummy_vec_env import DummyVecEnv
 import argparse
 import robosuite as suite
 from robosuite.wrappers import MyGymWrapper
+from robosuite.utils.rollout_storage import RolloutStorage, shmem_step_into
 import tensorflow as tf
 
 def constfn(val):
@@ -42,66 +43,44 @@ class Runner(AbstractEnvRunner):
         self.lam = lam
         # Discount rate
         self.gamma = gamma
+        # Preallocated experience, filled in place every rollout
+        self.storage = RolloutStorage(nsteps, self.nenv, env.observation_space.shape,
+                                      ob_dtype=self.obs.dtype, ac_shape=env.action_space.shape,
+                                      ac_dtype=env.action_space.dtype)
+        self.storage.reset(self.obs)
 
     # @profile
     def run(self):
-        # Here, we init the lists that will contain the mb of experiences
-        mb_obs, mb_rewards, mb_actions, mb_values, mb_dones, mb_neglogpacs = [],[],[],[],[],[]
+        storage = self.storage
         mb_states = self.states
         epinfos = []
         # For n in range number of steps
         for _ in range(self.nsteps):
             # Given observations, get action value and neglopacs
-            # We already have self.obs because Runner superclass run self.obs[:] = env.reset() on init
-            actions, values, self.states, neglogpacs = self.model.step(self.obs, S=self.states, M=self.dones)
-            mb_obs.append(self.obs.copy())
-            mb_actions.append(actions)
-            mb_values.append(values)
-            mb_neglogpacs.append(neglogpacs)
-            mb_dones.append(self.dones)
-
-            # Take actions in env and look the results
-            # Infos contains a ton of useful informations
-            self.obs[:], rewards, self.dones, infos = self.env.step(actions)
+            actions, values, self.states, neglogpacs = self.model.step(
+                storage.current_obs, S=self.states, M=storage.current_dones)
+
+            # Take actions in env, the observations are written into the storage
+            rewards, dones, infos = shmem_step_into(self.env, actions, storage.next_obs)
             for info in infos:
                 maybeepinfo = info.get('episode')
                 if maybeepinfo: epinfos.append(maybeepinfo)
-            mb_rewards.append(rewards)
-        #batch of steps to batch of rollouts
-        mb_obs = np.asarray(mb_obs, dtype=self.obs.dtype)
-        mb_rewards = np.asarray(mb_rewards, dtype=np.float32)
-        mb_actions = np.asarray(mb_actions)
-        mb_values = np.asarray(mb_values, dtype=np.float32)
-        mb_neglogpacs = np.asarray(mb_neglogpacs, dtype=np.float32)
-        mb_dones = np.asarray(mb_dones, dtype=np.bool)
-        last_values = self.model.value(self.obs, S=self.states, M=self.dones)
+            storage.insert(actions, values, neglogpacs, rewards, dones)
+
+        self.obs[:] = storage.last_obs
+        self.dones = storage.last_dones.copy()
+        last_values = self.model.value(storage.last_obs, S=self.states, M=storage.last_dones)
 
         # discount/bootstrap off value fn
-        mb_returns = np.zeros_like(mb_rewards)
-        mb_advs = np.zeros_like(mb_rewards)
-        lastgaelam = 0
-        for t in reversed(range(self.nsteps)):
-            if t == self.nsteps - 1:
-                nextnonterminal = 1.0 - self.dones
-                nextvalues = last_values
-            else:
-                nextnonterminal = 1.0 - mb_dones[t+1]
-                nextvalues = mb_values[t+1]
-            delta = mb_rewards[t] + self.gamma * nextvalues * nextnonterminal - mb_values[t]
-            mb_advs[t] = lastgaelam = delta + self.gamma * self.lam * nextnonterminal * lastgaelam
-        mb_returns = mb_advs + mb_values
-        return (*map(sf01, (mb_obs, mb_returns, mb_dones, mb_actions, mb_values, mb_neglogpacs)),
-            mb_states, epinfos)
-# obs, returns, masks, actions, values, neglogpacs, states = runner.run()
-def sf01(arr):
-    """
-    swap and then flatten axes 0 and 1
-    """
-    s = arr.shape
-    return arr.swapaxes(0, 1).reshape(s[0] * s[1], *s[2:])
+        storage.compute_returns(last_values, self.gamma, self.lam)
+        batch = storage.flattened()
+        return (*batch, mb_states, epinfos)
 
+    def after_update(self):
+        self.storage.after_update()
 
 
+# obs, returns, masks, actions, values, neglogpacs, states = runner.run()
 def learn(*, network, env, total_timesteps, eval_env = None, seed=None, nsteps=2048, ent_coef=0.0, lr=3e-4,
             vf_coef=0.5,  max_grad_norm=0.5, gamma=0.99, lam=0.95,
             log_interval=10, nminibatches=4, noptepochs=4, cliprange=0.2,
@@ -244,6 +223,9 @@ def learn(*, network, env, total_timesteps, eval_env = None, seed=None, nsteps=2
 
         # Feedforward --> get losses --> update
         lossvals = np.mean(mblossvals, axis=0)
+        runner.after_update()
+        if eval_env is not None:
+            eval_runner.after_update()
         # End timer
         tnow = time.perf_counter()
         # Calculate the fps (frame per second)
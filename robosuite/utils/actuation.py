@@ -0,0 +1,74 @@
+"""
+Precomputed degree-of-freedom layout used to apply forces every physics step.
+
+Assigning through python lists of indexes (fancy indexing) and looking up joint
+addresses by name are comparatively slow in the inner simulation loops. The
+layout below resolves every index once, when the model is loaded, and stores
+contiguous ranges as slices so that force hooks reduce to slice assignments.
+"""
+
+import numpy as np
+
+
+def as_index(indexes):
+    """
+    Returns a slice equivalent to @indexes if they form a contiguous ascending
+    range, and an integer array to index with otherwise.
+    """
+    indexes = np.asarray(indexes, dtype=np.int64).ravel()
+    if len(indexes) == 0:
+        return slice(0, 0)
+    if np.all(np.diff(indexes) == 1):
+        return slice(int(indexes[0]), int(indexes[-1]) + 1)
+    return indexes
+
+
+def joint_dof_range(model, joint_name):
+    """
+    Returns the slice of qvel / qfrc entries of joint @joint_name.
+    """
+    addr = model.get_joint_qvel_addr(joint_name)
+    if isinstance(addr, tuple):
+        return slice(addr[0], addr[1])
+    return slice(addr, addr + 1)
+
+
+class ActuationLayout:
+    """
+    Degrees of freedom of the robot and of the free objects of a model.
+    """
+
+    def __init__(self, model, robot_joints):
+        """
+        Args:
+            model (PyMjModel): compiled model.
+            robot_joints (list): names of the gravity-compensated robot joints.
+        """
+        self.model = model
+        self.robot_dofs = as_index(
+            [model.get_joint_qvel_addr(joint) for joint in robot_joints]
+        )
+        self.extra_dofs = []
+        self.object_dofs = {}
+
+    def add_compensated_joint(self, joint_name):
+        """
+        Adds the degrees of freedom of @joint_name to gravity compensation.
+        """
+        self.extra_dofs.append(joint_dof_range(self.model, joint_name))
+
+    def add_objects(self, object_names):
+        """
+        Caches the degrees of freedom of the free joints of @object_names, whose
+        joints are named after the objects.
+        """
+        for name in object_names:
+            self.object_dofs[name] = joint_dof_range(self.model, name)
+
+    def compensate_gravity(self, data):
+        """
+        Cancels gravity and other bias forces on the robot (and extra) joints.
+        """
+        data.qfrc_applied[self.robot_dofs] = data.qfrc_bias[self.robot_dofs]
+        for dofs in self.extra_dofs:
+            data.qfrc_applied[dofs] = data.qfrc_bias[dofs]
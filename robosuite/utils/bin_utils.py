@@ -0,0 +1,178 @@
+"""
+Bin geometry shared by the bin packing, bin squeezing and pick-and-place
+environments.
+
+Bounds are computed once when the model is loaded, and containment and
+success are evaluated for all objects at once from an array of positions,
+typically @sim.data.body_xpos[body_ids].
+
+The discrete drop points of BinPackPlace are decoded from a lookup table built
+once per grid configuration, see @DiscreteActionGrid.
+"""
+
+import numpy as np
+
+
+class BinGeometry:
+    """
+    One or several axis-aligned bins. Containment is strict on every face.
+    """
+
+    def __init__(self, low, high):
+        """
+        Args:
+            low (np.array): (3,) lower corner of a single bin, or (k, 3) lower
+                corners of k bins.
+            high (np.array): upper corners, same shape as @low. Use np.inf for
+                faces that should not be checked.
+        """
+        self.low = np.asarray(low, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        assert self.low.shape == self.high.shape
+
+    @classmethod
+    def from_center(cls, bin_pos, bin_size, height, margin=(0., 0., 0.)):
+        """
+        Returns a single bin centered at @bin_pos in x and y, whose bottom is at
+        the height of @bin_pos and whose top lies @height above it.
+
+        Args:
+            bin_pos (np.array): position of the bin body.
+            bin_size (np.array): footprint of the bin, only x and y are used.
+            height (float): height of the bin. np.inf leaves the top open.
+            margin (tuple): tolerance added around the bin on x, y and the bottom.
+        """
+        bin_pos = np.asarray(bin_pos, dtype=np.float64)
+        half = np.array([bin_size[0] / 2, bin_size[1] / 2, 0.])
+        margin = np.asarray(margin, dtype=np.float64)
+        low = bin_pos - half - margin
+        high = bin_pos + half + margin
+        high[2] = bin_pos[2] + height
+        return cls(low, high)
+
+    def contains(self, positions, bin_ids=None):
+        """
+        Returns whether each position lies inside its bin.
+
+        Args:
+            positions (np.array): (3,) position or (n, 3) positions.
+            bin_ids (np.array): index of the bin of every position if the
+                geometry holds several bins.
+
+        Returns:
+            bool or np.array: containment of every position.
+        """
+        low, high = self.low, self.high
+        if bin_ids is not None:
+            low, high = low[bin_ids], high[bin_ids]
+        return np.all((positions > low) & (positions < high), axis=-1)
+
+    def not_in_bin(self, positions, bin_ids=None):
+        """
+        Negation of @contains, matching the environments' not_in_bin.
+        """
+        return ~self.contains(positions, bin_ids)
+
+    @staticmethod
+    def reach_rewards(positions, gripper_pos):
+        """
+        Returns the reaching reward 1 - tanh(10 * distance) of every position
+        with respect to the gripper.
+        """
+        dists = np.linalg.norm(positions - gripper_pos, axis=-1)
+        return 1 - np.tanh(10.0 * dists)
+
+    def success(self, positions, gripper_pos, bin_ids=None, reach_threshold=0.6):
+        """
+        Returns whether every object lies in its bin and has been released by
+        the gripper (its reaching reward is below @reach_threshold).
+        """
+        return self.contains(positions, bin_ids) & (
+            self.reach_rewards(positions, gripper_pos) < reach_threshold
+        )
+
+
+class DiscreteActionGrid:
+    """
+    Lookup table of the drop points of a discrete action space: a regular
+    @x_num by @y_num grid over the continuous action bounds, where cell
+    (x_id, y_id) has id x_id * y_num + y_id and lies at the lower corner
+    low + (high - low) / num * id, as BinPackPlace always placed it.
+
+    Cells can be masked out, e.g. the ones outside the bin. Action ids then
+    enumerate the valid cells only, so a learner never picks a masked cell.
+    """
+
+    def __init__(self, low, high, x_num, y_num, mask=None):
+        """
+        Args:
+            low (np.array): lower (x, y) bound of the actions.
+            high (np.array): upper (x, y) bound of the actions.
+            x_num (int): number of cells along x.
+            y_num (int): number of cells along y.
+            mask (np.array): (x_num * y_num,) valid cells, all if None.
+        """
+        assert x_num > 0 and y_num > 0
+        self.low = np.asarray(low, dtype=np.float64)[:2]
+        self.high = np.asarray(high, dtype=np.float64)[:2]
+        self.x_num = x_num
+        self.y_num = y_num
+
+        x_id, y_id = np.divmod(np.arange(x_num * y_num), y_num)
+        delta = (self.high - self.low) / (x_num, y_num)
+        self.points = self.low + delta * np.stack([x_id, y_id], axis=1)
+
+        if mask is None:
+            mask = np.ones(len(self.points), dtype=bool)
+        self.mask = np.asarray(mask, dtype=bool)
+        assert self.mask.shape == (len(self.points),) and self.mask.any(), "no valid cell"
+        # action id -> grid cell id, and the table the actions are decoded with
+        self.cell_ids = np.flatnonzero(self.mask)
+        self.actions = self.points[self.cell_ids]
+
+    @classmethod
+    def from_bin(cls, low, high, x_num, y_num, geometry, margin=0.):
+        """
+        Returns a grid whose cells outside the footprint of @geometry, shrunk
+        by @margin, are masked out.
+
+        Args:
+            geometry (BinGeometry): the bin, a single one.
+            margin (float): distance the drop points keep from the bin walls.
+        """
+        grid = cls(low, high, x_num, y_num)
+        bin_low = geometry.low[:2] + margin
+        bin_high = geometry.high[:2] - margin
+        mask = np.all((grid.points > bin_low) & (grid.points < bin_high), axis=-1)
+        return cls(low, high, x_num, y_num, mask=mask)
+
+    def __len__(self):
+        return len(self.actions)
+
+    def decode(self, action_ids):
+        """
+        Returns the (x, y) drop point of every action id.
+
+        Args:
+            action_ids (int or np.array): action id or array of ids, e.g. one
+                per environment of a vector environment.
+
+        Returns:
+            np.array: (2,) point or (..., 2) points.
+        """
+        return self.actions[np.asarray(action_ids, dtype=np.int64)]
+
+    def cell_index(self, action_ids):
+        """
+        Returns the (x_id, y_id) grid cell of every action id.
+        """
+        return np.divmod(self.cell_ids[np.asarray(action_ids, dtype=np.int64)], self.y_num)
+
+    @property
+    def space(self):
+        """
+        gym Discrete space of the action ids.
+        """
+        from gym import spaces
+
+        return spaces.Discrete(len(self))
@@ -0,0 +1,246 @@
+"""
+Streaming recorder that writes demonstrations directly in the demo.hdf5 schema.
+
+The recorder replaces the npz dumps of the DataCollectionWrapper followed by
+`gather_demonstrations_as_hdf5`. Rows are buffered in memory and handed in
+batches to a background thread that appends them to chunked, compressed,
+resizable datasets, so the environment loop never blocks on disk I/O.
+
+The file layout is the one documented in `gather_demonstrations_as_hdf5`:
+
+    demo.hdf5
+        data (group)
+            date, time, repository_version, env (attributes)
+            demo_1 (group)
+                model_file (attribute)
+                states, joint_velocities, gripper_actuations,
+                right_dpos, right_dquat, left_dpos, left_dquat (datasets)
+            ...
+    models/
+        model_1.xml
+        ...
+
+States are recorded after the action of each step has been played, so every
+state is paired with the action of the following step (the first action and
+the last state of an episode are dropped, exactly as the gather step did).
+"""
+
+import os
+import queue
+import datetime
+import threading
+import numpy as np
+
+import robosuite
+
+# field name in the hdf5 file -> key of the action info dictionary
+ACTION_FIELDS = (
+    ("joint_velocities", "joint_velocities"),
+    ("gripper_actuations", "gripper_actuation"),
+    ("right_dpos", "right_dpos"),
+    ("right_dquat", "right_dquat"),
+    ("left_dpos", "left_dpos"),
+    ("left_dquat", "left_dquat"),
+)
+
+_CLOSE = object()
+
+
+class HDF5DemoRecorder:
+    """
+    Appends demonstrations to a demo.hdf5 file from a background thread.
+    """
+
+    def __init__(
+        self,
+        out_dir,
+        env_name,
+        flush_freq=100,
+        chunk_size=256,
+        compression="gzip",
+        max_pending=16,
+    ):
+        """
+        Args:
+            out_dir (str): directory of the demo.hdf5 file and of the models directory.
+            env_name (str): environment name stored in the file metadata.
+            flush_freq (int): number of buffered rows handed to the writer at once.
+            chunk_size (int): number of rows per hdf5 chunk.
+            compression (str): hdf5 compression filter, or None.
+            max_pending (int): maximum number of batches waiting for the writer
+                before recording blocks.
+        """
+        import h5py  # only needed when demonstrations are recorded
+
+        self._h5py = h5py
+        self.out_dir = out_dir
+        self.hdf5_path = os.path.join(out_dir, "demo.hdf5")
+        self.model_dir = os.path.join(out_dir, "models")
+        self.env_name = env_name
+        self.flush_freq = flush_freq
+        self.chunk_size = chunk_size
+        self.compression = compression
+        self.max_pending = max_pending
+
+        os.makedirs(self.model_dir, exist_ok=True)
+
+        self._queue = None
+        self._thread = None
+        self._error = None
+
+        self._pending_state = None
+        self._rows = []
+        self._in_episode = False
+
+    def start_episode(self, xml_string):
+        """
+        Begins a new demonstration recorded on the model described by @xml_string.
+        """
+        self._check_error()
+        if self._in_episode:
+            self.end_episode()
+        if self._thread is None:
+            self._queue = queue.Queue(maxsize=self.max_pending)
+            self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+            self._thread.start()
+        self._in_episode = True
+        self._pending_state = None
+        self._rows = []
+        self._put(("episode", xml_string))
+
+    def add(self, state, action_info):
+        """
+        Records the flattened simulation @state reached by playing the action
+        described by @action_info.
+        """
+        if not self._in_episode:
+            raise ValueError("HDF5DemoRecorder.start_episode must be called first.")
+        if self._pending_state is not None:
+            self._rows.append((self._pending_state, action_info))
+            if len(self._rows) >= self.flush_freq:
+                self.flush()
+        self._pending_state = np.array(state)
+
+    def flush(self):
+        """
+        Hands the buffered rows to the writer thread without waiting for them.
+        """
+        self._check_error()
+        if not self._rows:
+            return
+        rows, self._rows = self._rows, []
+        states = np.stack([state for state, _ in rows])
+        actions = {
+            field: np.stack([np.asarray(info.get(key, [])) for _, info in rows])
+            for field, key in ACTION_FIELDS
+        }
+        self._put(("rows", states, actions))
+
+    def end_episode(self):
+        """
+        Finishes the current demonstration. The last state has no following
+        action and is dropped.
+        """
+        if not self._in_episode:
+            return
+        self.flush()
+        self._in_episode = False
+        self._pending_state = None
+        self._put(("end",))
+
+    def close(self):
+        """
+        Finishes the current demonstration, waits for every pending write and
+        closes the file. Recording can resume with @start_episode afterwards.
+        """
+        self.end_episode()
+        if self._thread is not None:
+            self._queue.put(_CLOSE)
+            self._thread.join()
+            self._thread = None
+            self._queue = None
+        self._check_error()
+
+    def _put(self, item):
+        self._queue.put(item)
+
+    def _check_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _writer_loop(self):
+        """
+        Owns the hdf5 file: every file access happens on this thread.
+        """
+        f = None
+        grp = None
+        ep_grp = None
+        try:
+            f = self._h5py.File(self.hdf5_path, "a")
+            grp = f.require_group("data")
+            self._write_metadata(grp)
+            num_eps = len([k for k in grp.keys() if k.startswith("demo_")])
+            xml_string = None
+
+            while True:
+                item = self._queue.get()
+                if item is _CLOSE:
+                    break
+                if item[0] == "episode":
+                    xml_string = item[1]
+                    ep_grp = None
+                elif item[0] == "rows":
+                    _, states, actions = item
+                    if ep_grp is None:
+                        # episodes are only created once they hold data
+                        num_eps += 1
+                        ep_grp = self._create_episode(grp, num_eps, xml_string)
+                    self._append(ep_grp, "states", states)
+                    for field, _ in ACTION_FIELDS:
+                        self._append(ep_grp, field, actions[field])
+                elif item[0] == "end":
+                    ep_grp = None
+                    f.flush()
+        except Exception as e:
+            self._error = e
+            # keep draining so that producers never block on a dead writer
+            while True:
+                item = self._queue.get()
+                if item is _CLOSE:
+                    break
+        finally:
+            if f is not None:
+                f.close()
+
+    def _write_metadata(self, grp):
+        now = datetime.datetime.now()
+        if "date" not in grp.attrs:
+            grp.attrs["date"] = "{}-{}-{}".format(now.month, now.day, now.year)
+            grp.attrs["time"] = "{}:{}:{}".format(now.hour, now.minute, now.second)
+        grp.attrs["repository_version"] = robosuite.__version__
+        grp.attrs["env"] = self.env_name
+
+    def _create_episode(self, grp, ep_num, xml_string):
+        model_file = "model_{}.xml".format(ep_num)
+        with open(os.path.join(self.model_dir, model_file), "w") as f:
+            f.write(xml_string)
+        ep_grp = grp.create_group("demo_{}".format(ep_num))
+        ep_grp.attrs["model_file"] = model_file
+        return ep_grp
+
+    def _append(self, ep_grp, name, data):
+        if name not in ep_grp:
+            row_shape = data.shape[1:]
+            ep_grp.create_dataset(
+                name,
+                shape=(0,) + row_shape,
+                maxshape=(None,) + row_shape,
+                dtype=data.dtype,
+                chunks=(self.chunk_size,) + row_shape if all(row_shape) else None,
+                compression=self.compression if all(row_shape) else None,
+            )
+        dset = ep_grp[name]
+        start = dset.shape[0]
+        dset.resize(start + data.shape[0], axis=0)
+        dset[start:] = data
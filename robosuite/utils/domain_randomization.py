@@ -0,0 +1,245 @@
+"""
+Runtime domain randomization of a compiled MuJoCo model.
+
+Instead of regenerating the MJCF xml (and recompiling the model) to vary
+physical and visual properties, the randomizer below edits the fields of
+@sim.model in place. Nominal values are recorded the first time a model is
+seen, and every call to @randomize samples around those nominal values, so
+randomization never drifts across resets.
+
+Ranges are declared on the models themselves:
+
+    obj = MilkObject()
+    obj.set_randomization(friction=(0.8, 1.2), mass=(0.5, 2.0), rgba=(0, 1))
+
+    arena = BinPackingArena()
+    arena.set_randomization(camera_pos=0.01, camera_rot=0.02, light_diffuse=(0.5, 1.0))
+
+and an environment picks them up on every reset once a randomizer is installed:
+
+    env.set_randomizer(DomainRandomizer())
+
+Environments that rebuild their objects on every reset (the bin environments)
+take the ranges as an argument instead, and install a randomizer themselves:
+
+    env = BinSqueeze(randomization={"objects": {"friction": (0.8, 1.2)}})
+"""
+
+import numpy as np
+
+import robosuite.utils.transform_utils as T
+
+# mjtGeom values of geoms that can be resized without breaking the model
+# (planes, height fields and meshes derive their extent from other fields).
+_RESIZABLE_GEOM_TYPES = (2, 3, 4, 5, 6)  # sphere, capsule, ellipsoid, cylinder, box
+
+OBJECT_RANDOMIZATION_KEYS = ("friction", "mass", "rgba", "size")
+ARENA_RANDOMIZATION_KEYS = ("camera_pos", "camera_rot", "light_pos", "light_diffuse")
+
+
+def check_randomization_ranges(ranges, valid_keys):
+    """
+    Validates a dictionary of randomization ranges and drops unset entries.
+
+    Args:
+        ranges (dict): mapping from randomized quantity to its range.
+        valid_keys (tuple): names of quantities that may be randomized.
+
+    Returns:
+        dict: a copy of @ranges without None entries.
+    """
+    ranges = {k: v for k, v in ranges.items() if v is not None}
+    for key in ranges:
+        if key not in valid_keys:
+            raise ValueError(
+                "Unknown randomization key {}. Available options are: {}".format(
+                    key, ", ".join(valid_keys)
+                )
+            )
+    return ranges
+
+
+def apply_randomization_ranges(randomization, mujoco_objects=None, mujoco_arena=None):
+    """
+    Declares environment-level ranges on the task objects and arena. The bin
+    environments rebuild these on every reset, so ranges kept by the
+    environment are declared again each time the model is loaded.
+
+    Args:
+        randomization (dict): "objects" maps to the ranges of every object,
+            "arena" to the ranges of the arena, and an object name to the
+            ranges of that object, which take precedence over "objects".
+        mujoco_objects (OrderedDict): object name -> MujocoObject.
+        mujoco_arena (Arena): arena of the task.
+    """
+    mujoco_objects = mujoco_objects or {}
+    for key in randomization:
+        if key not in ("objects", "arena") and key not in mujoco_objects:
+            raise ValueError("Unknown object in randomization ranges: {}".format(key))
+
+    for name, obj in mujoco_objects.items():
+        ranges = randomization.get(name, randomization.get("objects"))
+        if ranges:
+            obj.set_randomization(**ranges)
+    if mujoco_arena is not None and randomization.get("arena"):
+        mujoco_arena.set_randomization(**randomization["arena"])
+
+
+class DomainRandomizer:
+    """
+    Samples physical and visual model parameters in place on every reset.
+
+    Object ranges (see MujocoObject.set_randomization):
+        friction: (low, high) multiplicative scale on the sliding friction
+        mass: (low, high) multiplicative scale on body mass and inertia
+        rgba: (low, high) absolute range of the rgb channels
+        size: (low, high) uniform scale of primitive geoms (meshes are skipped)
+
+    Arena ranges (see Arena.set_randomization):
+        camera_pos: maximum absolute offset of every arena camera position
+        camera_rot: maximum rotation angle (radians) applied to arena cameras
+        light_pos: maximum absolute offset of every light position
+        light_diffuse: (low, high) absolute range of the light diffuse color
+    """
+
+    def __init__(self, random_state=None):
+        """
+        Args:
+            random_state (np.random.RandomState): source of randomness. Defaults
+                to the global numpy random state.
+        """
+        self.random_state = random_state if random_state is not None else np.random
+        self._model = None
+        self._object_targets = []
+        self._camera_ids = np.zeros(0, dtype=np.int64)
+        self._arena_ranges = {}
+        self._nominal = {}
+
+    def bind(self, sim, mujoco_objects=None, mujoco_arena=None):
+        """
+        Resolves the model ids touched by randomization and records nominal values.
+
+        Binding to the same compiled model again is free, which keeps the per-reset
+        cost low when the environment reuses its model between episodes.
+
+        Args:
+            sim (MjSim): simulation whose model is randomized.
+            mujoco_objects (OrderedDict): object name -> MujocoObject with
+                declared randomization ranges.
+            mujoco_arena (Arena): arena with declared randomization ranges.
+        """
+        model = sim.model
+        if model is self._model:
+            return
+        self._model = model
+
+        self._object_targets = []
+        geom_body = np.asarray(model.geom_bodyid)
+        for name, obj in (mujoco_objects or {}).items():
+            ranges = getattr(obj, "randomization", None)
+            if not ranges:
+                continue
+            body_id = model.body_name2id(name)
+            geom_ids = np.flatnonzero(geom_body == body_id)
+            resizable = np.isin(model.geom_type[geom_ids], _RESIZABLE_GEOM_TYPES)
+            self._object_targets.append((body_id, geom_ids, geom_ids[resizable], ranges))
+
+        self._arena_ranges = dict(getattr(mujoco_arena, "randomization", None) or {})
+        camera_names = []
+        if mujoco_arena is not None:
+            camera_names = [
+                cam.get("name") for cam in mujoco_arena.worldbody.iter("camera")
+            ]
+        self._camera_ids = np.array(
+            [model.camera_name2id(name) for name in camera_names if name is not None],
+            dtype=np.int64,
+        )
+
+        # nominal values are copied once per compiled model
+        self._nominal = {
+            "geom_friction": model.geom_friction.copy(),
+            "geom_rgba": model.geom_rgba.copy(),
+            "geom_size": model.geom_size.copy(),
+            "geom_rbound": model.geom_rbound.copy(),
+            "body_mass": model.body_mass.copy(),
+            "body_inertia": model.body_inertia.copy(),
+            "cam_pos": model.cam_pos.copy(),
+            "cam_quat": model.cam_quat.copy(),
+            "light_pos": model.light_pos.copy(),
+            "light_diffuse": model.light_diffuse.copy(),
+        }
+
+    def randomize(self):
+        """
+        Samples new parameters around the nominal values of the bound model.
+        """
+        if self._model is None:
+            raise ValueError("DomainRandomizer must be bound to a simulation first.")
+        model = self._model
+        nominal = self._nominal
+        rs = self.random_state
+
+        for body_id, geom_ids, resizable_ids, ranges in self._object_targets:
+            if "friction" in ranges:
+                low, high = ranges["friction"]
+                model.geom_friction[geom_ids, 0] = nominal["geom_friction"][
+                    geom_ids, 0
+                ] * rs.uniform(low, high)
+            if "mass" in ranges:
+                low, high = ranges["mass"]
+                scale = rs.uniform(low, high)
+                model.body_mass[body_id] = nominal["body_mass"][body_id] * scale
+                model.body_inertia[body_id] = nominal["body_inertia"][body_id] * scale
+            if "rgba" in ranges:
+                low, high = ranges["rgba"]
+                model.geom_rgba[geom_ids, :3] = rs.uniform(low, high, size=3)
+            if "size" in ranges and len(resizable_ids) > 0:
+                low, high = ranges["size"]
+                scale = rs.uniform(low, high)
+                model.geom_size[resizable_ids] = nominal["geom_size"][resizable_ids] * scale
+                model.geom_rbound[resizable_ids] = (
+                    nominal["geom_rbound"][resizable_ids] * scale
+                )
+
+        ranges = self._arena_ranges
+        cam_ids = self._camera_ids
+        if "camera_pos" in ranges and len(cam_ids) > 0:
+            delta = ranges["camera_pos"]
+            model.cam_pos[cam_ids] = nominal["cam_pos"][cam_ids] + rs.uniform(
+                -delta, delta, size=(len(cam_ids), 3)
+            )
+        if "camera_rot" in ranges and len(cam_ids) > 0:
+            max_angle = ranges["camera_rot"]
+            for cam_id in cam_ids:
+                model.cam_quat[cam_id] = self._perturb_quat(
+                    nominal["cam_quat"][cam_id], max_angle
+                )
+        nlight = model.nlight
+        if "light_pos" in ranges and nlight > 0:
+            delta = ranges["light_pos"]
+            model.light_pos[:] = nominal["light_pos"] + rs.uniform(
+                -delta, delta, size=(nlight, 3)
+            )
+        if "light_diffuse" in ranges and nlight > 0:
+            low, high = ranges["light_diffuse"]
+            model.light_diffuse[:] = rs.uniform(low, high, size=(nlight, 1))
+
+    def restore(self):
+        """
+        Resets every randomized field of the bound model to its nominal value.
+        """
+        if self._model is None:
+            return
+        for field, value in self._nominal.items():
+            getattr(self._model, field)[:] = value
+
+    def _perturb_quat(self, quat, max_angle):
+        """
+        Rotates a (w, x, y, z) quaternion about a random axis by at most @max_angle.
+        """
+        axis = self.random_state.normal(size=3)
+        axis /= np.linalg.norm(axis)
+        angle = self.random_state.uniform(-max_angle, max_angle)
+        delta = np.concatenate([axis * np.sin(angle / 2.), [np.cos(angle / 2.)]])
+        perturbed = T.quat_multiply(T.convert_quat(np.asarray(quat), to="xyzw"), delta)
+        return T.convert_quat(perturbed, to="wxyz")
@@ -0,0 +1,309 @@
+"""
+Parallel evaluation of trained policies on the bin environments.
+
+Episodes are spread over a pool of worker processes, one environment each.
+The controller steps all workers in lockstep and batches the observations of
+every worker into a single policy call, so the model is loaded once and
+inference runs on batches of @num_workers observations instead of one.
+
+Episode i is always reset with seed @seed + i, whichever worker runs it, so
+results do not depend on the number of workers. Only scalar entries of the
+step infos are sent back to the controller; rendered frames and other arrays
+stay in the workers.
+"""
+
+import time
+import random
+import functools
+import multiprocessing
+
+import numpy as np
+
+
+def make_gym_env(env_id, env_kwargs=None):
+    """
+    Builds a registered gym environment. Picklable through functools.partial,
+    see @evaluate.
+    """
+    import gym
+
+    if ":" in env_id:
+        import importlib
+
+        module_name, env_id = env_id.split(":", 1)
+        importlib.import_module(module_name)
+    return gym.make(env_id, **(env_kwargs or {}))
+
+
+def seed_everything(env, seed):
+    """
+    Seeds the global generators the environments draw from, and the
+    environment itself if it supports it.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    if hasattr(env, "seed"):
+        try:
+            env.seed(seed)
+        except NotImplementedError:
+            pass
+
+
+def _scalar_info(info):
+    scalars = {}
+    for key, value in info.items():
+        if isinstance(value, (bool, int, float, np.bool_, np.integer, np.floating)):
+            scalars[key] = value.item() if isinstance(value, np.generic) else value
+        elif key == "episode_summary" and isinstance(value, dict):
+            scalars[key] = _scalar_info(value)
+    return scalars
+
+
+def _worker(remote, parent_remote, env_fn):
+    parent_remote.close()
+    env = env_fn()
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == "reset":
+                seed_everything(env, data)
+                remote.send(env.reset())
+            elif cmd == "step":
+                start = time.perf_counter()
+                obs, reward, done, info = env.step(data)
+                step_time = time.perf_counter() - start
+                remote.send((obs, float(np.sum(reward)), bool(done), _scalar_info(info), step_time))
+            elif cmd == "close":
+                break
+            else:
+                raise NotImplementedError(cmd)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        env.close()
+        remote.close()
+
+
+def default_success(info, total_reward):
+    """
+    Success of an episode from its final info: 'succ' for the squeezing
+    environments, all taken objects placed for bin packing, a positive return
+    otherwise.
+    """
+    if "succ" in info:
+        return bool(info["succ"])
+    summary = info.get("episode_summary", {})
+    if "success_objs" in summary and "finished_objs" in summary:
+        return summary["success_objs"] == summary["finished_objs"]
+    return total_reward > 0
+
+
+class EvaluationPool:
+    """
+    Worker processes each owning one environment.
+    """
+
+    def __init__(self, env_fn, num_workers, start_method=None):
+        """
+        Args:
+            env_fn (function): picklable function returning a new environment.
+            num_workers (int): number of worker processes.
+            start_method (str): multiprocessing start method, e.g. "forkserver"
+                if the controller already holds a GPU context.
+        """
+        ctx = multiprocessing.get_context(start_method)
+        self.num_workers = num_workers
+        self.remotes, work_remotes = zip(*[ctx.Pipe() for _ in range(num_workers)])
+        self.processes = []
+        for remote, work_remote in zip(self.remotes, work_remotes):
+            process = ctx.Process(target=_worker, args=(work_remote, remote, env_fn), daemon=True)
+            process.start()
+            work_remote.close()
+            self.processes.append(process)
+
+    def close(self):
+        for remote in self.remotes:
+            try:
+                remote.send(("close", None))
+            except (OSError, EOFError):
+                # broken, or already closed by @terminate
+                pass
+        for process in self.processes:
+            process.join()
+        for remote in self.remotes:
+            remote.close()
+
+    def terminate(self):
+        """
+        Kills the workers without waiting for pending replies, e.g. after a
+        failed evaluation left the pipes in an unknown state.
+        """
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join()
+        for remote in self.remotes:
+            remote.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def evaluate(
+    predict_fn,
+    env_fn,
+    n_episodes,
+    num_workers=None,
+    seed=0,
+    max_steps=None,
+    success_fn=default_success,
+    start_method=None,
+    pool=None,
+):
+    """
+    Evaluates a policy on @n_episodes episodes spread over @num_workers
+    processes.
+
+    Args:
+        predict_fn (function): maps a (num_workers, ...) batch of observations
+            to a batch of actions. Rows of idle workers hold their last
+            observation and their actions are discarded.
+        env_fn (function): picklable function returning a new environment,
+            e.g. functools.partial(make_gym_env, "BinPack-v0", env_kwargs).
+        n_episodes (int): number of evaluated episodes.
+        num_workers (int): number of worker processes, defaults to the number
+            of cores.
+        seed (int): seed of the first episode, episode i uses @seed + i.
+        max_steps (int): steps after which an episode is cut, unlimited if None.
+        success_fn (function): maps the final info and the return of an episode
+            to its success.
+        start_method (str): multiprocessing start method.
+        pool (EvaluationPool): workers to reuse, e.g. across checkpoints, in
+            which case @env_fn, @num_workers and @start_method are ignored.
+
+    Returns:
+        dict: report, see @summarize.
+    """
+    if pool is not None:
+        return _run_episodes(pool, predict_fn, n_episodes, seed, max_steps, success_fn)
+
+    num_workers = min(num_workers or multiprocessing.cpu_count(), n_episodes)
+    with EvaluationPool(env_fn, num_workers, start_method=start_method) as pool:
+        return _run_episodes(pool, predict_fn, n_episodes, seed, max_steps, success_fn)
+
+
+def _run_episodes(pool, predict_fn, n_episodes, seed, max_steps, success_fn):
+    num_workers = min(pool.num_workers, n_episodes)
+    episodes = []
+    inference_times = []
+    step_times = []
+
+    start = time.perf_counter()
+    next_episode = 0
+    current = [None] * num_workers
+    obs_batch = None
+
+    def start_episode(worker):
+        nonlocal next_episode
+        if next_episode >= n_episodes:
+            current[worker] = None
+            return
+        episode_id = next_episode
+        next_episode += 1
+        pool.remotes[worker].send(("reset", seed + episode_id))
+        current[worker] = {"episode": episode_id, "seed": seed + episode_id, "reward": 0., "length": 0}
+
+    for worker in range(num_workers):
+        start_episode(worker)
+    for worker in range(num_workers):
+        obs = np.asarray(pool.remotes[worker].recv())
+        if obs_batch is None:
+            obs_batch = np.zeros((num_workers,) + obs.shape, dtype=obs.dtype)
+        obs_batch[worker] = obs
+
+    while any(episode is not None for episode in current):
+        time1 = time.perf_counter()
+        actions = predict_fn(obs_batch)
+        inference_times.append(time.perf_counter() - time1)
+
+        active = [worker for worker in range(num_workers) if current[worker] is not None]
+        for worker in active:
+            pool.remotes[worker].send(("step", actions[worker]))
+
+        finished = []
+        for worker in active:
+            obs, reward, done, info, step_time = pool.remotes[worker].recv()
+            obs_batch[worker] = obs
+            step_times.append(step_time)
+            episode = current[worker]
+            episode["reward"] += reward
+            episode["length"] += 1
+            if done or (max_steps is not None and episode["length"] >= max_steps):
+                episode["success"] = bool(success_fn(info, episode["reward"]))
+                summary = info.get("episode_summary", {})
+                episode["success_objs"] = summary.get("success_objs", info.get("success_obj"))
+                episodes.append(episode)
+                finished.append(worker)
+
+        for worker in finished:
+            start_episode(worker)
+        for worker in finished:
+            if current[worker] is not None:
+                obs_batch[worker] = pool.remotes[worker].recv()
+
+    wall_time = time.perf_counter() - start
+    episodes.sort(key=lambda episode: episode["episode"])
+    return summarize(episodes, step_times, inference_times, wall_time, num_workers)
+
+
+def _timing(samples):
+    if len(samples) == 0:
+        return {}
+    samples = np.asarray(samples) * 1e3
+    return {
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "count": int(len(samples)),
+    }
+
+
+def summarize(episodes, step_times, inference_times, wall_time, num_workers):
+    """
+    Aggregates per-episode records into a report with the success rate, the
+    distribution of successfully placed objects and the step and inference
+    timings.
+    """
+    rewards = np.array([episode["reward"] for episode in episodes])
+    lengths = np.array([episode["length"] for episode in episodes])
+    successes = np.array([episode["success"] for episode in episodes])
+    success_objs = [episode["success_objs"] for episode in episodes if episode["success_objs"] is not None]
+
+    report = {
+        "n_episodes": len(episodes),
+        "num_workers": num_workers,
+        "success_rate": float(successes.mean()) if len(episodes) else 0.,
+        "reward_mean": float(rewards.mean()) if len(episodes) else 0.,
+        "reward_std": float(rewards.std()) if len(episodes) else 0.,
+        "length_mean": float(lengths.mean()) if len(episodes) else 0.,
+        "env_step": _timing(step_times),
+        "inference": _timing(inference_times),
+        "wall_time_s": wall_time,
+        "episodes_per_s": len(episodes) / wall_time if wall_time > 0 else 0.,
+        "episodes": episodes,
+    }
+    if len(success_objs):
+        counts = np.bincount(np.asarray(success_objs, dtype=np.int64))
+        report["success_objs_mean"] = float(np.mean(success_objs))
+        report["success_objs_hist"] = {int(k): int(v) for k, v in enumerate(counts) if v}
+    return report
+
+
+def gym_env_fn(env_id, env_kwargs=None):
+    """
+    Returns a picklable function building @env_id with @env_kwargs.
+    """
+    return functools.partial(make_gym_env, env_id, env_kwargs)
@@ -0,0 +1,364 @@
+"""
+Projection of rendered depth buffers into point clouds and top-down heightmaps.
+
+Camera intrinsics and extrinsics are computed once per simulation from
+@sim.model.cam_fovy and the camera pose, and the world-frame ray of every pixel
+is cached. Converting a depth buffer then only costs a few vectorized NumPy
+operations on preallocated buffers, cheap enough to run at every step.
+
+    projector = HeightmapProjector(
+        CameraGeometry(sim, "birdview", width=128, height=128),
+        bounds=(x_low, x_high, y_low, y_high),
+        base_height=bin_pos[2],
+        resolution=0.002,
+    )
+    _, depth = sim.render(width=128, height=128, camera_name="birdview", depth=True)
+    heightmap = projector.heightmap(depth)
+
+RaycastHeightmap builds the same kind of heightmap of the objects without any
+renderer by casting vertical rays with mj_ray, for headless CPU-only training.
+"""
+
+import numpy as np
+
+# default cell sizes in meters, coarser for raycasting where each ray is a
+# Python call
+DEFAULT_CAMERA_RESOLUTION = 0.002
+DEFAULT_RAYCAST_RESOLUTION = 0.005
+
+
+class CameraGeometry:
+    """
+    Cached intrinsics, extrinsics and per-pixel rays of a fixed camera.
+    """
+
+    def __init__(self, sim, camera_name, width, height):
+        """
+        Args:
+            sim (MjSim): simulation holding the camera. Its data must be
+                up to date (sim.forward() has been called).
+            camera_name (str): name of the camera.
+            width (int): width of the rendered buffers.
+            height (int): height of the rendered buffers.
+        """
+        model = sim.model
+        self.camera_name = camera_name
+        self.width = width
+        self.height = height
+
+        cam_id = model.camera_name2id(camera_name)
+        fovy = model.cam_fovy[cam_id]
+        self.focal = 0.5 * height / np.tan(fovy * np.pi / 360.)
+        self.intrinsics = np.array(
+            [
+                [self.focal, 0., (width - 1) / 2.],
+                [0., self.focal, (height - 1) / 2.],
+                [0., 0., 1.],
+            ]
+        )
+
+        # camera to world transform; MuJoCo cameras look along -z with y up
+        self.position = np.array(sim.data.cam_xpos[cam_id])
+        self.rotation = np.array(sim.data.cam_xmat[cam_id]).reshape(3, 3)
+
+        # clip planes used to linearize the depth buffer
+        extent = model.stat.extent
+        self.znear = model.vis.map.znear * extent
+        self.zfar = model.vis.map.zfar * extent
+
+        # rendered buffers are stored bottom row first, so row r of the raw
+        # buffer is image row (height - 1 - r)
+        u = np.arange(width)
+        v = (height - 1) - np.arange(height)
+        uu, vv = np.meshgrid(u, v)
+        cam_dirs = np.stack(
+            [
+                (uu - self.intrinsics[0, 2]) / self.focal,
+                -(vv - self.intrinsics[1, 2]) / self.focal,
+                -np.ones_like(uu, dtype=np.float64),
+            ],
+            axis=-1,
+        ).reshape(-1, 3)
+        # world-frame direction of every pixel, scaled so that a depth of 1
+        # along the optical axis lands on the ray
+        self.rays = cam_dirs.dot(self.rotation.T)
+
+    def linearize(self, depth, out=None):
+        """
+        Converts a raw (non-linear) depth buffer into metric distances along
+        the optical axis.
+        """
+        ratio = 1. - self.znear / self.zfar
+        out = np.multiply(depth, ratio, out=out)
+        np.subtract(1., out, out=out)
+        np.divide(self.znear, out, out=out)
+        return out
+
+
+class HeightmapProjector:
+    """
+    Unprojects depth buffers of one camera into world-frame point clouds and
+    bin-cropped heightmaps.
+    """
+
+    def __init__(self, geometry, bounds, base_height, resolution=DEFAULT_CAMERA_RESOLUTION, max_height=None):
+        """
+        Args:
+            geometry (CameraGeometry): camera the depth buffers come from.
+            bounds (tuple): (x_low, x_high, y_low, y_high) world-frame extent of
+                the heightmap, typically the inside of a bin.
+            base_height (float): world height that maps to zero in the heightmap.
+            resolution (float): side length of a heightmap cell, in meters.
+            max_height (float): heights above this value are clipped, if set.
+        """
+        self.geometry = geometry
+        self.bounds = np.asarray(bounds, dtype=np.float64)
+        self.base_height = base_height
+        self.resolution = resolution
+        self.max_height = max_height
+
+        x_low, x_high, y_low, y_high = self.bounds
+        self.shape = (
+            int(np.ceil((y_high - y_low) / resolution)),
+            int(np.ceil((x_high - x_low) / resolution)),
+        )
+
+        # preallocated work buffers
+        n = geometry.width * geometry.height
+        self._depth = np.empty(n)
+        self._points = np.empty((n, 3))
+        self._cells = np.empty((n, 2), dtype=np.int64)
+        self._heightmap = np.zeros(self.shape, dtype=np.float32)
+
+    def points(self, depth):
+        """
+        Returns the world-frame points of a raw depth buffer as a (H * W, 3)
+        array. The array is reused by the next call.
+        """
+        self.geometry.linearize(depth.reshape(-1), out=self._depth)
+        np.multiply(self.geometry.rays, self._depth[:, None], out=self._points)
+        self._points += self.geometry.position
+        return self._points
+
+    def point_cloud(self, depth):
+        """
+        Returns the points of a raw depth buffer that fall within @self.bounds.
+        """
+        points = self.points(depth)
+        return points[self._in_bounds(points)]
+
+    def heightmap(self, depth, out=None):
+        """
+        Projects a raw depth buffer into a top-down heightmap whose rows follow
+        +y and columns follow +x. Cells without any point are zero.
+
+        Args:
+            depth (np.array): raw depth buffer returned by sim.render.
+            out (np.array): optional float32 array of shape @self.shape to write
+                into. Otherwise an internal buffer reused by the next call is returned.
+        """
+        points = self.points(depth)
+        heightmap = self._heightmap if out is None else out
+        heightmap.fill(0.)
+
+        cells = self._cells
+        x_low, _, y_low, _ = self.bounds
+        np.floor_divide(points[:, 0] - x_low, self.resolution, out=cells[:, 1], casting="unsafe")
+        np.floor_divide(points[:, 1] - y_low, self.resolution, out=cells[:, 0], casting="unsafe")
+        valid = (
+            (cells[:, 0] >= 0)
+            & (cells[:, 0] < self.shape[0])
+            & (cells[:, 1] >= 0)
+            & (cells[:, 1] < self.shape[1])
+        )
+        heights = points[valid, 2] - self.base_height
+        if self.max_height is not None:
+            np.minimum(heights, self.max_height, out=heights)
+        np.maximum.at(heightmap, (cells[valid, 0], cells[valid, 1]), heights)
+        return heightmap
+
+    def _in_bounds(self, points):
+        x_low, x_high, y_low, y_high = self.bounds
+        return (
+            (points[:, 0] >= x_low)
+            & (points[:, 0] < x_high)
+            & (points[:, 1] >= y_low)
+            & (points[:, 1] < y_high)
+        )
+
+
+def bin_bounds(bin_pos, bin_size):
+    """
+    Returns the (x_low, x_high, y_low, y_high) footprint of a bin centered at
+    @bin_pos with size @bin_size.
+    """
+    return (
+        bin_pos[0] - bin_size[0] / 2.,
+        bin_pos[0] + bin_size[0] / 2.,
+        bin_pos[1] - bin_size[1] / 2.,
+        bin_pos[1] + bin_size[1] / 2.,
+    )
+
+
+def make_bin_projector(sim, camera_name, width, height, bin_pos, bin_size, resolution=None):
+    """
+    Returns a HeightmapProjector cropped to a bin centered at @bin_pos with
+    footprint @bin_size, measuring heights from the bin origin.
+    """
+    if resolution is None:
+        resolution = DEFAULT_CAMERA_RESOLUTION
+    geometry = CameraGeometry(sim, camera_name, width, height)
+    return HeightmapProjector(
+        geometry, bin_bounds(bin_pos, bin_size), bin_pos[2], resolution=resolution
+    )
+
+
+class RaycastHeightmap:
+    """
+    Renderer-free heightmap built by casting vertical rays with MuJoCo's ray
+    intersection, so no GL context is needed.
+
+    Only the geoms of the given objects are measured: rays that hit anything
+    else (e.g. the arm above the bin) continue below the hit. mujoco_py only
+    wraps the single-ray mj_ray, so every ray is a Python call. To keep their
+    number low, rays are only cast over cells within the bounding radius of
+    an object geom, and the default grid is coarser than the camera's.
+    """
+
+    def __init__(
+        self,
+        sim,
+        bounds,
+        base_height,
+        geom_ids,
+        resolution=DEFAULT_RAYCAST_RESOLUTION,
+        ray_height=0.3,
+        geom_groups=(1,),
+    ):
+        """
+        Args:
+            sim (MjSim): simulation to cast rays in.
+            bounds (tuple): (x_low, x_high, y_low, y_high) world-frame extent of
+                the heightmap, typically the inside of a bin.
+            base_height (float): world height that maps to zero in the heightmap.
+            geom_ids (np.array): ids of the geoms to measure, typically those of
+                the objects. Cells above none of them read zero.
+            resolution (float): side length of a heightmap cell, in meters.
+            ray_height (float): rays start this high above @base_height, which
+                also bounds the measured heights.
+            geom_groups (tuple): geom groups rays can hit, e.g. only the visual
+                geoms of the objects.
+        """
+        self.sim = sim
+        self.bounds = np.asarray(bounds, dtype=np.float64)
+        self.base_height = base_height
+        self.resolution = resolution
+        self.ray_height = ray_height
+
+        x_low, x_high, y_low, y_high = self.bounds
+        self.shape = (
+            int(np.ceil((y_high - y_low) / resolution)),
+            int(np.ceil((x_high - x_low) / resolution)),
+        )
+
+        # ray origins at the cell centers, one row per cell in heightmap order
+        ys = y_low + (np.arange(self.shape[0]) + 0.5) * resolution
+        xs = x_low + (np.arange(self.shape[1]) + 0.5) * resolution
+        yy, xx = np.meshgrid(ys, xs, indexing="ij")
+        self._origins = np.ascontiguousarray(
+            np.stack(
+                [xx.ravel(), yy.ravel(), np.full(xx.size, base_height + ray_height)],
+                axis=-1,
+            )
+        )
+        self._direction = np.array([0., 0., -1.])
+        self._geomgroup = np.zeros(6, dtype=np.uint8)
+        self._geomgroup[list(geom_groups)] = 1
+
+        model = sim.model
+        geom_ids = np.asarray(geom_ids, dtype=np.int64)
+        geom_ids = geom_ids[np.isin(model.geom_group[geom_ids], geom_groups)]
+        self._geom_ids = geom_ids
+        self._geom_mask = np.zeros(model.ngeom, dtype=bool)
+        self._geom_mask[geom_ids] = True
+        self._radii_sq = np.square(model.geom_rbound[geom_ids])
+
+        self._geomid = np.zeros(1, dtype=np.int32)
+        self._origin = np.empty(3)
+        self._distances = np.empty(len(self._origins))
+        self._heightmap = np.zeros(self.shape, dtype=np.float32)
+
+    def _cast(self, origin):
+        """
+        Returns the distance from @origin to the first measured geom below it,
+        or -1 if there is none.
+        """
+        from mujoco_py import functions
+
+        model, data = self.sim.model, self.sim.data
+        point = self._origin
+        point[:] = origin
+        travelled = 0.
+        while True:
+            distance = functions.mj_ray(
+                model, data, point, self._direction, self._geomgroup, 0, -1, self._geomid
+            )
+            if distance < 0:
+                return -1.
+            travelled += distance
+            if self._geom_mask[self._geomid[0]]:
+                return travelled
+            # hit something else, e.g. the gripper: continue below it
+            travelled += 1e-6
+            point[2] = origin[2] - travelled
+
+    def heightmap(self, out=None):
+        """
+        Casts the rays against the current simulation state and returns the
+        heightmap, with rows following +y and columns following +x.
+
+        Args:
+            out (np.array): optional float32 array of shape @self.shape to write
+                into. Otherwise an internal buffer reused by the next call is returned.
+        """
+        distances = self._distances
+        distances.fill(-1.)
+
+        # only cells within the bounding radius of a measured geom can be hit
+        centers = self.sim.data.geom_xpos[self._geom_ids, :2]
+        offsets = self._origins[:, None, :2] - centers[None]
+        reachable = (np.square(offsets).sum(axis=-1) <= self._radii_sq).any(axis=1)
+        for i in np.flatnonzero(reachable):
+            distances[i] = self._cast(self._origins[i])
+
+        heightmap = self._heightmap if out is None else out
+        heights = heightmap.reshape(-1)
+        np.subtract(self.ray_height, distances, out=heights, casting="unsafe")
+        heights[distances < 0] = 0.
+        np.maximum(heights, 0., out=heights)
+        return heightmap
+
+
+def body_geom_ids(sim, body_ids):
+    """
+    Returns the ids of the geoms attached to the bodies @body_ids.
+    """
+    geom_body = np.asarray(sim.model.geom_bodyid)
+    return np.flatnonzero(np.isin(geom_body, body_ids))
+
+
+def make_bin_raycaster(sim, bin_pos, bin_size, body_ids, resolution=None):
+    """
+    Returns a RaycastHeightmap covering a bin centered at @bin_pos with
+    footprint @bin_size, measuring the heights of the bodies @body_ids from the
+    bin origin.
+    """
+    if resolution is None:
+        resolution = DEFAULT_RAYCAST_RESOLUTION
+    return RaycastHeightmap(
+        sim,
+        bin_bounds(bin_pos, bin_size),
+        bin_pos[2],
+        body_geom_ids(sim, body_ids),
+        resolution=resolution,
+    )
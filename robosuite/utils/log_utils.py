@@ -0,0 +1,163 @@
+"""
+Logging used across the environments and wrappers instead of print().
+
+Every module gets its own logger under the "robosuite" namespace through
+@get_logger(__name__). Like any library, robosuite only installs a
+NullHandler: records go to the handlers the application configured. Scripts
+opt in to robosuite's own output with @configure_logging, as does setting the
+ROBOSUITE_LOG_LEVEL environment variable. The level of the namespace is then
+INFO by default: setup messages such as the observation keys are shown, while
+per-step messages are logged at DEBUG and dropped before any formatting
+unless debug output is requested.
+
+Repeated messages are rate limited: a message is emitted at most once per
+interval, and the number of suppressed occurrences is reported with the next
+one. DEBUG records are identified by their logger and format string, not
+their arguments, so per-step messages of many parallel workers are aggregated;
+records of higher levels are identified by their formatted message, so
+distinct setup messages are never dropped. Only the most recently seen
+messages are tracked, so the filter does not grow with the number of
+distinct messages.
+"""
+
+import os
+import time
+import logging
+
+ROOT_LOGGER_NAME = "robosuite"
+LOG_LEVEL_ENV = "ROBOSUITE_LOG_LEVEL"
+LOG_INTERVAL_ENV = "ROBOSUITE_LOG_INTERVAL"
+
+DEFAULT_FORMAT = "[%(asctime)s %(process)d %(name)s %(levelname)s] %(message)s"
+
+_configured = False
+
+logging.getLogger(ROOT_LOGGER_NAME).addHandler(logging.NullHandler())
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets a given message through at most once every @interval seconds and
+    counts the occurrences dropped in between.
+    """
+
+    def __init__(self, interval=1.0, max_keys=1024):
+        """
+        Args:
+            interval (float): minimum number of seconds between two records
+                with the same logger, level and message, see @_key.
+                Non-positive values disable rate limiting.
+            max_keys (int): number of distinct messages tracked. The least
+                recently emitted ones are forgotten beyond that, together
+                with their suppressed counts.
+        """
+        super().__init__()
+        self.interval = interval
+        self.max_keys = max_keys
+        # ordered from the least to the most recently emitted message
+        self._last = {}
+        self._suppressed = {}
+
+    @staticmethod
+    def _key(record):
+        if record.levelno <= logging.DEBUG:
+            return (record.name, record.levelno, record.msg)
+        return (record.name, record.levelno, record.getMessage())
+
+    def filter(self, record):
+        if self.interval <= 0:
+            return True
+
+        key = self._key(record)
+        now = time.monotonic()
+        last = self._last.get(key)
+        if last is not None and now - last < self.interval:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return False
+
+        self._last.pop(key, None)
+        self._last[key] = now
+        while len(self._last) > self.max_keys:
+            oldest = next(iter(self._last))
+            del self._last[oldest]
+            self._suppressed.pop(oldest, None)
+        suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            # formatted lazily by the handler, with the original arguments
+            record.msg = "{} (suppressed {} similar messages)".format(
+                record.msg, suppressed
+            )
+        return True
+
+
+def _level_from_env(default=logging.INFO):
+    level = os.environ.get(LOG_LEVEL_ENV)
+    if level is None:
+        return default
+    if level.isdigit():
+        return int(level)
+    return logging.getLevelName(level.upper())
+
+
+def configure_logging(level=None, interval=None, fmt=DEFAULT_FORMAT):
+    """
+    Sends the records of the "robosuite" logger namespace to stderr instead
+    of the application's handlers. Called by the scripts, or on the first
+    @get_logger if $ROBOSUITE_LOG_LEVEL is set. Can be called again to change
+    the level or the interval.
+
+    Args:
+        level (int or str): logging level. Defaults to $ROBOSUITE_LOG_LEVEL,
+            or INFO.
+        interval (float): rate limiting interval in seconds. Defaults to
+            $ROBOSUITE_LOG_INTERVAL, or 1 second.
+        fmt (str): format of the records.
+
+    Returns:
+        logging.Logger: the root logger of the namespace.
+    """
+    global _configured
+
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    if level is None:
+        level = _level_from_env()
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+    root.setLevel(level)
+
+    if interval is None:
+        interval = float(os.environ.get(LOG_INTERVAL_ENV, 1.0))
+
+    handler = None
+    for existing in root.handlers:
+        if getattr(existing, "_robosuite_handler", False):
+            handler = existing
+    if handler is None:
+        handler = logging.StreamHandler()
+        handler._robosuite_handler = True
+        root.addHandler(handler)
+        # records are handled here only, not by the application's root logger
+        root.propagate = False
+    handler.setFormatter(logging.Formatter(fmt))
+    for existing in list(handler.filters):
+        if isinstance(existing, RateLimitFilter):
+            handler.removeFilter(existing)
+    handler.addFilter(RateLimitFilter(interval))
+
+    _configured = True
+    return root
+
+
+def get_logger(name):
+    """
+    Returns the logger of module @name, nested under the "robosuite"
+    namespace.
+
+    Args:
+        name (str): usually __name__ of the calling module.
+    """
+    if not _configured and LOG_LEVEL_ENV in os.environ:
+        configure_logging()
+    if name != ROOT_LOGGER_NAME and not name.startswith(ROOT_LOGGER_NAME + "."):
+        name = "{}.{}".format(ROOT_LOGGER_NAME, name)
+    return logging.getLogger(name)
@@ -0,0 +1,200 @@
+"""
+Content-addressed on-disk cache of compiled MuJoCo models.
+
+Compiling an MJCF xml (in particular processing the meshes of the bread,
+cereal and bowl assets) dominates environment start-up. Every process that
+compiles a model stores its binary MJB next to the other cached models, keyed
+by a hash of the xml string and of the asset files it references, and every
+later process (e.g. the other workers of a vectorized environment) loads the
+binary instead of compiling.
+
+Writes go to a private temporary file that is atomically renamed into place,
+so concurrent workers never observe partially written models. Whenever a new
+model is stored, the least recently used models are evicted until the cache
+fits in its size budget.
+
+The cache can be configured with environment variables:
+
+    ROBOSUITE_MJB_CACHE=0          disables the cache
+    ROBOSUITE_MJB_CACHE_DIR=path   location of the cache (~/.cache/robosuite/mjb)
+    ROBOSUITE_MJB_CACHE_MB=size    size budget in megabytes (2048)
+"""
+
+import os
+import re
+import uuid
+import hashlib
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "robosuite", "mjb")
+DEFAULT_MAX_MEGABYTES = 2048
+
+_FILE_ATTRIB = re.compile(r'\sfile="([^"]*)"')
+
+
+class ModelCache:
+    """
+    Cache of compiled models stored as MJB files in a directory.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_MEGABYTES << 20):
+        """
+        Args:
+            cache_dir (str): directory that holds the cached models.
+            max_bytes (int): size budget of the cache directory.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def key(self, xml_string):
+        """
+        Returns the content hash of @xml_string and the asset files it references.
+        Assets are identified by their path, size and modification time, which
+        avoids hashing every mesh on every load.
+        """
+        digest = hashlib.sha1(xml_string.encode("utf8"))
+        for path in sorted(set(_FILE_ATTRIB.findall(xml_string))):
+            try:
+                stat = os.stat(path)
+                digest.update(
+                    "{}:{}:{}".format(path, stat.st_size, stat.st_mtime_ns).encode("utf8")
+                )
+            except OSError:
+                digest.update("{}:missing".format(path).encode("utf8"))
+        return digest.hexdigest()
+
+    def path(self, key):
+        """
+        Returns the location of the MJB file for @key.
+        """
+        return os.path.join(self.cache_dir, key + ".mjb")
+
+    def load_model(self, xml_string):
+        """
+        Returns a PyMjModel for @xml_string, compiling it only on a cache miss.
+        """
+        from mujoco_py import load_model_from_xml, load_model_from_mjb
+
+        path = self.path(self.key(xml_string))
+        try:
+            with open(path, "rb") as f:
+                mjb = f.read()
+        except OSError:
+            mjb = None
+
+        if mjb is not None:
+            try:
+                model = load_model_from_mjb(mjb)
+            except Exception:
+                # a corrupted entry is simply rebuilt below
+                model = None
+            else:
+                self._touch(path)
+                return model
+
+        model = load_model_from_xml(xml_string)
+        self.store(path, model.get_mjb())
+        return model
+
+    def store(self, path, mjb):
+        """
+        Atomically writes @mjb to @path and evicts old entries if needed.
+        Failures to write (e.g. a read-only file system) are ignored, the
+        model is then just compiled again next time.
+        """
+        tmp_path = "{}.{}.{}.tmp".format(path, os.getpid(), uuid.uuid4().hex)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(mjb)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    def evict(self, max_bytes=None):
+        """
+        Removes the least recently used models until the cache fits in
+        @max_bytes (defaults to @self.max_bytes). Safe to run concurrently
+        from several processes.
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(".mjb"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        """
+        Removes every cached model.
+        """
+        self.evict(max_bytes=0)
+
+    @staticmethod
+    def _touch(path):
+        # the modification time doubles as the last access time for eviction
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+
+_default_cache = None
+
+
+def get_model_cache():
+    """
+    Returns the process-wide model cache configured from the environment,
+    or None if caching is disabled.
+    """
+    global _default_cache
+    if os.environ.get("ROBOSUITE_MJB_CACHE", "1") == "0":
+        return None
+    if _default_cache is None:
+        _default_cache = ModelCache(
+            cache_dir=os.environ.get("ROBOSUITE_MJB_CACHE_DIR", DEFAULT_CACHE_DIR),
+            max_bytes=int(
+                os.environ.get("ROBOSUITE_MJB_CACHE_MB", DEFAULT_MAX_MEGABYTES)
+            )
+            << 20,
+        )
+    return _default_cache
+
+
+def load_model_from_xml_cached(xml_string):
+    """
+    Drop-in replacement of mujoco_py.load_model_from_xml backed by the
+    process-wide model cache.
+    """
+    cache = get_model_cache()
+    if cache is None:
+        from mujoco_py import load_model_from_xml
+
+        return load_model_from_xml(xml_string)
+    return cache.load_model(xml_string)
@@ -0,0 +1,178 @@
+"""
+Rollouts sharded over MPI ranks.
+
+Every rank steps its own shared-memory vector environment and fills a local
+@RolloutStorage. Rollouts are then gathered on the root rank with buffer-based
+collectives into preallocated (size, nenvs, nsteps, ...) arrays, and episode
+statistics are summed over all ranks, so data collection scales across nodes
+by adding ranks:
+
+    $ mpirun -n 4 python scripts/mpi_rollouts.py --env BinSqueeze
+
+Environment j of rank r is seeded with @seed + 10000 * r + j, the convention
+of make_vec_env, so every run with the same number of ranks and environments
+sees the same episodes. Without mpi4py the layer runs as a single rank.
+"""
+
+import functools
+
+import numpy as np
+
+from robosuite.utils.evaluation import seed_everything
+from robosuite.utils.rollout_storage import RolloutStorage, shmem_step_into
+
+try:
+    from mpi4py import MPI
+except ImportError:
+    MPI = None
+
+
+def rank_seed(seed, rank, subrank):
+    """
+    Seed of environment @subrank of MPI rank @rank.
+    """
+    return seed + 10000 * rank + subrank
+
+
+def _make_seeded_env(env_fn, seed):
+    # objects are placed with the global generators when the model is built
+    seed_everything(None, seed)
+    env = env_fn()
+    seed_everything(env, seed)
+    return env
+
+
+class MPIRollouts:
+    """
+    Per-rank vector environment and rollout storage, with collectives to
+    assemble the rollouts of all ranks.
+    """
+
+    FIELDS = ("obs", "actions", "rewards", "values", "neglogpacs", "dones")
+
+    def __init__(self, env_fn, num_env, nsteps, seed=0, comm=None, root=0):
+        """
+        Args:
+            env_fn (function): picklable function returning a new environment.
+            num_env (int): number of environments of this rank.
+            nsteps (int): steps per rollout.
+            seed (int): base seed, see @rank_seed.
+            comm (MPI.Comm): communicator, MPI.COMM_WORLD by default.
+            root (int): rank the rollouts are gathered on.
+        """
+        if comm is None and MPI is not None:
+            comm = MPI.COMM_WORLD
+        self.comm = comm
+        self.rank = comm.Get_rank() if comm is not None else 0
+        self.size = comm.Get_size() if comm is not None else 1
+        self.root = root
+        self.num_env = num_env
+        self.nsteps = nsteps
+
+        env_fns = [
+            functools.partial(_make_seeded_env, env_fn, rank_seed(seed, self.rank, i))
+            for i in range(num_env)
+        ]
+        if num_env > 1:
+            from robosuite.utils.shmem_vec_env import ShmemVecEnv
+
+            self.venv = ShmemVecEnv(env_fns)
+        else:
+            from baselines.common.vec_env.dummy_vec_env import DummyVecEnv
+
+            self.venv = DummyVecEnv(env_fns)
+
+        ob_space, ac_space = self.venv.observation_space, self.venv.action_space
+        self.storage = RolloutStorage(
+            nsteps, num_env, ob_space.shape, ob_dtype=ob_space.dtype,
+            ac_shape=ac_space.shape, ac_dtype=ac_space.dtype,
+        )
+        self.storage.reset(self.venv.reset())
+
+        # running and finished episode statistics of this rank
+        self._ep_rewards = np.zeros(num_env)
+        self._ep_lengths = np.zeros(num_env, dtype=np.int64)
+        # count, reward sum, length sum, successes
+        self._ep_stats = np.zeros(4)
+
+        self._gathered = None
+        if self.rank == root:
+            self._gathered = {
+                name: np.zeros((self.size,) + getattr(self.storage, name).shape, dtype=getattr(self.storage, name).dtype)
+                for name in self.FIELDS
+            }
+
+    def collect(self, policy_fn):
+        """
+        Fills the local storage with one rollout.
+
+        Args:
+            policy_fn (function): maps the (num_env, ...) observations to
+                actions, or to (actions, values, neglogpacs).
+
+        Returns:
+            RolloutStorage: the local rollout.
+        """
+        storage = self.storage
+        if storage.step == self.nsteps:
+            storage.after_update()
+        zeros = np.zeros(self.num_env, dtype=np.float32)
+        for _ in range(self.nsteps):
+            out = policy_fn(storage.current_obs)
+            if isinstance(out, tuple):
+                actions, values, neglogpacs = out
+            else:
+                actions, values, neglogpacs = out, zeros, zeros
+
+            rewards, dones, infos = shmem_step_into(self.venv, actions, storage.next_obs)
+            storage.insert(actions, values, neglogpacs, rewards, dones)
+
+            self._ep_rewards += rewards
+            self._ep_lengths += 1
+            for i in np.flatnonzero(dones):
+                self._ep_stats += (1, self._ep_rewards[i], self._ep_lengths[i], float(infos[i].get("succ", 0)))
+                self._ep_rewards[i] = 0
+                self._ep_lengths[i] = 0
+        return storage
+
+    def gather(self):
+        """
+        Gathers the rollouts of all ranks on the root rank. Collective: every
+        rank must call it.
+
+        Returns:
+            dict: (size, num_env, nsteps, ...) array of every field on the root
+                rank, None on the others.
+        """
+        if self.comm is None:
+            return {name: getattr(self.storage, name)[None] for name in self.FIELDS}
+        for name in self.FIELDS:
+            local = np.ascontiguousarray(getattr(self.storage, name))
+            recv = self._gathered[name] if self.rank == self.root else None
+            if local.dtype == np.bool_:
+                # bool has no MPI datatype, send the bytes
+                local = local.view(np.uint8)
+                recv = recv.view(np.uint8) if recv is not None else None
+            self.comm.Gather(local, recv, root=self.root)
+        return self._gathered
+
+    def episode_stats(self, reset=True):
+        """
+        Returns the statistics of the episodes finished on all ranks since the
+        last reset. Collective: every rank must call it, all get the result.
+        """
+        stats = self._ep_stats.copy()
+        if self.comm is not None:
+            self.comm.Allreduce(self._ep_stats, stats, op=MPI.SUM)
+        if reset:
+            self._ep_stats[:] = 0
+        count = max(stats[0], 1)
+        return {
+            "episodes": int(stats[0]),
+            "reward_mean": stats[1] / count,
+            "length_mean": stats[2] / count,
+            "success_rate": stats[3] / count,
+        }
+
+    def close(self):
+        self.venv.close()
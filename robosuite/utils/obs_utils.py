@@ -0,0 +1,134 @@
+"""
+Observation dtype contract of the bin environments.
+
+Images are kept as uint8 in the buffers they were rendered into, and every
+other entry is cast to float32. Concatenating them into one array, as the
+flat layout used to, silently upcasts the images to the dtype of the vectors
+(int64 for the one-hot type vector), which makes every observation up to 8x
+larger in memory and in the pipes and shared memory of the vector
+environments. With the "dict" layout every key is its own array and the
+observation space is a gym Dict of uint8 and float32 Boxes, which baselines'
+ShmemVecEnv and SubprocVecEnv transfer key by key.
+
+The "flat" layout declares the dtype it returns: a uint8 Box of [0, 255]
+when all selected keys are images, an unbounded float32 Box otherwise, so
+that observation_space.contains(obs) holds. gym cannot represent an
+unbounded uint8 Box (the infinite bounds are cast to uint8), and
+stable-baselines scales observations of bounded Boxes to [0, 1] in its CNN
+policies. Image policies therefore see scaled pixels, unlike checkpoints
+trained when the flat space was an unbounded float32 Box; such checkpoints
+expect raw pixels and have to be retrained.
+
+Only the environments implement the "dict" layout: make_env, the training
+scripts, FrameStackWrapper and MemmapReplayBuffer all expect single-array
+observations and use the flat layout.
+"""
+
+import collections
+
+import numpy as np
+
+from robosuite.utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+IMAGE_DTYPE = np.uint8
+VECTOR_DTYPE = np.float32
+
+LAYOUTS = ("flat", "dict")
+
+
+def is_image(value):
+    """
+    Whether @value follows the image contract, i.e. is a uint8 array.
+    """
+    return isinstance(value, np.ndarray) and value.dtype == IMAGE_DTYPE
+
+
+def as_contract_dtype(value):
+    """
+    Returns images unchanged and anything else as a float32 array, copying
+    only if needed.
+    """
+    if is_image(value):
+        return value
+    return np.asarray(value, dtype=VECTOR_DTYPE)
+
+
+def box_space(value):
+    """
+    Returns the gym Box of observations like @value.
+    """
+    from gym import spaces
+
+    if is_image(value):
+        return spaces.Box(low=0, high=255, shape=value.shape, dtype=IMAGE_DTYPE)
+    return spaces.Box(low=-np.inf, high=np.inf, shape=value.shape, dtype=VECTOR_DTYPE)
+
+
+class ObservationLayout:
+    """
+    Selects the observation keys of interest and arranges them as the
+    observations returned by the environment.
+    """
+
+    def __init__(self, keys, layout="flat", extra_keys=()):
+        """
+        Args:
+            keys (str or list): keys of interest, tested with `in` like the
+                environments always did.
+            layout (str): "flat" concatenates the keys into a single array,
+                which stays uint8 if all keys are images and is float32
+                otherwise. "dict" returns an OrderedDict with one array per
+                key.
+            extra_keys (tuple): keys always selected, e.g. the type vector.
+        """
+        if layout not in LAYOUTS:
+            raise ValueError("Unknown observation layout: {}".format(layout))
+        self.keys = keys
+        self.extra_keys = tuple(extra_keys)
+        self.layout = layout
+
+    def select(self, obs_dict, verbose=False):
+        selected = collections.OrderedDict()
+        for key in obs_dict:
+            if key in self.keys or key in self.extra_keys:
+                if verbose:
+                    logger.info("adding key: %s", key)
+                selected[key] = obs_dict[key]
+        return selected
+
+    def __call__(self, obs_dict, verbose=False):
+        """
+        Args:
+            obs_dict: ordered dictionary of observations
+
+        Returns:
+            np.array or OrderedDict: observation in the layout.
+        """
+        selected = self.select(obs_dict, verbose=verbose)
+        if self.layout == "dict":
+            return collections.OrderedDict(
+                (key, as_contract_dtype(value)) for key, value in selected.items()
+            )
+
+        values = [np.asarray(value) for value in selected.values()]
+        if all(is_image(value) for value in values):
+            # a single rendered image is returned as is, without a copy
+            return values[0] if len(values) == 1 else np.concatenate(values)
+        if len({value.dtype for value in values}) == 1:
+            return np.concatenate(values).astype(VECTOR_DTYPE, copy=False)
+        # mixing images and vectors: flatten everything
+        return np.concatenate([value.astype(VECTOR_DTYPE, copy=False).reshape(-1) for value in values])
+
+    def space(self, obs):
+        """
+        Returns the gym observation space of observations like @obs.
+        """
+        from gym import spaces
+
+        if self.layout == "dict":
+            return spaces.Dict(
+                collections.OrderedDict((key, box_space(value)) for key, value in obs.items())
+            )
+        return box_space(obs)
@@ -0,0 +1,231 @@
+"""
+Disk-backed replay buffer for off-policy learning on image observations.
+
+Observations are stored as uint8 in a memory mapped ring file, so that the
+buffer lives in the page cache rather than in the process memory, and every
+frame is stored once: the next observation of transition i is the frame of
+slot i + 1, which is also the observation of transition i + 1 when the
+trajectory continues. After a terminal transition, its next observation is
+replaced by the first observation of the next episode, which is harmless
+since targets are masked by (1 - done). A transition that does not continue
+the previous non-terminal one leaves an unused slot behind.
+
+The buffer follows the interface of stable-baselines' ReplayBuffer (add,
+extend, sample, can_sample, is_full, len) and can be assigned to
+model.replay_buffer of a SAC model. Batches are drawn with vectorized
+indexing and the next batch is prepared on a background thread.
+"""
+
+import os
+import queue
+import tempfile
+import threading
+
+import numpy as np
+
+
+class MemmapReplayBuffer:
+    """
+    Ring buffer of transitions whose observations live in a np.memmap file.
+    """
+
+    def __init__(
+        self,
+        size,
+        obs_shape,
+        action_shape,
+        obs_dtype=np.uint8,
+        path=None,
+        prefetch=True,
+        seed=None,
+    ):
+        """
+        Args:
+            size (int): maximum number of transitions.
+            obs_shape (tuple): shape of an observation.
+            action_shape (tuple): shape of an action.
+            obs_dtype (np.dtype): dtype observations are stored with.
+            path (str): file backing the observations. A temporary file, removed
+                on @close, is used if None.
+            prefetch (bool): if True, prepare the next batch on a background
+                thread while the current one is used.
+            seed (int): seed of the sampling generator.
+        """
+        self._maxsize = int(size) + 1
+        self._remove_file = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix=".replay")
+            os.close(fd)
+        self.path = path
+
+        self.frames = np.memmap(path, dtype=obs_dtype, mode="w+", shape=(self._maxsize,) + tuple(obs_shape))
+        self.actions = np.zeros((self._maxsize,) + tuple(action_shape), dtype=np.float32)
+        self.rewards = np.zeros(self._maxsize, dtype=np.float32)
+        self.dones = np.zeros(self._maxsize, dtype=np.float32)
+        # whether a slot holds a sampleable transition, the slot following the
+        # newest transition only holds its next observation
+        self.valid = np.zeros(self._maxsize, dtype=np.bool_)
+
+        self._next_idx = 0
+        self._num_filled = 0
+        self._num_valid = 0
+        self._last_done = True
+        self._lock = threading.Lock()
+        self._rng = np.random.RandomState(seed)
+
+        self._prefetch = prefetch
+        self._batches = None
+        self._prefetch_thread = None
+        self._prefetch_size = None
+        self._stop = threading.Event()
+
+    def __len__(self):
+        return self._num_valid
+
+    @property
+    def buffer_size(self):
+        return self._maxsize - 1
+
+    def can_sample(self, n_samples):
+        return len(self) >= n_samples
+
+    def is_full(self):
+        return len(self) == self.buffer_size
+
+    def _set_valid(self, idx, valid):
+        self._num_valid += int(valid) - int(self.valid[idx])
+        self.valid[idx] = valid
+
+    def add(self, obs_t, action, reward, obs_tp1, done):
+        """
+        Adds a transition.
+
+        Args:
+            obs_t (np.array): observation.
+            action (np.array): action taken.
+            reward (float): reward received.
+            obs_tp1 (np.array): next observation.
+            done (bool or float): whether the episode ended.
+        """
+        # single-env vectorized environments add a leading axis of size one
+        obs_t = np.reshape(obs_t, self.frames.shape[1:])
+        obs_tp1 = np.reshape(obs_tp1, self.frames.shape[1:])
+        with self._lock:
+            idx = self._next_idx
+            if not self._last_done and not np.array_equal(self.frames[idx], obs_t):
+                # keep the next observation of the previous transition
+                idx = (idx + 1) % self._maxsize
+            self._set_valid(idx, False)
+            self.frames[idx] = obs_t
+            self.actions[idx] = np.reshape(action, self.actions.shape[1:])
+            self.rewards[idx] = np.sum(reward)
+            self.dones[idx] = float(np.any(done))
+
+            next_idx = (idx + 1) % self._maxsize
+            self._set_valid(next_idx, False)
+            self.frames[next_idx] = obs_tp1
+            self._set_valid(idx, True)
+
+            self._num_filled = max(self._num_filled, next_idx + 1) if next_idx > 0 else self._maxsize
+            self._next_idx = next_idx
+            self._last_done = bool(np.any(done))
+
+    def extend(self, obs_t, action, reward, obs_tp1, done):
+        """
+        Adds a batch of transitions, in order.
+        """
+        for data in zip(obs_t, action, reward, obs_tp1, done):
+            self.add(*data)
+
+    def _draw_indexes(self, batch_size):
+        idxes = self._rng.randint(self._num_filled, size=batch_size)
+        invalid = ~self.valid[idxes]
+        while invalid.any():
+            idxes[invalid] = self._rng.randint(self._num_filled, size=int(invalid.sum()))
+            invalid = ~self.valid[idxes]
+        # sorted reads are sequential in the backing file
+        idxes.sort()
+        return idxes
+
+    def _encode_sample(self, batch_size):
+        with self._lock:
+            idxes = self._draw_indexes(batch_size)
+            next_idxes = (idxes + 1) % self._maxsize
+            return (
+                self.frames[idxes],
+                self.actions[idxes],
+                self.rewards[idxes],
+                self.frames[next_idxes],
+                self.dones[idxes],
+            )
+
+    def _prefetch_loop(self, batch_size):
+        while not self._stop.is_set():
+            batch = self._encode_sample(batch_size)
+            while not self._stop.is_set():
+                try:
+                    self._batches.put(batch, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    def _start_prefetch(self, batch_size):
+        self._stop_prefetch()
+        self._stop.clear()
+        self._batches = queue.Queue(maxsize=2)
+        self._prefetch_size = batch_size
+        self._prefetch_thread = threading.Thread(target=self._prefetch_loop, args=(batch_size,), daemon=True)
+        self._prefetch_thread.start()
+
+    def _stop_prefetch(self):
+        if self._prefetch_thread is not None:
+            self._stop.set()
+            self._prefetch_thread.join()
+            self._prefetch_thread = None
+
+    def sample(self, batch_size, env=None):
+        """
+        Samples a batch of transitions.
+
+        Args:
+            batch_size (int): number of transitions.
+            env (VecNormalize): if given, observations and rewards are
+                normalized with it, as done by stable-baselines.
+
+        Returns:
+            obs_batch, act_batch, rew_batch, next_obs_batch, done_mask
+        """
+        assert self.can_sample(batch_size), "not enough transitions to sample from"
+        if not self._prefetch:
+            batch = self._encode_sample(batch_size)
+        else:
+            if self._prefetch_size != batch_size:
+                self._start_prefetch(batch_size)
+            batch = self._batches.get()
+
+        if env is None:
+            return batch
+        obses_t, actions, rewards, obses_tp1, dones = batch
+        return (
+            env.normalize_obs(obses_t),
+            actions,
+            env.normalize_reward(rewards),
+            env.normalize_obs(obses_tp1),
+            dones,
+        )
+
+    def close(self):
+        """
+        Stops prefetching and removes the backing file if it is temporary.
+        """
+        self._stop_prefetch()
+        frames, self.frames = self.frames, None
+        del frames
+        if self._remove_file and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -0,0 +1,189 @@
+"""
+Preallocated storage for the on-policy rollouts of the PPO runners.
+
+The per-step arrays are allocated once with an env-major layout
+(nenvs, nsteps, ...) and filled in place, so that the flattened minibatch
+arrays expected by the PPO update (env-major, as produced by baselines' sf01)
+are plain reshapes of the storage and no rollout is ever copied. The
+observation following the last step is kept in a separate slot and moved to
+the first step of the next rollout.
+
+Observations of a robosuite.utils.shmem_vec_env.ShmemVecEnv can be copied
+from its shared memory buffers straight into the storage with
+@shmem_step_into.
+"""
+
+import numpy as np
+
+
+class RolloutStorage:
+    """
+    Experience of @nenvs environments over @nsteps steps.
+    """
+
+    def __init__(self, nsteps, nenvs, ob_shape, ob_dtype=np.float32, ac_shape=(), ac_dtype=np.float32):
+        """
+        Args:
+            nsteps (int): number of steps per rollout.
+            nenvs (int): number of environments stepped in parallel.
+            ob_shape (tuple): shape of a single observation.
+            ob_dtype (np.dtype): dtype of the observations, e.g. np.uint8 for images.
+            ac_shape (tuple): shape of a single action.
+            ac_dtype (np.dtype): dtype of the actions.
+        """
+        self.nsteps = nsteps
+        self.nenvs = nenvs
+        self.step = 0
+
+        self.obs = np.zeros((nenvs, nsteps) + tuple(ob_shape), dtype=ob_dtype)
+        self.actions = np.zeros((nenvs, nsteps) + tuple(ac_shape), dtype=ac_dtype)
+        self.rewards = np.zeros((nenvs, nsteps), dtype=np.float32)
+        self.values = np.zeros((nenvs, nsteps), dtype=np.float32)
+        self.neglogpacs = np.zeros((nenvs, nsteps), dtype=np.float32)
+        # dones[:, t] tells whether the episode ended right before obs[:, t]
+        self.dones = np.zeros((nenvs, nsteps), dtype=np.bool_)
+        self.advs = np.zeros((nenvs, nsteps), dtype=np.float32)
+        self.returns = np.zeros((nenvs, nsteps), dtype=np.float32)
+
+        # observation and done flags following the last step
+        self.last_obs = np.zeros((nenvs,) + tuple(ob_shape), dtype=ob_dtype)
+        self.last_dones = np.zeros(nenvs, dtype=np.bool_)
+
+        # scratch buffers of the advantage computation
+        self._delta = np.zeros(nenvs, dtype=np.float32)
+        self._nonterminal = np.zeros(nenvs, dtype=np.float32)
+
+    def reset(self, obs):
+        """
+        Starts from the first observations of freshly reset environments.
+        """
+        self.obs[:, 0] = obs
+        self.dones[:, 0] = False
+        self.step = 0
+
+    @property
+    def current_obs(self):
+        """
+        View of the observations the next actions are computed from.
+        """
+        return self.obs[:, self.step]
+
+    @property
+    def current_dones(self):
+        return self.dones[:, self.step]
+
+    @property
+    def next_obs(self):
+        """
+        View the observations returned by the next environment step are
+        written to. Use as the output of @shmem_step_into.
+        """
+        if self.step + 1 < self.nsteps:
+            return self.obs[:, self.step + 1]
+        return self.last_obs
+
+    @property
+    def next_dones(self):
+        if self.step + 1 < self.nsteps:
+            return self.dones[:, self.step + 1]
+        return self.last_dones
+
+    def insert(self, actions, values, neglogpacs, rewards, dones, obs=None):
+        """
+        Records one step of all environments and advances the storage.
+
+        Args:
+            actions, values, neglogpacs: outputs of the policy at the current
+                observations.
+            rewards, dones: returned by the environments.
+            obs (np.array): next observations, omit if they were already
+                written to @next_obs.
+        """
+        t = self.step
+        assert t < self.nsteps, "rollout is full, call after_update first"
+        self.actions[:, t] = actions
+        self.values[:, t] = values
+        self.neglogpacs[:, t] = neglogpacs
+        self.rewards[:, t] = rewards
+        self.next_dones[...] = dones
+        if obs is not None:
+            self.next_obs[...] = obs
+        self.step += 1
+
+    def compute_returns(self, last_values, gamma, lam):
+        """
+        Computes the generalized advantage estimates and the returns in place.
+        The recursion runs backwards over time, vectorized over environments.
+
+        Args:
+            last_values (np.array): value estimates of @last_obs.
+            gamma (float): discount factor.
+            lam (float): GAE lambda.
+        """
+        delta, nonterminal = self._delta, self._nonterminal
+        lastgaelam = np.zeros(self.nenvs, dtype=np.float32)
+        for t in reversed(range(self.nsteps)):
+            if t == self.nsteps - 1:
+                next_dones, next_values = self.last_dones, last_values
+            else:
+                next_dones, next_values = self.dones[:, t + 1], self.values[:, t + 1]
+            np.logical_not(next_dones, out=nonterminal, casting="unsafe")
+            # delta = r + gamma * V(s') * nonterminal - V(s)
+            np.multiply(next_values, nonterminal, out=delta)
+            delta *= gamma
+            delta += self.rewards[:, t]
+            delta -= self.values[:, t]
+            # A = delta + gamma * lam * nonterminal * A'
+            lastgaelam *= nonterminal
+            lastgaelam *= gamma * lam
+            lastgaelam += delta
+            self.advs[:, t] = lastgaelam
+        np.add(self.advs, self.values, out=self.returns)
+        return self.advs, self.returns
+
+    def _flat(self, arr):
+        # env-major arrays are contiguous over their first two axes
+        return arr.reshape((self.nenvs * self.nsteps,) + arr.shape[2:])
+
+    def flattened(self):
+        """
+        Returns views of obs, returns, dones, actions, values and neglogpacs of
+        shape (nenvs * nsteps, ...), ordered like baselines' sf01.
+        """
+        return tuple(
+            self._flat(arr)
+            for arr in (self.obs, self.returns, self.dones, self.actions, self.values, self.neglogpacs)
+        )
+
+    def after_update(self):
+        """
+        Moves the last observation to the first step of the next rollout.
+        """
+        self.obs[:, 0] = self.last_obs
+        self.dones[:, 0] = self.last_dones
+        self.step = 0
+
+
+def shmem_step_into(venv, actions, out):
+    """
+    Steps a vectorized environment and writes the new observations into @out.
+
+    A robosuite @ShmemVecEnv copies the observations from its shared memory
+    buffers directly, skipping the intermediate array built by step_wait.
+    Other vectorized environments fall back to step().
+
+    Args:
+        venv (VecEnv): vectorized environment with array observations.
+        actions (np.array): actions of all environments.
+        out (np.array): (nenvs, ...) destination, e.g. @RolloutStorage.next_obs.
+
+    Returns:
+        rewards, dones, infos
+    """
+    step_into = getattr(venv, "step_into", None)
+    if step_into is not None:
+        return step_into(actions, out)
+
+    obs, rews, dones, infos = venv.step(actions)
+    out[...] = obs
+    return rews, dones, infos
@@ -0,0 +1,417 @@
+"""
+Indexed store of object layouts (scenarios) for the bin squeezing
+environments, e.g. hard cases and test cases.
+
+A scenario places named objects at poses relative to the bin, with an optional
+target object and target position. Scenarios are kept column-wise in fixed
+size arrays (padded with empty names) and saved as a single compressed npz
+file without pickled objects. Every scenario carries a difficulty tag and a
+scalar difficulty, used by @ScenarioSampler for stratified and curriculum
+sampling, and can carry the simulator state reached after its objects
+settled, so that environments restore it instead of simulating the settling.
+Settled states are stored with the signature of the model they were reached
+on (see @model_signature) and only restored on a model with the same joints.
+
+Scenarios are returned as dicts with the keys of the environments' former
+@test_cases entries ('obj_names', 'obj_poses') plus 'obj_quats',
+'target_object', 'target_pos', 'tag', 'difficulty', 'qpos', 'qvel' and
+'state_signature'.
+"""
+
+import hashlib
+import multiprocessing
+
+import numpy as np
+
+NAME_DTYPE = "<U32"
+SIGNATURE_DTYPE = "<U40"
+
+
+def model_signature(model):
+    """
+    Returns a digest of the joint layout of a compiled model: two models with
+    the same signature have the same joints, in the same order, so a qpos and
+    qvel of one can be restored on the other.
+
+    Args:
+        model (PyMjModel): compiled model, e.g. sim.model.
+    """
+    description = "{} {} {}".format(model.nq, model.nv, ",".join(model.joint_names))
+    return hashlib.sha1(description.encode("utf-8")).hexdigest()
+
+
+class ScenarioStore:
+    """
+    Column-wise collection of scenarios.
+    """
+
+    def __init__(
+        self,
+        names,
+        poses,
+        quats=None,
+        targets=None,
+        target_poses=None,
+        tags=None,
+        difficulty=None,
+        qpos=None,
+        qvel=None,
+        has_state=None,
+        signatures=None,
+    ):
+        """
+        Args:
+            names (np.array): (n, k) object names, '' for unused slots.
+            poses (np.array): (n, k, 3) positions relative to the bin.
+            quats (np.array): (n, k, 4) orientations, identity by default.
+            targets (np.array): (n,) target object names, '' to keep the
+                environment's target.
+            target_poses (np.array): (n, 3) target positions relative to the
+                bin, nan to keep the environment's one.
+            tags (np.array): (n,) difficulty tags.
+            difficulty (np.array): (n,) scalar difficulty, higher is harder.
+            qpos, qvel (np.array): (n, nq) and (n, nv) settled states.
+            has_state (np.array): (n,) whether the settled state is set.
+            signatures (np.array): (n,) model signatures of the settled
+                states, see @model_signature.
+        """
+        self.names = np.asarray(names, dtype=NAME_DTYPE)
+        n, k = self.names.shape
+        self.poses = np.asarray(poses, dtype=np.float64).reshape(n, k, 3)
+        if quats is None:
+            quats = np.tile(np.array([1., 0., 0., 0.]), (n, k, 1))
+        self.quats = np.asarray(quats, dtype=np.float64).reshape(n, k, 4)
+        self.targets = np.asarray(targets if targets is not None else [""] * n, dtype=NAME_DTYPE)
+        if target_poses is None:
+            target_poses = np.full((n, 3), np.nan)
+        self.target_poses = np.asarray(target_poses, dtype=np.float64).reshape(n, 3)
+        self.tags = np.asarray(tags if tags is not None else [""] * n, dtype=NAME_DTYPE)
+        self.difficulty = np.asarray(
+            difficulty if difficulty is not None else np.zeros(n), dtype=np.float64
+        )
+        self.qpos = None if qpos is None else np.asarray(qpos, dtype=np.float64)
+        self.qvel = None if qvel is None else np.asarray(qvel, dtype=np.float64)
+        if has_state is None:
+            has_state = np.zeros(n, dtype=np.bool_) if self.qpos is None else np.ones(n, dtype=np.bool_)
+        self.has_state = np.asarray(has_state, dtype=np.bool_)
+        self.signatures = np.asarray(
+            signatures if signatures is not None else [""] * n, dtype=SIGNATURE_DTYPE
+        )
+
+        self._tag_index = None
+
+    @classmethod
+    def from_cases(cls, cases, tags=None, difficulty=None):
+        """
+        Builds a store from a list of scenario dicts, e.g. the @test_cases of
+        the environments. Missing keys take their default values.
+        """
+        n = len(cases)
+        k = max(len(case["obj_names"]) for case in cases) if n else 0
+        names = np.full((n, k), "", dtype=NAME_DTYPE)
+        poses = np.zeros((n, k, 3))
+        quats = np.tile(np.array([1., 0., 0., 0.]), (n, k, 1))
+        targets = np.full(n, "", dtype=NAME_DTYPE)
+        target_poses = np.full((n, 3), np.nan)
+        case_tags = np.full(n, "", dtype=NAME_DTYPE)
+        case_difficulty = np.zeros(n)
+        for i, case in enumerate(cases):
+            m = len(case["obj_names"])
+            names[i, :m] = case["obj_names"]
+            poses[i, :m] = np.asarray(case["obj_poses"])[:m]
+            if case.get("obj_quats") is not None:
+                quats[i, :m] = case["obj_quats"]
+            targets[i] = case.get("target_object") or ""
+            if case.get("target_pos") is not None:
+                target_poses[i] = case["target_pos"]
+            case_tags[i] = case.get("tag", "")
+            case_difficulty[i] = case.get("difficulty", 0.)
+        if tags is not None:
+            case_tags = tags
+        if difficulty is not None:
+            case_difficulty = difficulty
+        return cls(names, poses, quats, targets, target_poses, case_tags, case_difficulty)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a store saved by @save.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            columns = {key: data[key] for key in data.files}
+        return cls(**columns)
+
+    def save(self, path):
+        """
+        Saves the store to a compressed npz file.
+        """
+        columns = dict(
+            names=self.names,
+            poses=self.poses,
+            quats=self.quats,
+            targets=self.targets,
+            target_poses=self.target_poses,
+            tags=self.tags,
+            difficulty=self.difficulty,
+            has_state=self.has_state,
+            signatures=self.signatures,
+        )
+        if self.qpos is not None:
+            columns.update(qpos=self.qpos, qvel=self.qvel)
+        np.savez_compressed(path, **columns)
+
+    @classmethod
+    def concatenate(cls, stores):
+        """
+        Concatenates stores, padding the object slots to the widest one.
+        """
+        k = max(store.names.shape[1] for store in stores)
+
+        def pad(arr, value):
+            width = [(0, 0)] * arr.ndim
+            width[1] = (0, k - arr.shape[1])
+            return np.pad(arr, width, mode="constant", constant_values=value)
+
+        columns = dict(
+            names=np.concatenate([pad(s.names, "") for s in stores]),
+            poses=np.concatenate([pad(s.poses, 0.) for s in stores]),
+            quats=np.concatenate([pad(s.quats, 0.) for s in stores]),
+            targets=np.concatenate([s.targets for s in stores]),
+            target_poses=np.concatenate([s.target_poses for s in stores]),
+            tags=np.concatenate([s.tags for s in stores]),
+            difficulty=np.concatenate([s.difficulty for s in stores]),
+            signatures=np.concatenate([s.signatures for s in stores]),
+        )
+        widths = {s.state_widths for s in stores if s.has_state.any()}
+        if len(widths) > 1:
+            raise ValueError(
+                "Cannot concatenate settled states of different (nq, nv): {}".format(sorted(widths))
+            )
+        if widths:
+            nq, nv = widths.pop()
+            columns.update(
+                qpos=np.concatenate(
+                    [s.qpos if s.has_state.any() else np.zeros((len(s), nq)) for s in stores]
+                ),
+                qvel=np.concatenate(
+                    [s.qvel if s.has_state.any() else np.zeros((len(s), nv)) for s in stores]
+                ),
+                has_state=np.concatenate([s.has_state for s in stores]),
+            )
+        return cls(**columns)
+
+    @property
+    def state_widths(self):
+        """
+        (nq, nv) of the settled states, None if no state was ever allocated.
+        """
+        if self.qpos is None:
+            return None
+        return self.qpos.shape[1], self.qvel.shape[1]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, i):
+        valid = self.names[i] != ""
+        scenario = {
+            "obj_names": self.names[i][valid].tolist(),
+            "obj_poses": self.poses[i][valid],
+            "obj_quats": self.quats[i][valid],
+            "target_object": str(self.targets[i]) or None,
+            "target_pos": None if np.isnan(self.target_poses[i]).any() else self.target_poses[i],
+            "tag": str(self.tags[i]),
+            "difficulty": float(self.difficulty[i]),
+            "qpos": None,
+            "qvel": None,
+            "state_signature": None,
+        }
+        if self.has_state[i]:
+            scenario["qpos"] = self.qpos[i]
+            scenario["qvel"] = self.qvel[i]
+            scenario["state_signature"] = str(self.signatures[i])
+        return scenario
+
+    def subset(self, indices):
+        """
+        Returns a new store with the scenarios at @indices.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        return ScenarioStore(
+            self.names[indices],
+            self.poses[indices],
+            self.quats[indices],
+            self.targets[indices],
+            self.target_poses[indices],
+            self.tags[indices],
+            self.difficulty[indices],
+            None if self.qpos is None else self.qpos[indices],
+            None if self.qvel is None else self.qvel[indices],
+            self.has_state[indices],
+            self.signatures[indices],
+        )
+
+    def split(self, ratio, seed=None):
+        """
+        Randomly splits the store into two stores holding @ratio and 1 - @ratio
+        of the scenarios, e.g. train and test cases.
+        """
+        order = np.random.RandomState(seed).permutation(len(self))
+        cut = int(len(self) * ratio)
+        return self.subset(order[:cut]), self.subset(order[cut:])
+
+    @property
+    def tag_index(self):
+        """
+        Dict mapping every tag to the indices of its scenarios.
+        """
+        if self._tag_index is None:
+            self._tag_index = {
+                str(tag): np.flatnonzero(self.tags == tag) for tag in np.unique(self.tags)
+            }
+        return self._tag_index
+
+    def set_state(self, i, qpos, qvel, signature):
+        """
+        Caches the settled simulator state of scenario @i, reached on a model
+        with signature @signature. All the states of a store have the same
+        (nq, nv), a state of another width raises a ValueError.
+        """
+        qpos, qvel = np.asarray(qpos), np.asarray(qvel)
+        if self.state_widths != (len(qpos), len(qvel)):
+            if self.has_state.any():
+                raise ValueError(
+                    "Settled state of scenario {} has (nq, nv) {}, the store holds {}".format(
+                        i, (len(qpos), len(qvel)), self.state_widths
+                    )
+                )
+            self.qpos = np.zeros((len(self), len(qpos)))
+            self.qvel = np.zeros((len(self), len(qvel)))
+        self.qpos[i] = qpos
+        self.qvel[i] = qvel
+        self.has_state[i] = True
+        self.signatures[i] = signature
+
+
+class ScenarioSampler:
+    """
+    Draws scenarios from a store.
+
+    "uniform" draws every scenario with the same probability, "stratified"
+    first draws a tag (uniformly or with @tag_weights) and then a scenario of
+    this tag, and "curriculum" draws uniformly among the scenarios whose
+    difficulty rank is below the current progress, see @set_progress.
+    """
+
+    def __init__(self, store, mode="uniform", tag_weights=None, min_fraction=0.1, seed=None):
+        """
+        Args:
+            store (ScenarioStore): scenarios to draw from.
+            mode (str): "uniform", "stratified" or "curriculum".
+            tag_weights (dict): sampling weight of every tag in stratified mode.
+            min_fraction (float): fraction of the easiest scenarios available at
+                the start of the curriculum.
+            seed (int): seed of the sampler's generator. If None, the global
+                numpy generator is used so that seeding numpy seeds sampling.
+        """
+        if mode not in ("uniform", "stratified", "curriculum"):
+            raise ValueError("Unknown sampling mode: {}".format(mode))
+        assert len(store) > 0, "cannot sample from an empty store"
+        self.store = store
+        self.mode = mode
+        self.min_fraction = min_fraction
+        self.rng = np.random if seed is None else np.random.RandomState(seed)
+
+        self.tags = sorted(store.tag_index.keys())
+        weights = np.array([(tag_weights or {}).get(tag, 1.) for tag in self.tags], dtype=np.float64)
+        self.tag_probs = weights / weights.sum()
+
+        # scenario indices from easiest to hardest
+        self.by_difficulty = np.argsort(store.difficulty, kind="stable")
+        self.progress = 0.
+
+    def set_progress(self, progress):
+        """
+        Sets the curriculum progress in [0, 1], 1 makes every scenario available.
+        """
+        self.progress = float(np.clip(progress, 0., 1.))
+
+    def sample_index(self):
+        if self.mode == "stratified":
+            tag = self.tags[self.rng.choice(len(self.tags), p=self.tag_probs)]
+            candidates = self.store.tag_index[tag]
+            return int(candidates[self.rng.randint(len(candidates))])
+        if self.mode == "curriculum":
+            fraction = self.min_fraction + (1. - self.min_fraction) * self.progress
+            n = max(1, int(np.ceil(fraction * len(self.store))))
+            return int(self.by_difficulty[self.rng.randint(n)])
+        return int(self.rng.randint(len(self.store)))
+
+    def sample(self):
+        """
+        Returns a scenario dict, see @ScenarioStore.__getitem__.
+        """
+        return self.store[self.sample_index()]
+
+
+def _generate_one(args):
+    generate_fn, seed = args
+    return generate_fn(np.random.RandomState(seed))
+
+
+def generate_scenarios(generate_fn, n, num_workers=None, seed=0):
+    """
+    Generates @n scenarios in parallel.
+
+    Args:
+        generate_fn (function): picklable function mapping a
+            np.random.RandomState to a scenario dict. Scenario i is generated
+            with the seed @seed + i, whatever the number of workers.
+        n (int): number of scenarios.
+        num_workers (int): number of processes, defaults to the number of cores.
+        seed (int): seed of the first scenario.
+
+    Returns:
+        ScenarioStore
+    """
+    jobs = [(generate_fn, seed + i) for i in range(n)]
+    if num_workers == 1:
+        cases = list(map(_generate_one, jobs))
+    else:
+        with multiprocessing.Pool(num_workers) as pool:
+            cases = pool.map(_generate_one, jobs, chunksize=max(1, n // (4 * (num_workers or multiprocessing.cpu_count()))))
+    return ScenarioStore.from_cases(cases)
+
+
+_settle_env = None
+
+
+def _init_settle_worker(env_fn):
+    global _settle_env
+    _settle_env = env_fn()
+    _settle_env.reset()
+
+
+def _settle_one(args):
+    i, scenario = args
+    _settle_env.reset()
+    qpos, qvel, signature = _settle_env.settle_scenario(scenario)
+    return i, qpos, qvel, signature
+
+
+def settle_scenarios(store, env_fn, num_workers=None):
+    """
+    Simulates the settling of every scenario in parallel and caches the
+    resulting states in @store.
+
+    Args:
+        store (ScenarioStore): scenarios to settle, updated in place.
+        env_fn (function): picklable function returning an environment with a
+            settle_scenario(scenario) method, e.g. BinSqueeze.
+        num_workers (int): number of processes, defaults to the number of cores.
+    """
+    jobs = [(i, store[i]) for i in range(len(store))]
+    with multiprocessing.Pool(num_workers, initializer=_init_settle_worker, initargs=(env_fn,)) as pool:
+        for i, qpos, qvel, signature in pool.imap_unordered(_settle_one, jobs):
+            store.set_state(i, qpos, qvel, signature)
+    return store
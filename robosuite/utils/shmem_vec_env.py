@@ -0,0 +1,53 @@
+"""
+Shared-memory vector environment that writes observations into caller-owned
+arrays.
+
+baselines' ShmemVecEnv already transfers observations through shared memory,
+but step_wait() stacks them into a freshly allocated array on every step.
+@ShmemVecEnv.step_into copies them from the shared buffers straight into a
+preallocated destination instead, e.g. the next slot of a @RolloutStorage.
+"""
+
+import numpy as np
+
+from baselines.common.vec_env.shmem_vec_env import ShmemVecEnv as _ShmemVecEnv
+
+
+class ShmemVecEnv(_ShmemVecEnv):
+    """
+    baselines' ShmemVecEnv with @step_into. Only single-array observation
+    spaces are copied in place, Dict spaces go through step().
+    """
+
+    def step_into(self, actions, out):
+        """
+        Steps the environments and writes their new observations into @out.
+
+        Args:
+            actions (np.array): actions of all environments.
+            out (np.array): (nenvs, ...) destination of the observations.
+
+        Returns:
+            rewards, dones, infos
+        """
+        self.step_async(actions)
+        return self.step_wait_into(out)
+
+    def step_wait_into(self, out):
+        """
+        Waits for the steps started by step_async() and writes the new
+        observations into @out.
+        """
+        if self.obs_keys != [None]:
+            obs, rews, dones, infos = self.step_wait()
+            out[...] = obs
+            return rews, dones, infos
+
+        outs = [pipe.recv() for pipe in self.parent_pipes]
+        self.waiting_step = False
+        _, rews, dones, infos = zip(*outs)
+
+        dtype, shape = self.obs_dtypes[None], self.obs_shapes[None]
+        for i, bufs in enumerate(self.obs_bufs):
+            out[i] = np.frombuffer(bufs[None].get_obj(), dtype=dtype).reshape(shape)
+        return np.array(rews), np.array(dones), infos
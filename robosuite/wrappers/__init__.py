@@ -2,6 +2,7 @@ from robosuite.wrappers.wrapper import Wrapper
 from robosuite.wrappers.ik_wrapper import IKWrapper
 from robosuite.wrappers.data_collection_wrapper import DataCollectionWrapper
 from robosuite.wrappers.demo_sampler_wrapper import DemoSamplerWrapper
+from robosuite.wrappers.frame_stack_wrapper import FrameStackWrapper
 
 try:
     from robosuite.wrappers.gym_wrapper import GymWrapper
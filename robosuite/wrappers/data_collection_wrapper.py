@@ -1,6 +1,11 @@
 """
 This file implements a wrapper for saving simulation states to disk.
 This data collection wrapper is useful for collecting demonstrations.
+
+By default every episode is dumped into a directory of npz files that
+`gather_demonstrations_as_hdf5` later merges. With @streaming=True the
+states are appended directly to a demo.hdf5 file in its final schema by
+a background writer (see robosuite.utils.demo_recorder).
 """
 
 import os
@@ -9,10 +14,13 @@ import numpy as np
 
 from robosuite.wrappers import Wrapper
 from robosuite.wrappers import IKWrapper
+from robosuite.utils.log_utils import get_logger
+
+logger = get_logger(__name__)
 
 
 class DataCollectionWrapper(Wrapper):
-    def __init__(self, env, directory, collect_freq=1, flush_freq=100):
+    def __init__(self, env, directory, collect_freq=1, flush_freq=100, streaming=False):
         """
         Initializes the data collection wrapper.
 
@@ -21,6 +29,8 @@ class DataCollectionWrapper(Wrapper):
             directory: Where to store collected data.
             collect_freq: How often to save simulation state, in terms of environment steps.
             flush_freq: How frequently to dump data to disk, in terms of environment steps.
+            streaming: If True, write demo.hdf5 and the model xmls directly into
+                @directory instead of per-episode npz files.
         """
         super().__init__(env)
 
@@ -38,7 +48,7 @@ class DataCollectionWrapper(Wrapper):
         self.flush_freq = flush_freq
 
         if not os.path.exists(directory):
-            print("DataCollectionWrapper: making new directory at {}".format(directory))
+            logger.info("making new directory at %s", directory)
             os.makedirs(directory)
 
         # store logging directory for current episode
@@ -47,6 +57,15 @@ class DataCollectionWrapper(Wrapper):
         # remember whether any environment interaction has occurred
         self.has_interaction = False
 
+        # streaming hdf5 recorder, replaces the npz dumps if enabled
+        self.recorder = None
+        if streaming:
+            from robosuite.utils.demo_recorder import HDF5DemoRecorder
+
+            self.recorder = HDF5DemoRecorder(
+                directory, self._env_name(), flush_freq=flush_freq
+            )
+
     def _start_new_episode(self):
         """
         Bookkeeping to do at the start of each new episode.
@@ -54,7 +73,10 @@ class DataCollectionWrapper(Wrapper):
 
         # flush any data left over from the previous episode if any interactions have happened
         if self.has_interaction:
-            self._flush()
+            if self.recorder is not None:
+                self.recorder.end_episode()
+            else:
+                self._flush()
 
         # timesteps in current episode
         self.t = 0
@@ -70,11 +92,15 @@ class DataCollectionWrapper(Wrapper):
 
         self.has_interaction = True
 
+        if self.recorder is not None:
+            self.recorder.start_episode(self.env.model.get_xml())
+            return
+
         # create a directory with a timestamp
         t1, t2 = str(time.time()).split(".")
         self.ep_directory = os.path.join(self.directory, "ep_{}_{}".format(t1, t2))
         assert not os.path.exists(self.ep_directory)
-        print("DataCollectionWrapper: making folder at {}".format(self.ep_directory))
+        logger.info("making folder at %s", self.ep_directory)
         os.makedirs(self.ep_directory)
 
         # save the model xml
@@ -85,21 +111,26 @@ class DataCollectionWrapper(Wrapper):
         """
         Method to flush internal state to disk.
         """
+        if self.recorder is not None:
+            self.recorder.flush()
+            return
+
         t1, t2 = str(time.time()).split(".")
         state_path = os.path.join(self.ep_directory, "state_{}_{}.npz".format(t1, t2))
-        if hasattr(self.env, "unwrapped"):
-            env_name = self.env.unwrapped.__class__.__name__
-        else:
-            env_name = self.env.__class__.__name__
         np.savez(
             state_path,
             states=np.array(self.states),
             action_infos=self.action_infos,
-            env=env_name,
+            env=self._env_name(),
         )
         self.states = []
         self.action_infos = []
 
+    def _env_name(self):
+        if hasattr(self.env, "unwrapped"):
+            return self.env.unwrapped.__class__.__name__
+        return self.env.__class__.__name__
+
     def reset(self):
         ret = super().reset()
         self._start_new_episode()
@@ -116,7 +147,6 @@ class DataCollectionWrapper(Wrapper):
         # collect the current simulation state if necessary
         if self.t % self.collect_freq == 0:
             state = self.env.sim.get_state().flatten()
-            self.states.append(state)
 
             if isinstance(self.env, IKWrapper):
                 # add end effector actions in addition to the low-level joint actions
@@ -138,10 +168,16 @@ class DataCollectionWrapper(Wrapper):
                 info["gripper_actuation"] = np.array(
                     action[self.env.mujoco_robot.dof :]
                 )
+
+            if self.recorder is not None:
+                # the recorder batches rows itself
+                self.recorder.add(state, info)
+                return ret
+            self.states.append(state)
             self.action_infos.append(info)
 
         # flush collected data to disk if necessary
-        if self.t % self.flush_freq == 0:
+        if self.recorder is None and self.t % self.flush_freq == 0:
             self._flush()
 
         return ret
@@ -151,4 +187,6 @@ class DataCollectionWrapper(Wrapper):
         Override close method in order to flush left over data
         """
         self._start_new_episode()
+        if self.recorder is not None:
+            self.recorder.close()
         self.env.close()
@@ -9,9 +9,12 @@ import random
 import os
 import h5py
 import time
+import tempfile
 import numpy as np
+from collections import OrderedDict
 
 from robosuite.utils.mjcf_utils import postprocess_model_xml
+from robosuite.utils.model_cache import load_model_from_xml_cached
 from robosuite.wrappers import Wrapper
 
 
@@ -23,12 +26,15 @@ class DemoSamplerWrapper(Wrapper):
         env,
         demo_path,
         need_xml=False,
+        preload=False,
         num_traj=-1,
         sampling_schemes=["uniform", "random"],
         scheme_ratios=[0.9, 0.1],
         open_loop_increment_freq=100,
         open_loop_initial_window_width=25,
         open_loop_window_increment=25,
+        xml_cache_size=32,
+        model_cache_size=8,
     ):
         """
         Initializes a wrapper that provides support for resetting the environment
@@ -49,8 +55,9 @@ class DemoSamplerWrapper(Wrapper):
                 In this case, every sampled state comes with a corresponding xml to
                 be used for the environment reset.
 
-            preload (bool): If True, fetch all demonstrations into memory at the
-                beginning. Otherwise, load demonstrations as they are needed lazily.
+            preload (bool): If True, copy the states of all demonstrations into one
+                contiguous memory-mapped array at the beginning. Otherwise, single
+                states are read from the hdf5 file as they are needed.
 
             num_traj (int): If provided, subsample @number demonstrations from the 
                 provided set of demonstrations instead of using all of them.
@@ -85,6 +92,10 @@ class DemoSamplerWrapper(Wrapper):
             open_loop_window_increment (int): The window size will increase by
                 @open_loop_window_increment every @open_loop_increment_freq samples.
                 This number is in terms of number of demonstration time steps.
+
+            xml_cache_size (int): Number of postprocessed model xmls to keep in memory.
+
+            model_cache_size (int): Number of compiled models to keep in memory.
         """
 
         super().__init__(env)
@@ -109,6 +120,24 @@ class DemoSamplerWrapper(Wrapper):
             random.seed(3141)  # ensure that the same set is sampled every time
             self.demo_list = random.sample(self.demo_list, num_traj)
 
+        # index of episode lengths, read from the dataset metadata only
+        self.demo_lengths = np.array(
+            [self.demo_file["data/{}/states".format(ep)].shape[0] for ep in self.demo_list],
+            dtype=np.int64,
+        )
+        self.demo_offsets = np.concatenate([[0], np.cumsum(self.demo_lengths)[:-1]])
+        self._demo_pos = {ep: i for i, ep in enumerate(self.demo_list)}
+
+        self.preloaded_states = None
+        if preload:
+            self._preload_states()
+
+        # processed xml strings and compiled models, least recently used first
+        self.xml_cache_size = xml_cache_size
+        self.model_cache_size = model_cache_size
+        self._xml_cache = OrderedDict()
+        self._model_cache = OrderedDict()
+
         self.need_xml = need_xml
         self.demo_sampled = 0
 
@@ -153,7 +182,8 @@ class DemoSamplerWrapper(Wrapper):
             if self.need_xml:
                 # reset the simulation from the model if necessary
                 state, xml = state
-                self.env.reset_from_xml_string(xml)
+                # the compiled model is reused, only the simulation is rebuilt
+                self.env.reset_from_model(self._model_for_xml(xml))
 
             if isinstance(state, tuple):
                 state = state[0]
@@ -202,13 +232,11 @@ class DemoSamplerWrapper(Wrapper):
         ep_ind = random.choice(self.demo_list)
 
         # select a flattened mujoco state uniformly from this episode
-        states = self.demo_file["data/{}/states".format(ep_ind)].value
-        state = random.choice(states)
+        eps_len = self.demo_lengths[self._demo_pos[ep_ind]]
+        state = self._state_at(ep_ind, random.randrange(eps_len))
 
         if self.need_xml:
-            model_xml = self._xml_for_episode_index(ep_ind)
-            xml = postprocess_model_xml(model_xml)
-            return state, xml
+            return state, self._processed_xml(ep_ind)
         return state
 
     def _reverse_sample_open_loop(self):
@@ -225,10 +253,9 @@ class DemoSamplerWrapper(Wrapper):
         ep_ind = random.choice(self.demo_list)
 
         # sample uniformly in a window that grows backwards from the end of the demos
-        states = self.demo_file["data/{}/states".format(ep_ind)].value
-        eps_len = states.shape[0]
+        eps_len = self.demo_lengths[self._demo_pos[ep_ind]]
         index = np.random.randint(max(eps_len - self.open_loop_window_size, 0), eps_len)
-        state = states[index]
+        state = self._state_at(ep_ind, index)
 
         # increase window size at a fixed frequency (open loop)
         self.demo_sampled += 1
@@ -238,9 +265,7 @@ class DemoSamplerWrapper(Wrapper):
             self.demo_sampled = 0
 
         if self.need_xml:
-            model_xml = self._xml_for_episode_index(ep_ind)
-            xml = postprocess_model_xml(model_xml)
-            return state, xml
+            return state, self._processed_xml(ep_ind)
 
         return state
 
@@ -258,10 +283,9 @@ class DemoSamplerWrapper(Wrapper):
         ep_ind = random.choice(self.demo_list)
 
         # sample uniformly in a window that grows forwards from the beginning of the demos
-        states = self.demo_file["data/{}/states".format(ep_ind)].value
-        eps_len = states.shape[0]
+        eps_len = self.demo_lengths[self._demo_pos[ep_ind]]
         index = np.random.randint(0, min(self.open_loop_window_size, eps_len))
-        state = states[index]
+        state = self._state_at(ep_ind, index)
 
         # increase window size at a fixed frequency (open loop)
         self.demo_sampled += 1
@@ -271,9 +295,7 @@ class DemoSamplerWrapper(Wrapper):
             self.demo_sampled = 0
 
         if self.need_xml:
-            model_xml = self._xml_for_episode_index(ep_ind)
-            xml = postprocess_model_xml(model_xml)
-            return state, xml
+            return state, self._processed_xml(ep_ind)
 
         return state
 
@@ -289,3 +311,58 @@ class DemoSamplerWrapper(Wrapper):
         with open(model_path, "r") as model_f:
             model_xml = model_f.read()
         return model_xml
+
+    def _preload_states(self):
+        """
+        Copies the states of every demonstration into one contiguous memmap,
+        indexed by @self.demo_offsets.
+        """
+        total = int(self.demo_lengths.sum())
+        first = self.demo_file["data/{}/states".format(self.demo_list[0])]
+        self._preload_file = tempfile.TemporaryFile()
+        self.preloaded_states = np.memmap(
+            self._preload_file, dtype=first.dtype, mode="w+", shape=(total,) + first.shape[1:]
+        )
+        for ep, offset, length in zip(self.demo_list, self.demo_offsets, self.demo_lengths):
+            self.demo_file["data/{}/states".format(ep)].read_direct(
+                self.preloaded_states, dest_sel=np.s_[offset : offset + length]
+            )
+        self.preloaded_states.flush()
+
+    def _state_at(self, ep_ind, index):
+        """
+        Reads the state at @index of episode @ep_ind without loading the episode.
+        """
+        if self.preloaded_states is not None:
+            offset = self.demo_offsets[self._demo_pos[ep_ind]]
+            return np.array(self.preloaded_states[offset + index])
+        return self.demo_file["data/{}/states".format(ep_ind)][index]
+
+    def _processed_xml(self, ep_ind):
+        """
+        Returns the postprocessed model xml of episode @ep_ind, from cache if possible.
+        """
+        xml = self._xml_cache.get(ep_ind)
+        if xml is None:
+            xml = postprocess_model_xml(self._xml_for_episode_index(ep_ind))
+            self._xml_cache[ep_ind] = xml
+            if len(self._xml_cache) > self.xml_cache_size:
+                self._xml_cache.popitem(last=False)
+        else:
+            self._xml_cache.move_to_end(ep_ind)
+        return xml
+
+    def _model_for_xml(self, xml):
+        """
+        Returns the compiled model of @xml, from cache if possible. Episodes
+        recorded on the same model share a single compiled model.
+        """
+        model = self._model_cache.get(xml)
+        if model is None:
+            model = load_model_from_xml_cached(xml)
+            self._model_cache[xml] = model
+            if len(self._model_cache) > self.model_cache_size:
+                self._model_cache.popitem(last=False)
+        else:
+            self._model_cache.move_to_end(xml)
+        return model
@@ -0,0 +1,94 @@
+"""
+This file implements a wrapper that stacks the last k observations along
+their last (channel) axis, e.g. to feed the last k RGB-D frames of the bin
+environments to an image policy.
+
+Frames are written twice into a preallocated ring buffer of 2k slots, so the
+last k frames always form one contiguous window of the buffer and the stacked
+observation is a view into it: no array is allocated per step or per reset.
+"""
+
+import numpy as np
+
+from robosuite.wrappers import Wrapper
+
+
+class FrameStackWrapper(Wrapper):
+    env = None
+
+    def __init__(self, env, num_frames=4, out=None):
+        """
+        Initializes the frame stacking wrapper.
+
+        Args:
+            env: The environment to wrap. Its observations are arrays whose last
+                axis holds the channels.
+            num_frames (int): Number of stacked frames.
+            out (np.array): If provided, stacked observations are copied into
+                this preallocated array (e.g. a slice of a shared memory buffer)
+                and it is returned instead of a view into the ring buffer.
+        """
+        super().__init__(env)
+        assert num_frames > 0, "num_frames must be positive"
+        self.num_frames = num_frames
+        self.out = out
+
+        self._buffer = None
+        self._index = 0
+        self._stacked_shape = None
+
+        if hasattr(env, "observation_space"):
+            self.observation_space = self._stack_space(env.observation_space)
+
+    def _stack_space(self, space):
+        from gym import spaces
+
+        if not isinstance(space, spaces.Box):
+            return space
+        return spaces.Box(
+            low=np.concatenate([space.low] * self.num_frames, axis=-1),
+            high=np.concatenate([space.high] * self.num_frames, axis=-1),
+            dtype=space.dtype,
+        )
+
+    def _allocate(self, frame):
+        k = self.num_frames
+        shape = frame.shape[:-1] + (2 * k, frame.shape[-1])
+        if self._buffer is None or self._buffer.shape != shape or self._buffer.dtype != frame.dtype:
+            self._buffer = np.zeros(shape, dtype=frame.dtype)
+            self._stacked_shape = frame.shape[:-1] + (k * frame.shape[-1],)
+
+    def _push(self, frame):
+        k = self.num_frames
+        self._index = (self._index + 1) % k
+        self._buffer[..., self._index, :] = frame
+        self._buffer[..., self._index + k, :] = frame
+
+    def _stacked(self):
+        """
+        Returns the last k frames, oldest first. Unless @self.out is set, the
+        result is a view that is overwritten by the next step.
+        """
+        start = self._index + 1
+        # the window is contiguous within every pixel, so merging the frame and
+        # channel axes does not copy
+        view = self._buffer[..., start : start + self.num_frames, :].reshape(
+            self._stacked_shape
+        )
+        if self.out is not None:
+            np.copyto(self.out, view)
+            return self.out
+        return view
+
+    def reset(self):
+        frame = np.asarray(self.env.reset())
+        self._allocate(frame)
+        # start every episode with k copies of the first frame
+        self._buffer[...] = frame[..., None, :]
+        self._index = self.num_frames - 1
+        return self._stacked()
+
+    def step(self, action):
+        frame, reward, done, info = self.env.step(action)
+        self._push(np.asarray(frame))
+        return self._stacked(), reward, done, info
@@ -7,6 +7,9 @@ interface.
 import numpy as np
 from gym import spaces
 from robosuite.wrappers import Wrapper
+from robosuite.utils.log_utils import get_logger
+
+logger = get_logger(__name__)
 
 
 class GymWrapper(Wrapper):
@@ -49,7 +52,7 @@ class GymWrapper(Wrapper):
         for key in obs_dict:
             if key in self.keys:
                 if verbose:
-                    print("adding key: {}".format(key))
+                    logger.info("adding key: %s", key)
                 ob_lst.append(obs_dict[key])
         return np.concatenate(ob_lst)
 
@@ -0,0 +1,33 @@
+"""
+Tests that environment-level randomization ranges survive the model rebuilds
+of the bin environments.
+"""
+import pytest
+
+from robosuite.environments.bin_squeeze import BinSqueeze
+from robosuite.models.objects.objects import MujocoObject
+from robosuite.utils.domain_randomization import apply_randomization_ranges
+
+
+def test_object_ranges_override_shared_ranges():
+    objects = {"Milk1": MujocoObject(), "Can1": MujocoObject()}
+    apply_randomization_ranges(
+        {"objects": {"friction": (0.8, 1.2)}, "Can1": {"mass": (0.5, 2.0)}}, objects
+    )
+    assert objects["Milk1"].randomization == {"friction": (0.8, 1.2)}
+    assert objects["Can1"].randomization == {"mass": (0.5, 2.0)}
+
+    with pytest.raises(ValueError):
+        apply_randomization_ranges({"Bread1": {"mass": (0.5, 2.0)}}, objects)
+
+
+def test_ranges_survive_reset():
+    ranges = {"friction": (0.8, 1.2), "mass": (0.5, 2.0)}
+    env = BinSqueeze(use_camera_obs=False, randomization={"objects": ranges})
+    env.reset()
+    assert env.randomizer is not None
+    for obj in env.mujoco_objects.values():
+        assert obj.randomization == ranges
+    # the randomizer is bound to the rebuilt model and finds the ranges
+    assert env.randomizer._model is env.sim.model
+    assert len(env.randomizer._object_targets) == len(env.mujoco_objects)
@@ -0,0 +1,64 @@
+"""
+Tests the vectorized bin containment and success checks and the discrete
+action grid.
+"""
+import numpy as np
+
+from robosuite.utils.bin_utils import BinGeometry, DiscreteActionGrid
+
+
+def test_contains_single_bin():
+    geometry = BinGeometry.from_center([0.1, 0.7, 0.8], [0.1, 0.2, 0.12], 0.12)
+    positions = np.array(
+        [
+            [0.1, 0.7, 0.85],  # center of the bin
+            [0.1, 0.7, 0.95],  # above the top
+            [0.2, 0.7, 0.85],  # outside in x
+            [0.1, 0.59, 0.85],  # outside in y
+            [0.1, 0.7, 0.8],  # on the bottom face
+        ]
+    )
+    assert list(geometry.contains(positions)) == [True, False, False, False, False]
+    assert list(geometry.not_in_bin(positions)) == [False, True, True, True, True]
+    assert geometry.contains(positions[0])
+
+
+def test_margin_and_open_top():
+    geometry = BinGeometry.from_center(
+        [0., 0., 0.], [0.1, 0.1, 0.1], np.inf, margin=(0.03, 0.02, 0.01)
+    )
+    assert geometry.contains(np.array([0.07, 0., 10.]))
+    assert geometry.contains(np.array([0., 0., -0.005]))
+    assert not geometry.contains(np.array([0., 0.08, 0.05]))
+
+
+def test_success_with_bin_ids():
+    low = np.array([[0., 0., 0.], [1., 0., 0.]])
+    geometry = BinGeometry(low, low + 0.5)
+    positions = np.array([[0.25, 0.25, 0.25], [0.25, 0.25, 0.25]])
+    gripper_pos = np.array([5., 5., 5.])
+
+    success = geometry.success(positions, gripper_pos, bin_ids=np.array([0, 1]))
+    assert list(success) == [True, False]
+
+    # objects still held by the gripper do not count
+    assert not geometry.success(positions[:1], positions[0], bin_ids=np.array([0]))[0]
+
+
+def test_discrete_grid_decodes_non_square_grids():
+    grid = DiscreteActionGrid([0.5, 0.3], [0.7, 0.5], x_num=4, y_num=2)
+    assert len(grid) == 8
+    # id = x_id * y_num + y_id
+    np.testing.assert_allclose(grid.decode(5), [0.5 + 0.05 * 2, 0.3 + 0.1 * 1])
+    np.testing.assert_allclose(grid.decode(np.array([0, 7])), [[0.5, 0.3], [0.65, 0.4]])
+    x_id, y_id = grid.cell_index(np.arange(8))
+    assert list(x_id) == [0, 0, 1, 1, 2, 2, 3, 3]
+    assert list(y_id) == [0, 1] * 4
+
+
+def test_discrete_grid_bin_mask():
+    geometry = BinGeometry.from_center([0.6, 0.4, 0.8], [0.08, 0.08, 0.1], 0.1)
+    grid = DiscreteActionGrid.from_bin([0.5, 0.3], [0.7, 0.5], 4, 4, geometry)
+    # only the cell with its corner inside (0.56, 0.64) x (0.36, 0.44) is valid
+    assert list(grid.cell_ids) == [2 * 4 + 2]
+    np.testing.assert_allclose(grid.decode([0]), [[0.6, 0.4]])
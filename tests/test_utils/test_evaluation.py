@@ -0,0 +1,48 @@
+"""
+Tests that parallel evaluation is deterministic in the number of workers.
+"""
+import numpy as np
+
+from robosuite.utils.evaluation import EvaluationPool, evaluate
+
+
+class CountingEnv:
+    """
+    Episodes of random length, drawn from the global generator at reset.
+    """
+
+    def reset(self):
+        self.t = 0
+        self.length = np.random.randint(1, 6)
+        return np.zeros(2, dtype=np.float32)
+
+    def step(self, action):
+        self.t += 1
+        done = self.t >= self.length
+        info = {"succ": int(action[0] > 0), "frames": [np.zeros((8, 8))]}
+        return np.full(2, self.t, dtype=np.float32), 1.0, done, info
+
+    def close(self):
+        pass
+
+
+def test_evaluate_is_deterministic():
+    def predict(obs):
+        return np.ones((len(obs), 1))
+
+    reports = [evaluate(predict, CountingEnv, 12, num_workers=n, seed=3) for n in (1, 4)]
+    for report in reports:
+        assert report["n_episodes"] == 12
+        assert report["success_rate"] == 1.0
+        assert [episode["episode"] for episode in report["episodes"]] == list(range(12))
+    lengths = [[episode["length"] for episode in report["episodes"]] for report in reports]
+    assert lengths[0] == lengths[1]
+
+
+def test_terminate_releases_the_workers():
+    pool = EvaluationPool(CountingEnv, 2)
+    pool.terminate()
+    assert not any(process.is_alive() for process in pool.processes)
+    assert all(remote.closed for remote in pool.remotes)
+    # closing a terminated pool is a no-op
+    pool.close()
@@ -0,0 +1,72 @@
+"""
+Tests the depth to heightmap projection on synthetic depth buffers.
+"""
+from types import SimpleNamespace
+
+import numpy as np
+
+from robosuite.utils.heightmap import CameraGeometry, HeightmapProjector
+
+WIDTH = HEIGHT = 64
+CAMERA_HEIGHT = 1.
+BASE_HEIGHT = 0.1
+BOUNDS = (-0.2, 0.2, -0.2, 0.2)
+
+
+def make_geometry():
+    # a camera at (0, 0, 1) looking straight down with +y up in the image
+    model = SimpleNamespace(
+        camera_name2id=lambda name: 0,
+        cam_fovy=np.array([90.]),
+        stat=SimpleNamespace(extent=1.),
+        vis=SimpleNamespace(map=SimpleNamespace(znear=0.01, zfar=50.)),
+    )
+    data = SimpleNamespace(
+        cam_xpos=np.array([[0., 0., CAMERA_HEIGHT]]),
+        cam_xmat=np.eye(3).reshape(1, 9),
+    )
+    sim = SimpleNamespace(model=model, data=data)
+    return CameraGeometry(sim, "birdview", WIDTH, HEIGHT)
+
+
+def raw_depth(geometry, distance):
+    """
+    Inverse of CameraGeometry.linearize.
+    """
+    ratio = 1. - geometry.znear / geometry.zfar
+    return (1. - geometry.znear / distance) / ratio
+
+
+def test_flat_plane_has_constant_height():
+    geometry = make_geometry()
+    projector = HeightmapProjector(geometry, BOUNDS, BASE_HEIGHT, resolution=0.05)
+    floor = 0.2
+    depth = np.full((HEIGHT, WIDTH), raw_depth(geometry, CAMERA_HEIGHT - floor))
+
+    heightmap = projector.heightmap(depth)
+    assert heightmap.shape == (8, 8)
+    np.testing.assert_allclose(heightmap, floor - BASE_HEIGHT, atol=1e-5)
+
+
+def test_box_has_known_footprint():
+    geometry = make_geometry()
+    projector = HeightmapProjector(geometry, BOUNDS, BASE_HEIGHT, resolution=0.05)
+    floor, top = 0.2, 0.3
+    # a box covering x in [-0.05, 0.05) and y in [0, 0.1), on the floor
+    top_points = geometry.rays * (CAMERA_HEIGHT - top) + geometry.position
+    on_box = (
+        (top_points[:, 0] >= -0.05)
+        & (top_points[:, 0] < 0.05)
+        & (top_points[:, 1] >= 0.)
+        & (top_points[:, 1] < 0.1)
+    )
+    depth = np.where(
+        on_box,
+        raw_depth(geometry, CAMERA_HEIGHT - top),
+        raw_depth(geometry, CAMERA_HEIGHT - floor),
+    ).reshape(HEIGHT, WIDTH)
+
+    expected = np.full((8, 8), floor - BASE_HEIGHT)
+    # rows follow +y and columns +x, starting at the low bounds
+    expected[4:6, 3:5] = top - BASE_HEIGHT
+    np.testing.assert_allclose(projector.heightmap(depth), expected, atol=1e-5)
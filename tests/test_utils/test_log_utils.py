@@ -0,0 +1,57 @@
+"""
+Tests the rate limiting of repeated log messages.
+"""
+import logging
+
+from robosuite.utils.log_utils import RateLimitFilter, get_logger
+
+
+def make_record(msg, args=(), level=logging.DEBUG):
+    return logging.LogRecord("robosuite.test", level, __file__, 0, msg, args, None)
+
+
+def test_rate_limit_aggregates_repeated_messages():
+    rate_filter = RateLimitFilter(interval=3600)
+    assert rate_filter.filter(make_record("reward %s", (1,)))
+    # same format string with other arguments counts as the same message
+    assert not rate_filter.filter(make_record("reward %s", (2,)))
+    assert not rate_filter.filter(make_record("reward %s", (3,)))
+    assert rate_filter.filter(make_record("episode done"))
+
+    # non-positive intervals disable rate limiting
+    rate_filter = RateLimitFilter(interval=0)
+    assert rate_filter.filter(make_record("reward %s", (1,)))
+    assert rate_filter.filter(make_record("reward %s", (2,)))
+
+
+def test_distinct_info_messages_are_kept():
+    rate_filter = RateLimitFilter(interval=3600)
+    assert rate_filter.filter(make_record("adding key: %s", ("image",), logging.INFO))
+    assert rate_filter.filter(make_record("adding key: %s", ("state",), logging.INFO))
+    assert not rate_filter.filter(make_record("adding key: %s", ("state",), logging.INFO))
+
+
+def test_suppressed_count_is_reported():
+    rate_filter = RateLimitFilter(interval=3600)
+    rate_filter.filter(make_record("reward %s", (1,)))
+    rate_filter.filter(make_record("reward %s", (2,)))
+    rate_filter._last.clear()
+    record = make_record("reward %s", (3,))
+    assert rate_filter.filter(record)
+    assert record.getMessage() == "reward 3 (suppressed 1 similar messages)"
+
+
+def test_loggers_are_namespaced():
+    assert get_logger("robosuite.environments.bin_squeeze").name == "robosuite.environments.bin_squeeze"
+    assert get_logger("my_script").name == "robosuite.my_script"
+    assert get_logger("my_script").parent.name == "robosuite"
+
+
+def test_filter_tracks_a_bounded_number_of_messages():
+    rate_filter = RateLimitFilter(interval=3600, max_keys=2)
+    for i in range(5):
+        assert rate_filter.filter(make_record("step {}".format(i), level=logging.INFO))
+    assert len(rate_filter._last) == 2
+    # the most recent messages are still rate limited
+    assert not rate_filter.filter(make_record("step 4", level=logging.INFO))
+    assert rate_filter.filter(make_record("step 0", level=logging.INFO))
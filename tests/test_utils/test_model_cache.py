@@ -0,0 +1,40 @@
+"""
+Tests the keys and the eviction order of the compiled model cache.
+"""
+import os
+
+from robosuite.utils.model_cache import ModelCache
+
+
+def test_key_changes_with_assets(tmp_path):
+    mesh = tmp_path / "bread.stl"
+    mesh.write_bytes(b"solid bread")
+    xml = '<mujoco><asset><mesh file="{}"/></asset></mujoco>'.format(mesh)
+    cache = ModelCache(cache_dir=str(tmp_path / "cache"))
+
+    key = cache.key(xml)
+    assert cache.key(xml) == key
+    mesh.write_bytes(b"solid bread, remeshed")
+    assert cache.key(xml) != key
+
+    key = cache.key(xml)
+    mesh.unlink()
+    assert cache.key(xml) != key
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ModelCache(cache_dir=str(tmp_path), max_bytes=20)
+    paths = [cache.path(name) for name in ("a", "b", "c")]
+    for i, path in enumerate(paths):
+        with open(path, "wb") as f:
+            f.write(b"0123456789")
+        os.utime(path, (1000 + i, 1000 + i))
+    # loading "a" makes it the most recently used entry
+    cache._touch(paths[0])
+
+    cache.evict()
+    assert [os.path.exists(path) for path in paths] == [True, False, True]
+
+    cache.store(cache.path("d"), b"0123456789")
+    assert [os.path.exists(path) for path in paths] == [True, False, False]
+    assert os.path.exists(cache.path("d"))
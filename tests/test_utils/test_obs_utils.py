@@ -0,0 +1,66 @@
+"""
+Tests the observation dtype contract of the bin environments.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from robosuite.utils.obs_utils import ObservationLayout
+
+
+def make_obs_dict():
+    return OrderedDict(
+        [
+            ("image", np.zeros((64, 192, 4), dtype=np.uint8)),
+            ("vis", np.zeros((64, 192, 4), dtype=np.uint8)),
+            ("sequence_vector", np.array([0, 1, 0, 0], dtype=np.int64)),
+        ]
+    )
+
+
+def test_single_image_is_not_copied():
+    obs_dict = make_obs_dict()
+    obs = ObservationLayout("image")(obs_dict)
+    assert obs is obs_dict["image"]
+    assert obs.dtype == np.uint8
+
+
+def test_flat_layout_does_not_upcast_to_int64():
+    obs = ObservationLayout("image", extra_keys=("sequence_vector",))(make_obs_dict())
+    assert obs.dtype == np.float32
+    assert obs.shape == (64 * 192 * 4 + 4,)
+    np.testing.assert_array_equal(obs[-4:], [0, 1, 0, 0])
+
+
+def test_dict_layout_keeps_images_uint8():
+    obs_dict = make_obs_dict()
+    obs = ObservationLayout(["image"], "dict", extra_keys=("sequence_vector",))(obs_dict)
+    assert list(obs.keys()) == ["image", "sequence_vector"]
+    assert obs["image"] is obs_dict["image"]
+    assert obs["sequence_vector"].dtype == np.float32
+
+
+def test_flat_space_contains_observations():
+    layout = ObservationLayout("image")
+    obs = layout(make_obs_dict())
+    space = layout.space(obs)
+    assert space.dtype == np.uint8
+    assert space.contains(obs)
+
+    # images mixed with vectors are flattened to an unbounded float32 Box
+    layout = ObservationLayout("image", extra_keys=("sequence_vector",))
+    obs = layout(make_obs_dict())
+    space = layout.space(obs)
+    assert space.dtype == np.float32
+    assert np.isinf(space.low).all() and np.isinf(space.high).all()
+    assert space.contains(obs)
+
+    layout = ObservationLayout(["image"], "dict")
+    space = layout.space(layout(make_obs_dict()))
+    assert space.spaces["image"].dtype == np.uint8
+
+
+def test_unknown_layout():
+    with pytest.raises(ValueError):
+        ObservationLayout("image", "tuple")
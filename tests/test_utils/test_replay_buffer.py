@@ -0,0 +1,55 @@
+"""
+Tests that the memory mapped replay buffer returns the transitions it was
+given while storing continuing frames once.
+"""
+import numpy as np
+
+from robosuite.utils.replay_buffer import MemmapReplayBuffer
+
+
+def frame(i):
+    return np.full((4, 4, 2), i, dtype=np.uint8)
+
+
+def check_transitions(buffer, expected):
+    # every stored transition is one of the expected ones, and all are stored
+    stored = [int(buffer.frames[idx][0, 0, 0]) for idx in np.flatnonzero(buffer.valid)]
+    assert sorted(stored) == sorted(expected)
+
+    obs, actions, rewards, next_obs, dones = buffer.sample(len(buffer))
+    assert len(obs) == len(buffer)
+    for o, a, r, n, d in zip(obs, actions, rewards, next_obs, dones):
+        i = int(o[0, 0, 0])
+        assert i in expected
+        assert a[0] == i and r == i
+        assert d == expected[i][1]
+        if not d:
+            # next observations of terminal transitions are masked out
+            assert n[0, 0, 0] == expected[i][0]
+
+
+def test_continuing_and_terminal_transitions():
+    buffer = MemmapReplayBuffer(10, (4, 4, 2), (1,), prefetch=False, seed=0)
+    expected = {}
+    # episode 0 -> 1 -> 2 (done), reset to 10 -> 11 -> 12
+    for i, j, done in [(0, 1, 0), (1, 2, 1), (10, 11, 0), (11, 12, 0)]:
+        buffer.add(frame(i), [i], i, frame(j), done)
+        expected[i] = (j, done)
+    assert len(buffer) == 4
+    check_transitions(buffer, expected)
+
+    # a transition that does not continue the previous one keeps its next frame
+    buffer.add(frame(20), [20], 20, frame(21), 0)
+    expected[20] = (21, 0)
+    check_transitions(buffer, expected)
+    buffer.close()
+
+
+def test_ring_wraps_and_prefetches():
+    buffer = MemmapReplayBuffer(5, (4, 4, 2), (1,), seed=0)
+    for i in range(12):
+        buffer.add(frame(i), [i], i, frame(i + 1), 0)
+    assert len(buffer) == 5 and buffer.is_full()
+    check_transitions(buffer, {i: (i + 1, 0) for i in range(7, 12)})
+    check_transitions(buffer, {i: (i + 1, 0) for i in range(7, 12)})
+    buffer.close()
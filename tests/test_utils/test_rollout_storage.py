@@ -0,0 +1,129 @@
+"""
+Tests the preallocated rollout storage against the list-based PPO runner.
+"""
+import functools
+
+import numpy as np
+import pytest
+
+from robosuite.utils.rollout_storage import RolloutStorage, shmem_step_into
+
+
+def sf01(arr):
+    s = arr.shape
+    return arr.swapaxes(0, 1).reshape(s[0] * s[1], *s[2:])
+
+
+def reference_gae(rewards, values, dones, last_values, last_dones, gamma, lam):
+    nsteps = len(rewards)
+    advs = np.zeros_like(rewards)
+    lastgaelam = 0
+    for t in reversed(range(nsteps)):
+        if t == nsteps - 1:
+            nextnonterminal = 1.0 - last_dones
+            nextvalues = last_values
+        else:
+            nextnonterminal = 1.0 - dones[t + 1]
+            nextvalues = values[t + 1]
+        delta = rewards[t] + gamma * nextvalues * nextnonterminal - values[t]
+        advs[t] = lastgaelam = delta + gamma * lam * nextnonterminal * lastgaelam
+    return advs, advs + values
+
+
+def test_rollout_matches_list_runner():
+    nsteps, nenvs, ob_shape = 5, 3, (4, 4, 2)
+    rng = np.random.RandomState(0)
+    storage = RolloutStorage(nsteps, nenvs, ob_shape, ob_dtype=np.uint8, ac_shape=(2,))
+
+    obs = rng.randint(0, 255, (nenvs,) + ob_shape).astype(np.uint8)
+    dones = np.zeros(nenvs, dtype=np.bool_)
+    storage.reset(obs)
+
+    mb = {k: [] for k in ("obs", "actions", "values", "neglogpacs", "dones", "rewards")}
+    for _ in range(nsteps):
+        assert np.array_equal(storage.current_obs, obs)
+        actions = rng.randn(nenvs, 2).astype(np.float32)
+        values = rng.randn(nenvs).astype(np.float32)
+        neglogpacs = rng.randn(nenvs).astype(np.float32)
+        mb["obs"].append(obs.copy())
+        mb["actions"].append(actions)
+        mb["values"].append(values)
+        mb["neglogpacs"].append(neglogpacs)
+        mb["dones"].append(dones)
+
+        obs = rng.randint(0, 255, (nenvs,) + ob_shape).astype(np.uint8)
+        rewards = rng.randn(nenvs).astype(np.float32)
+        dones = rng.rand(nenvs) < 0.3
+        mb["rewards"].append(rewards)
+        storage.insert(actions, values, neglogpacs, rewards, dones, obs=obs)
+
+    mb = {k: np.asarray(v) for k, v in mb.items()}
+    last_values = rng.randn(nenvs).astype(np.float32)
+    storage.compute_returns(last_values, 0.99, 0.95)
+    advs, returns = reference_gae(
+        mb["rewards"], mb["values"], mb["dones"].astype(np.float32), last_values,
+        dones.astype(np.float32), 0.99, 0.95
+    )
+
+    flat_obs, flat_returns, flat_dones, flat_actions, flat_values, flat_neglogpacs = storage.flattened()
+    assert np.array_equal(flat_obs, sf01(mb["obs"]))
+    assert np.allclose(flat_returns, sf01(returns), atol=1e-5)
+    assert np.array_equal(flat_dones, sf01(mb["dones"]))
+    assert np.array_equal(flat_actions, sf01(mb["actions"]))
+    assert np.array_equal(flat_values, sf01(mb["values"]))
+    assert np.array_equal(flat_neglogpacs, sf01(mb["neglogpacs"]))
+    # the flattened arrays are views of the storage
+    assert np.shares_memory(flat_obs, storage.obs)
+
+    storage.after_update()
+    assert storage.step == 0
+    assert np.array_equal(storage.current_obs, obs)
+    assert np.array_equal(storage.current_dones, dones)
+
+
+class CounterEnv:
+    """
+    Observations are filled with 10 * step + @index.
+    """
+
+    def __init__(self, index):
+        from gym import spaces
+
+        self.index = index
+        self.t = 0
+        self.observation_space = spaces.Box(low=0, high=255, shape=(2, 3), dtype=np.uint8)
+        self.action_space = spaces.Box(low=-1., high=1., shape=(1,), dtype=np.float32)
+
+    def _obs(self):
+        return np.full((2, 3), 10 * self.t + self.index, dtype=np.uint8)
+
+    def reset(self):
+        self.t = 0
+        return self._obs()
+
+    def step(self, action):
+        self.t += 1
+        return self._obs(), float(action[0]), self.t == 3, {"t": self.t}
+
+    def close(self):
+        pass
+
+
+def test_shmem_step_into_writes_observations():
+    pytest.importorskip("baselines")
+    from robosuite.utils.shmem_vec_env import ShmemVecEnv
+
+    env_fns = [functools.partial(CounterEnv, i) for i in range(2)]
+    venv = ShmemVecEnv(env_fns, context="fork")
+    try:
+        storage = RolloutStorage(2, 2, (2, 3), ob_dtype=np.uint8, ac_shape=(1,))
+        storage.reset(venv.reset())
+        for step in (1, 2):
+            actions = np.full((2, 1), step, dtype=np.float32)
+            rewards, dones, infos = shmem_step_into(venv, actions, storage.next_obs)
+            np.testing.assert_array_equal(storage.next_obs[:, 0, 0], [10 * step, 10 * step + 1])
+            np.testing.assert_array_equal(rewards, [step, step])
+            assert [info["t"] for info in infos] == [step, step]
+            storage.insert(actions, np.zeros(2), np.zeros(2), rewards, dones)
+    finally:
+        venv.close()
@@ -0,0 +1,83 @@
+"""
+Tests the scenario store round trip and its samplers.
+"""
+import os
+import tempfile
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from robosuite.utils.scenario_store import ScenarioStore, ScenarioSampler, model_signature
+
+
+def make_store():
+    cases = []
+    for i in range(10):
+        cases.append({
+            "obj_names": ["Can1", "Milk1"] if i % 2 else ["Can1", "Milk1", "Bread1"],
+            "obj_poses": np.full((3, 3), 0.01 * i),
+            "tag": "tight" if i < 3 else "loose",
+            "difficulty": float(i),
+        })
+    return ScenarioStore.from_cases(cases)
+
+
+def test_round_trip():
+    store = make_store()
+    store.set_state(4, np.arange(5.), np.arange(4.), "a" * 40)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scenarios.npz")
+        store.save(path)
+        loaded = ScenarioStore.load(path)
+
+    assert len(loaded) == 10
+    assert loaded[1]["obj_names"] == ["Can1", "Milk1"]
+    assert loaded[2]["obj_names"] == ["Can1", "Milk1", "Bread1"]
+    assert np.allclose(loaded[2]["obj_poses"], 0.02)
+    assert loaded[2]["target_object"] is None and loaded[2]["target_pos"] is None
+    assert loaded[2]["qpos"] is None
+    assert np.array_equal(loaded[4]["qpos"], np.arange(5.))
+    assert loaded[4]["state_signature"] == "a" * 40
+    assert loaded[3]["state_signature"] is None
+    assert {tag: len(ids) for tag, ids in loaded.tag_index.items()} == {"tight": 3, "loose": 7}
+
+
+def test_states_of_other_widths_are_rejected():
+    store = make_store()
+    store.set_state(0, np.arange(5.), np.arange(4.), "a" * 40)
+    with pytest.raises(ValueError):
+        store.set_state(1, np.arange(6.), np.arange(5.), "b" * 40)
+    assert store.has_state.tolist() == [True] + [False] * 9
+
+    other = make_store()
+    other.set_state(0, np.arange(6.), np.arange(5.), "b" * 40)
+    with pytest.raises(ValueError):
+        ScenarioStore.concatenate([store, other])
+
+    # stores without states are padded with unset states
+    merged = ScenarioStore.concatenate([store, make_store()])
+    assert len(merged) == 20
+    assert merged.has_state.sum() == 1
+    assert np.array_equal(merged[0]["qpos"], np.arange(5.))
+    assert merged[10]["qpos"] is None
+
+
+def test_samplers():
+    store = make_store()
+
+    sampler = ScenarioSampler(store, mode="stratified", tag_weights={"loose": 0.}, seed=0)
+    assert all(store.tags[sampler.sample_index()] == "tight" for _ in range(50))
+
+    sampler = ScenarioSampler(store, mode="curriculum", min_fraction=0.2, seed=0)
+    assert set(sampler.sample_index() for _ in range(100)) == {0, 1}
+    sampler.set_progress(1.)
+    assert len(set(sampler.sample_index() for _ in range(500))) == 10
+
+
+def test_model_signature_depends_on_joint_order():
+    model = SimpleNamespace(nq=14, nv=12, joint_names=("Can1", "Milk1"))
+    same = SimpleNamespace(nq=14, nv=12, joint_names=("Can1", "Milk1"))
+    swapped = SimpleNamespace(nq=14, nv=12, joint_names=("Milk1", "Can1"))
+    assert model_signature(model) == model_signature(same)
+    assert model_signature(model) != model_signature(swapped)
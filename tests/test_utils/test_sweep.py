@@ -0,0 +1,53 @@
+"""
+Tests the grid expansion, argument passing and core packing of the sweep runner.
+"""
+import os
+
+from robosuite.scripts.sweep import expand_grid, first_fit, parse_fps, run_name, run_params, to_argv
+
+
+def test_expand_grid():
+    runs = expand_grid({"num_env": 4, "max": 0.}, {"max": [1e-5, 3e-5], "ent_coef": [0.2]})
+    assert runs == [
+        {"num_env": 4, "max": 1e-5, "ent_coef": 0.2},
+        {"num_env": 4, "max": 3e-5, "ent_coef": 0.2},
+    ]
+    assert expand_grid({"num_env": 4}, {}) == [{"num_env": 4}]
+
+
+def test_to_argv_passes_false_as_empty_string():
+    assert to_argv({"num_env": 4, "log": True, "random_quat": False}) == [
+        "--num_env", "4", "--log", "True", "--random_quat", "",
+    ]
+
+
+def test_runs_get_their_own_directory():
+    grid = {"seed": [0, 1]}
+    names = [run_name(i, params, grid) for i, params in enumerate(expand_grid({"debug": "sweep"}, grid))]
+    dirs = [run_params({"debug": "sweep"}, name)["debug"] for name in names]
+    assert dirs == [os.path.join("sweep", "run000_seed0"), os.path.join("sweep", "run001_seed1")]
+
+
+def test_first_fit():
+    assigned, free = first_fit([3, 2, 1], list(range(6)))
+    assert assigned == [(0, [0, 1, 2]), (1, [3, 4]), (2, [5])]
+    assert free == []
+    assert first_fit([], [0, 1]) == ([], [0, 1])
+
+
+def test_first_fit_does_not_skip_the_head_of_the_queue():
+    assigned, free = first_fit([3, 5, 2], list(range(6)))
+    # the 5-core run does not fit after the first one, the 2-core run waits for it
+    assert assigned == [(0, [0, 1, 2])]
+    assert free == [3, 4, 5]
+
+
+def test_fps_of_the_last_attempt(tmp_path):
+    log_path = str(tmp_path / "run.log")
+    with open(log_path, "w") as f:
+        f.write("| fps | 100 |\n")
+    offset = os.path.getsize(log_path)
+    with open(log_path, "a") as f:
+        f.write("### attempt 2\n| fps | 250 |\n")
+    assert parse_fps(log_path) == [100., 250.]
+    assert parse_fps(log_path, offset) == [250.]
@@ -0,0 +1,50 @@
+"""
+Tests the ring-buffer frame stacking wrapper against np.concatenate.
+"""
+import numpy as np
+
+from robosuite.wrappers import FrameStackWrapper
+
+
+class CountingEnv:
+    """Emits frames filled with the current step count."""
+
+    def __init__(self, shape):
+        self.shape = shape
+        self.t = 0
+
+    def reset(self):
+        self.t = 0
+        return np.full(self.shape, self.t, dtype=np.uint8)
+
+    def step(self, action):
+        self.t += 1
+        return np.full(self.shape, self.t, dtype=np.uint8), 0., False, {}
+
+
+def test_stacking_matches_concatenate():
+    k = 3
+    env = FrameStackWrapper(CountingEnv((4, 5, 2)), num_frames=k)
+    frames = [env.env.reset()] * k
+    obs = env.reset()
+    assert obs.shape == (4, 5, 2 * k)
+    assert np.array_equal(obs, np.concatenate(frames, axis=-1))
+
+    for _ in range(7):
+        obs, _, _, _ = env.step(None)
+        frames = frames[1:] + [np.full((4, 5, 2), env.env.t, dtype=np.uint8)]
+        assert np.array_equal(obs, np.concatenate(frames, axis=-1))
+        # stacked observations are views into the ring buffer
+        assert np.shares_memory(obs, env._buffer)
+
+
+def test_reset_reuses_buffer_and_out():
+    out = np.zeros(12, dtype=np.uint8)
+    env = FrameStackWrapper(CountingEnv((3,)), num_frames=4, out=out)
+    env.reset()
+    buffer = env._buffer
+    env.step(None)
+    obs = env.reset()
+    assert env._buffer is buffer
+    assert obs is out
+    assert np.all(out == 0)